@@ -0,0 +1,325 @@
+"""
+Pipeline assíncrono (asyncio) do monitoramento do DOERJ
+Executa as etapas busca → normalização → banco → e-mail como filas encadeadas,
+permitindo acompanhar centenas de termos em um único processo sem threads.
+As regras são as do modo síncrono (publish_term): cache de datas conhecidas,
+títulos em raw_title, outbox (NOTIFY_MODE=outbox) e registro em notifications_log.
+Tudo o que bloqueia (carga do cache, assinaturas) é resolvido antes do pipeline.
+
+Uso:
+    python async_pipeline.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+import aiosmtplib
+import httpx
+import psycopg
+
+import metrics
+from busca_decreto_receita_despesa import (
+    DIARIO_URL,
+    NOTIFY_MODE,
+    build_publications,
+    extract_date_strings,
+    load_search_terms,
+)
+from db import (
+    LOG_NOTIFICATIONS_SQL,
+    UPSERT_AND_ENQUEUE_SQL,
+    UPSERT_PUBLICATIONS_BATCH_SQL,
+    batch_params,
+    get_db_conninfo,
+    split_new_dates,
+)
+from doerj_http import HTTP_TIMEOUT, USER_AGENT, build_search_request, check_results
+from known_dates_cache import get_known_dates_cache
+from notifier import NOTIFICATIONS_LOG, build_email_message
+from results_parser import parse_publications
+from subscriptions import get_subscriptions
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+ASYNC_CONCURRENCY = int(os.getenv("ASYNC_CONCURRENCY", "10"))
+# Tamanho máximo de cada fila entre etapas (backpressure)
+ASYNC_QUEUE_SIZE = int(os.getenv("ASYNC_QUEUE_SIZE", "50"))
+
+# Marca de fim de fila
+_DONE = object()
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Cria o cliente HTTP assíncrono compartilhado pelos workers de busca"""
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT, "Accept-Language": "pt-BR,pt;q=0.9"},
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=ASYNC_CONCURRENCY),
+    )
+
+
+async def fetch_page_async(client: httpx.AsyncClient, search_term: str, url: str = DIARIO_URL) -> str:
+    """
+    Busca o termo no DOERJ via HTTP assíncrono e retorna o HTML dos resultados
+
+    Raises:
+        BuscaHttpError se a página não contiver resultados
+    """
+    form_response = await client.get(url)
+    form_response.raise_for_status()
+    method, action, fields = build_search_request(form_response.text, str(form_response.url), search_term)
+
+    if method == "post":
+        response = await client.post(action, data=fields)
+    else:
+        response = await client.get(action, params=fields)
+    response.raise_for_status()
+
+    page_html = response.text
+    check_results(page_html, search_term)
+    return page_html
+
+
+async def fetch_publications_async(client: httpx.AsyncClient, search_term: str,
+                                   url: str = DIARIO_URL) -> Dict[date, Optional[str]]:
+    """Busca um termo e devolve {data: título}, mais recente primeiro (como collect_term)"""
+    page_html = await fetch_page_async(client, search_term, url)
+    records = parse_publications(page_html, url)
+    date_strings = [r.date for r in records] or extract_date_strings(page_html)
+    logger.info(f"Encontradas {len(date_strings)} datas na busca por '{search_term}'")
+    return build_publications(records, date_strings)
+
+
+async def fetch_dates_async(client: httpx.AsyncClient, search_term: str, url: str = DIARIO_URL) -> List[date]:
+    """Busca um termo e devolve as datas já normalizadas (mesma regra do modo síncrono)"""
+    return list(await fetch_publications_async(client, search_term, url))
+
+
+async def _fetch_worker(client, term_queue: asyncio.Queue, db_queue: asyncio.Queue, failed: List[str]):
+    while True:
+        term = await term_queue.get()
+        try:
+            if term is _DONE:
+                return
+            start = time.perf_counter()
+            publications = await fetch_publications_async(client, term)
+            logger.info(f"Termo '{term}': coleta concluída em {time.perf_counter() - start:.2f}s")
+            if publications:
+                await db_queue.put((term, publications))
+            else:
+                logger.warning(f"Nenhuma data encontrada para '{term}'")
+        except Exception as e:
+            logger.error(f"Falha ao buscar termo '{term}': {e}")
+            failed.append(term)
+        finally:
+            term_queue.task_done()
+
+
+async def _db_worker(conn: psycopg.AsyncConnection, db_queue: asyncio.Queue,
+                     notify_queue: asyncio.Queue, failed: List[str], known_dates):
+    outbox = NOTIFY_MODE == "outbox"
+    sql = UPSERT_AND_ENQUEUE_SQL if outbox else UPSERT_PUBLICATIONS_BATCH_SQL
+    while True:
+        item = await db_queue.get()
+        try:
+            if item is _DONE:
+                return
+            term, publications = item
+            # Cache já carregado antes do pipeline: filter_new não consulta o banco
+            candidates = known_dates.filter_new(term, list(publications))
+            if not candidates:
+                logger.info(f"Termo '{term}': nenhuma data nova (cache), banco não consultado")
+                continue
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute(sql, batch_params({term: candidates}, {term: publications}))
+                    inserted = await cur.fetchall()
+                await conn.commit()
+                new_dates = split_new_dates({term: candidates}, inserted)[term]
+            except Exception as e:
+                await _rollback(conn)
+                logger.error(f"Erro ao inserir publicações de '{term}' no banco: {e}")
+                failed.append(term)
+                continue
+            known_dates.add(term, candidates)
+            metrics.record_dates(term, len(candidates), len(new_dates))
+
+            if new_dates and outbox:
+                logger.info(f"Termo '{term}': {len(new_dates)} novas publicações enfileiradas para notificação")
+            elif new_dates:
+                await notify_queue.put((term, new_dates, publications))
+            else:
+                logger.info(f"Termo '{term}': nenhuma nova publicação encontrada")
+        finally:
+            db_queue.task_done()
+
+
+async def send_email_async(new_dates: List[date], search_term: str,
+                           titles: Optional[Dict[date, str]] = None, recipients: Optional[List[str]] = None):
+    """Versão assíncrona de send_email (mesmo conteúdo de mensagem)"""
+    msg = build_email_message(new_dates, search_term, titles, recipients)
+    await aiosmtplib.send(
+        msg,
+        hostname=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+        port=int(os.getenv("SMTP_PORT", "587")),
+        username=os.getenv("EMAIL_USER"),
+        password=os.getenv("EMAIL_PASSWORD"),
+        start_tls=True,
+    )
+    logger.info(f"E-mail enviado ({search_term}) para {msg['To']}")
+
+
+async def _notify_worker(notify_queue: asyncio.Queue, failed: List[str],
+                         recipients_by_term: Dict[str, List[str]], log_entries: List[tuple]):
+    while True:
+        item = await notify_queue.get()
+        try:
+            if item is _DONE:
+                return
+            term, new_dates, titles = item
+            recipients = recipients_by_term[term]
+            email_to = ", ".join(recipients)
+            try:
+                await send_email_async(new_dates, term, titles, recipients)
+                logger.info(f"Termo '{term}': {len(new_dates)} novas publicações notificadas")
+            except Exception as e:
+                logger.error(f"Erro ao enviar email de '{term}': {e}")
+                log_entries.extend((d, term, email_to, "failed", str(e)) for d in new_dates)
+                failed.append(term)
+                continue
+            log_entries.extend((d, term, email_to, "sent", None) for d in new_dates)
+        finally:
+            notify_queue.task_done()
+
+
+async def _rollback(conn: psycopg.AsyncConnection):
+    """Rollback que não falha: com a conexão caída, o próprio rollback levanta erro"""
+    try:
+        await conn.rollback()
+    except Exception as e:
+        logger.warning(f"Rollback não concluído: {e}")
+
+
+async def write_notifications_log(conn: psycopg.AsyncConnection, entries: List[tuple]):
+    """Grava em notifications_log, em um único comando, os envios do pipeline (como NotificationDispatcher)"""
+    if not entries:
+        return
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(LOG_NOTIFICATIONS_SQL, [list(column) for column in zip(*entries)])
+        await conn.commit()
+    except Exception as e:
+        # O e-mail já foi enviado: a falha no registro não deve derrubar a execução
+        await _rollback(conn)
+        logger.error(f"Erro ao registrar {len(entries)} envio(s) em notifications_log: {e}")
+
+
+async def run_pipeline(search_terms: List[str], conn: psycopg.AsyncConnection,
+                       client: Optional[httpx.AsyncClient] = None, known_dates=None,
+                       log_to_db: bool = NOTIFICATIONS_LOG) -> List[str]:
+    """
+    Executa o pipeline para a lista de termos
+
+    O cache de datas conhecidas e os destinatários de cada termo são carregados
+    antes (em uma thread), para que nada bloqueie o event loop durante o pipeline.
+    Se uma etapa cair com erro, as demais são canceladas (em vez de ficarem presas
+    em uma fila que ninguém mais consome) e os termos são contados como falha.
+
+    Returns:
+        Lista dos termos que falharam em alguma etapa
+    """
+    known_dates = known_dates if known_dates is not None else get_known_dates_cache()
+    await asyncio.to_thread(known_dates.ensure_loaded, search_terms)
+    recipients_by_term = await asyncio.to_thread(
+        lambda: {term: get_subscriptions().recipients(term) for term in search_terms}
+    )
+    failed: List[str] = []
+    log_entries: List[tuple] = []
+    term_queue: asyncio.Queue = asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE)
+    db_queue: asyncio.Queue = asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE)
+    notify_queue: asyncio.Queue = asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE)
+
+    own_client = client is None
+    if own_client:
+        client = create_async_client()
+
+    fetchers = [
+        asyncio.create_task(_fetch_worker(client, term_queue, db_queue, failed))
+        for _ in range(max(1, ASYNC_CONCURRENCY))
+    ]
+    db_task = asyncio.create_task(_db_worker(conn, db_queue, notify_queue, failed, known_dates))
+    notify_task = asyncio.create_task(_notify_worker(notify_queue, failed, recipients_by_term, log_entries))
+
+    async def feed():
+        # put() bloqueia quando a fila enche, segurando o produtor
+        for term in search_terms:
+            await term_queue.put(term)
+        for _ in fetchers:
+            await term_queue.put(_DONE)
+
+        await asyncio.gather(*fetchers)
+        await db_queue.put(_DONE)
+        await db_task
+        await notify_queue.put(_DONE)
+        await notify_task
+
+    tasks = [asyncio.create_task(feed()), *fetchers, db_task, notify_task]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        errors = [task.exception() for task in done if not task.cancelled() and task.exception()]
+        if errors:
+            logger.error(f"Pipeline interrompido por erro em uma etapa: {errors[0]!r}")
+            failed.extend(term for term in search_terms if term not in failed)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if own_client:
+            await client.aclose()
+        if log_to_db:
+            await write_notifications_log(conn, log_entries)
+
+    return failed
+
+
+async def async_main():
+    """Ponto de entrada assíncrono equivalente a main()"""
+    logger.info("=" * 60)
+    logger.info("Iniciando execução do scraper (pipeline assíncrono)")
+    logger.info("=" * 60)
+
+    # Assinaturas lidas do banco em uma thread, fora do event loop
+    search_terms = await asyncio.to_thread(load_search_terms)
+    if not search_terms:
+        logger.error("Nenhum termo definido em SEARCH_TERMS nem nas assinaturas")
+        return
+
+    logger.info(f"Monitorando {len(search_terms)} termo(s) com concorrência {ASYNC_CONCURRENCY}")
+    run_start = time.perf_counter()
+
+    async with await psycopg.AsyncConnection.connect(get_db_conninfo()) as conn:
+        logger.info("Conexão com banco de dados estabelecida")
+        failed = await run_pipeline(search_terms, conn)
+    get_known_dates_cache().save()
+
+    logger.info("=" * 60)
+    if failed:
+        logger.warning(f"Execução finalizada com {len(failed)} termo(s) com falha: {failed}")
+    else:
+        logger.info("Execução finalizada com sucesso")
+    logger.info(f"Tempo total: {time.perf_counter() - run_start:.2f}s")
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    # psycopg assíncrono não funciona com o ProactorEventLoop padrão do Windows
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(async_main())
@@ -0,0 +1,105 @@
+"""
+Carga única do histórico de publicações (backfill)
+Percorre todas as páginas de resultados de cada termo e grava as datas em
+decree_publications em lote, sem enviar e-mails. Depois da carga, as execuções
+diárias só notificam publicações posteriores a ela.
+
+Uso:
+    python backfill.py                        # termos de SEARCH_TERMS
+    python backfill.py 46930 47000 --max-pages 200
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import closing
+from datetime import date
+from typing import Dict, List, Optional
+
+import busca_decreto_receita_despesa as scraper
+import db
+from driver_pool import DriverPool
+from known_dates_cache import get_known_dates_cache
+from results_parser import parse_publications
+
+logger = logging.getLogger(__name__)
+
+# Limite de páginas por termo na carga do histórico
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "500"))
+
+
+def crawl_history(search_term: str, driver_pool: Optional[DriverPool] = None,
+                  max_pages: int = BACKFILL_MAX_PAGES) -> Dict[date, Optional[str]]:
+    """
+    Lê todas as páginas de resultados do termo, sem parar em datas já gravadas
+
+    A página N+1 é pré-buscada desde a primeira página.
+
+    Returns:
+        Dicionário {data: título}, mais recente primeiro
+    """
+    records, date_strings = [], []
+    with closing(scraper.iter_result_pages(search_term, driver_pool, max_pages, prefetch_from=1)) as pages:
+        for page_html in pages:
+            page_records = parse_publications(page_html, scraper.DIARIO_URL)
+            page_dates = [r.date for r in page_records] or scraper.DATE_PATTERN.findall(page_html)
+            if not page_dates:
+                break
+            records.extend(page_records)
+            date_strings.extend(page_dates)
+    return scraper.build_publications(records, date_strings)
+
+
+def backfill(search_terms: List[str], max_pages: int = BACKFILL_MAX_PAGES) -> List[str]:
+    """
+    Carrega o histórico de cada termo em decree_publications (um lote por termo)
+
+    Returns:
+        Lista dos termos que falharam
+    """
+    known_dates = get_known_dates_cache()
+    failed_terms = []
+
+    with DriverPool(scraper.create_chrome_driver, 1, scraper.BROWSER_MAX_PAGES) as driver_pool:
+        for term in search_terms:
+            start = time.perf_counter()
+            try:
+                publications = crawl_history(term, driver_pool, max_pages)
+                with db.connection() as conn:
+                    new_dates = db.upsert_publications(conn, list(publications), term, publications)
+                known_dates.add(term, publications)
+                logger.info(
+                    f"Termo '{term}': {len(publications)} datas no histórico, {len(new_dates)} gravadas "
+                    f"em {time.perf_counter() - start:.2f}s"
+                )
+            except Exception as e:
+                logger.error(f"Falha na carga do histórico de '{term}': {e}")
+                failed_terms.append(term)
+
+    known_dates.save()
+    return failed_terms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("terms", nargs="*", help="termos a carregar (padrão: SEARCH_TERMS)")
+    parser.add_argument("--max-pages", type=int, default=BACKFILL_MAX_PAGES, help="limite de páginas por termo")
+    args = parser.parse_args()
+
+    search_terms = args.terms or scraper.load_search_terms()
+    if not search_terms:
+        logger.error("Nenhum termo informado e SEARCH_TERMS vazio")
+        sys.exit(1)
+
+    logger.info(f"Carga do histórico de {len(search_terms)} termo(s): {search_terms}")
+    failed_terms = backfill(search_terms, args.max_pages)
+    if failed_terms:
+        logger.warning(f"Carga finalizada com {len(failed_terms)} termo(s) com falha: {failed_terms}")
+        sys.exit(1)
+    logger.info("Carga do histórico finalizada com sucesso")
+
+
+if __name__ == "__main__":
+    main()
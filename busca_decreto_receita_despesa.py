@@ -7,23 +7,47 @@ import os
 import sys
 import logging
 import re
-import smtplib
 import time
-from datetime import datetime
-from typing import List
-from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
-import psycopg
 from dotenv import load_dotenv
 
+from doerj_http import fetch_page_http, get_thread_session, iter_result_pages_http
+from chrome_profile import CHROME_LEAN, LeanChrome, browser_rss_bytes
+from cluster import get_cluster
+from driver_pool import DriverPool
+from edition import EDITION_LOOKBACK_DAYS, get_edition_scanner
+import db
+import metrics
+from db import upsert_publications, upsert_publications_batch
+from known_dates_cache import get_known_dates_cache
+from notifier import NotificationDispatcher
+from page_archive import PAGE_ARCHIVE_FLUSH_TIMEOUT, get_page_archive
+from page_fingerprint import get_fingerprint_store
+from result_index import get_result_index
+from results_parser import Publication, find_next_page_url, parse_publications, titles_by_date
+from subscriptions import get_subscriptions
+from waits import (
+    CLICK_POINTER_MS,
+    WAIT_CLICK_TIMEOUT,
+    WAIT_FORM_TIMEOUT,
+    WAIT_RESULTS_TIMEOUT,
+    WaitBudget,
+    backoff_wait,
+    retry_delay,
+    wait_until_stable,
+)
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,32 +63,32 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Constantes
-DIARIO_URL = "https://www.ioerj.com.br/portal/modules/conteudoonline/busca_do.php?acao=busca"
+DIARIO_URL = os.getenv(
+    "DIARIO_URL",
+    "https://www.ioerj.com.br/portal/modules/conteudoonline/busca_do.php?acao=busca",
+)
 SEARCH_TERM = os.getenv("SEARCH_TERM", "46930")
 HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
-
-
-def get_db_connection():
-    """Cria e retorna uma conexão com o banco PostgreSQL"""
-    try:
-        # Tentar usar DSN primeiro
-        dsn = os.getenv("POSTGRES_DSN")
-        if dsn:
-            conn = psycopg.connect(dsn)
-        else:
-            # Caso contrário, construir a string de conexão
-            conn = psycopg.connect(
-                host=os.getenv("POSTGRES_HOST", "localhost"),
-                port=os.getenv("POSTGRES_PORT", "5432"),
-                dbname=os.getenv("POSTGRES_DB"),
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD")
-            )
-        logger.info("Conexão com banco de dados estabelecida")
-        return conn
-    except Exception as e:
-        logger.error(f"Erro ao conectar ao banco de dados: {e}")
-        raise
+# Motor de busca: "http" (formulário direto, Selenium como fallback) ou "selenium"
+FETCH_ENGINE = os.getenv("FETCH_ENGINE", "http").lower()
+DATE_PATTERN = re.compile(r'\b\d{2}/\d{2}/\d{4}\b')
+# Datas já convertidas, compartilhadas entre os termos (e execuções do scheduler); None = inválida
+DATE_CACHE_MAX = int(os.getenv("DATE_CACHE_MAX", "50000"))
+_date_cache: Dict[str, Optional[date]] = {}
+# Pool de navegadores compartilhado entre os termos de uma execução
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))
+# Termos buscados em paralelo (1 = sequencial)
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "1"))
+# Gravação no banco: "term" (uma transação por termo) ou "run" (todos os termos em uma transação)
+UPSERT_MODE = os.getenv("UPSERT_MODE", "term").lower()
+# Notificação: "inline" (e-mail enviado durante a execução) ou "outbox"
+# (datas novas enfileiradas no banco e enviadas pelo worker: python outbox.py)
+NOTIFY_MODE = os.getenv("NOTIFY_MODE", "inline").lower()
+# Modo de busca: "term" (uma busca no site por termo) ou "edition" (lê a edição do dia uma vez, edition.py)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "term").lower()
+# Páginas de resultados percorridas por termo (a busca para antes, ao chegar a uma data já gravada)
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "10"))
 
 
 def create_chrome_driver() -> webdriver.Chrome:
@@ -81,21 +105,30 @@ def create_chrome_driver() -> webdriver.Chrome:
 
     # Selenium Manager gerencia o driver automaticamente (Selenium 4.6+)
     service = Service("/usr/bin/chromedriver")
-    driver = webdriver.Chrome(service=service, options=options)
+    with metrics.timed("driver_start"):
+        if CHROME_LEAN:
+            driver = LeanChrome(service, options)
+        else:
+            driver = webdriver.Chrome(service=service, options=options)
     driver.set_page_load_timeout(30)
 
     return driver
 
 
-def safe_click_with_retry(driver, locator, wait_time=15, max_retries=3):
+def safe_click_with_retry(driver, locator, wait_time=WAIT_CLICK_TIMEOUT, max_retries=3,
+                          budget: Optional[WaitBudget] = None):
     """
     Tenta clicar em um elemento com retry para evitar StaleElementReferenceException
 
+    Antes do clique, espera a página parar de mudar (em vez de uma pausa fixa);
+    entre as tentativas, a espera cresce exponencialmente.
+
     Args:
         driver: Instância do WebDriver
         locator: Tupla (By.TYPE, "value") para localizar o elemento
         wait_time: Tempo de espera em segundos
         max_retries: Número máximo de tentativas
+        budget: Orçamento de tempo do termo (limita as esperas e as tentativas)
 
     Returns:
         True se o clique foi bem-sucedido
@@ -105,14 +138,13 @@ def safe_click_with_retry(driver, locator, wait_time=15, max_retries=3):
     """
     for attempt in range(max_retries):
         try:
-            element = WebDriverWait(driver, wait_time).until(
-                EC.element_to_be_clickable(locator)
-            )
-            # Adicionar pequeno delay para estabilizar
-            time.sleep(0.5)
+            timeout = budget.step(wait_time) if budget else wait_time
+            element = backoff_wait(driver, EC.element_to_be_clickable(locator), timeout)
+            # Estabilizar: DOM parado e página carregada
+            wait_until_stable(driver)
 
             # Tentar clicar com ActionChains
-            actions = ActionChains(driver)
+            actions = ActionChains(driver, duration=CLICK_POINTER_MS)
             actions.move_to_element(element).click().perform()
 
             logger.info(f"Clique bem-sucedido no elemento {locator}")
@@ -122,136 +154,275 @@ def safe_click_with_retry(driver, locator, wait_time=15, max_retries=3):
             logger.warning(f"Tentativa {attempt + 1}/{max_retries}: Elemento obsoleto, tentando novamente...")
             if attempt == max_retries - 1:
                 raise
-            time.sleep(1)
+            metrics.RETRIES.labels("click").inc()
+            time.sleep(retry_delay(attempt, budget=budget))
         except Exception as e:
             logger.warning(f"Tentativa {attempt + 1}/{max_retries}: Erro {type(e).__name__}, tentando novamente...")
+            if isinstance(e, TimeoutException):
+                metrics.TIMEOUTS.labels("click").inc()
             if attempt == max_retries - 1:
                 raise
-            time.sleep(1)
+            metrics.RETRIES.labels("click").inc()
+            time.sleep(retry_delay(attempt, budget=budget))
 
     return False
 
 
-#def fetch_publications(search_term: str = SEARCH_TERM) -> List[str]:
-def fetch_publications(search_term: str):
+def search_with_driver(driver, search_term: str, budget: Optional[WaitBudget] = None) -> str:
     """
-    Realiza scraping do site do DOERJ e retorna lista de datas encontradas
+    Executa a busca em um navegador já aberto e retorna o HTML dos resultados
+
+    Recarrega o formulário a cada chamada, então o mesmo navegador pode
+    ser reutilizado para vários termos.
 
     Args:
+        driver: Instância do WebDriver
         search_term: Termo de busca (número do decreto)
+        budget: Orçamento de tempo do termo (padrão: um novo, de WAIT_TERM_BUDGET)
 
     Returns:
-        Lista de strings com datas no formato dd/mm/yyyy
+        HTML da página de resultados
     """
-    driver = None
-    try:
-        logger.info(f"Iniciando busca por '{search_term}' no DOERJ")
-        driver = create_chrome_driver()
+    budget = budget or WaitBudget()
+    with metrics.timed("page_load", search_term):
         driver.get(DIARIO_URL)
 
         # Esperar e preencher campo de busca
-        input_box = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.NAME, "textobusca"))
+        input_box = backoff_wait(
+            driver, EC.presence_of_element_located((By.NAME, "textobusca")), budget.step(WAIT_FORM_TIMEOUT)
         )
-        input_box.clear()
-        input_box.send_keys(search_term)
-        logger.info(f"Campo de busca preenchido com '{search_term}'")
+    input_box.clear()
+    input_box.send_keys(search_term)
+    logger.info(f"Campo de busca preenchido com '{search_term}'")
 
-        # Clicar no botão de busca com retry
-        safe_click_with_retry(driver, (By.NAME, "buscar"), wait_time=15, max_retries=3)
-        logger.info("Botão de busca clicado")
+    # Clicar no botão de busca com retry
+    with metrics.timed("click", search_term):
+        safe_click_with_retry(driver, (By.NAME, "buscar"), max_retries=3, budget=budget)
+    logger.info("Botão de busca clicado")
 
-        # Aguardar resultados aparecerem (sem guardar referência a elementos)
-        results_locator = (By.CSS_SELECTOR, "table tbody tr")
-        try:
-            WebDriverWait(driver, 20).until(EC.presence_of_element_located(results_locator))
-            logger.info("Resultados carregados com sucesso")
-        except TimeoutException as exc:
-            logger.error("Resultados não carregaram a tempo", exc_info=True)
-            raise
+    # Aguardar resultados aparecerem (sem guardar referência a elementos)
+    results_locator = (By.CSS_SELECTOR, "table tbody tr")
+    try:
+        with metrics.timed("results_wait", search_term):
+            backoff_wait(driver, EC.presence_of_element_located(results_locator), budget.step(WAIT_RESULTS_TIMEOUT))
+        logger.info("Resultados carregados com sucesso")
+    except TimeoutException as exc:
+        metrics.TIMEOUTS.labels("results_wait").inc()
+        logger.error("Resultados não carregaram a tempo", exc_info=True)
+        raise
 
-        # Extrair datas diretamente do HTML da página (evita stale elements)
-        page_html = driver.page_source
-        date_pattern = r'\b\d{2}/\d{2}/\d{4}\b'
-        dates = re.findall(date_pattern, page_html)
+    # Ler o HTML da página de uma vez (evita stale elements)
+    return driver.page_source
 
-        with open("last_page.html", "w", encoding="utf-8") as f:
-            f.write(page_html)
-        logger.info("HTML salvo em last_page.html")
 
-        logger.info(f"Encontradas {len(dates)} datas na busca")
-        return dates
+@contextmanager
+def borrow_driver(driver_pool: Optional[DriverPool] = None):
+    """Empresta um navegador do pool ou, sem pool, abre um só para o bloco e o fecha ao final"""
+    if driver_pool is not None:
+        with driver_pool.acquire() as driver:
+            yield driver
+        return
 
-    except Exception as e:
-        logger.error(f"Erro ao realizar scraping: {e}")
-        raise
+    driver = None
+    try:
+        driver = create_chrome_driver()
+        yield driver
     finally:
         if driver:
             driver.quit()
             logger.info("Navegador fechado")
 
 
-def normalize_dates(date_strings: List[str]) -> List[datetime.date]:
+def fetch_page_selenium(search_term: str, driver_pool: Optional[DriverPool] = None) -> str:
     """
-    Converte strings de data para objetos date e remove duplicatas
+    Realiza a busca no DOERJ com o Chrome (Selenium) e retorna o HTML dos resultados
 
     Args:
-        date_strings: Lista de strings no formato dd/mm/yyyy
+        search_term: Termo de busca (número do decreto)
+        driver_pool: Pool de navegadores da execução. Sem pool, abre e fecha
+            um navegador só para esta busca.
 
     Returns:
-        Lista de objetos date ordenados (mais recente primeiro)
+        HTML da página de resultados
     """
-    dates = []
-    for date_str in date_strings:
-        try:
-            date_obj = datetime.strptime(date_str, "%d/%m/%Y").date()
-            dates.append(date_obj)
-        except ValueError:
-            logger.warning(f"Data inválida ignorada: {date_str}")
+    with borrow_driver(driver_pool) as driver:
+        return search_with_driver(driver, search_term)
+
+
+def iter_result_pages_selenium(search_term: str, driver_pool: Optional[DriverPool] = None,
+                               max_pages: int = 1) -> Iterator[str]:
+    """Gera o HTML de cada página de resultados no Chrome, seguindo o link de próxima página"""
+    with borrow_driver(driver_pool) as driver:
+        page_html = search_with_driver(driver, search_term)
+        visited = {driver.current_url}
+        for page_number in range(1, max_pages + 1):
+            yield page_html
+
+            next_url = find_next_page_url(page_html, driver.current_url)
+            if not next_url or next_url in visited:
+                return
+            if page_number == max_pages:
+                logger.warning(
+                    f"'{search_term}': limite de {max_pages} página(s) atingido; histórico mais antigo não lido"
+                )
+                return
 
-    # Remover duplicatas e ordenar (mais recente primeiro)
-    unique_dates = sorted(list(set(dates)), reverse=True)
-    logger.info(f"{len(unique_dates)} datas únicas após normalização")
+            with metrics.timed("page_load", search_term):
+                driver.get(next_url)
+                visited.update((next_url, driver.current_url))
+                backoff_wait(
+                    driver, EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr")), WAIT_RESULTS_TIMEOUT
+                )
+            page_html = driver.page_source
+            logger.info(f"Página {page_number + 1} de resultados lida para '{search_term}'")
 
-    return unique_dates
 
+def iter_result_pages(search_term: str, driver_pool: Optional[DriverPool] = None,
+                      max_pages: int = CRAWL_MAX_PAGES, prefetch_from: int = 2) -> Iterator[str]:
+    """
+    Gera o HTML das páginas de resultados do termo, da mais recente para a mais antiga
 
-def upsert_publications(conn, dates: List[datetime.date], search_term: str):
+    Usa o motor definido em FETCH_ENGINE. No modo "http", o Selenium só é
+    usado se a primeira página falhar; falhas nas páginas seguintes são
+    propagadas (o termo é reprocessado na próxima execução).
     """
-    Insere datas no banco associadas ao termo de busca.
-    Retorna apenas as datas novas.
+    if FETCH_ENGINE == "http":
+        pages = iter_result_pages_http(search_term, DIARIO_URL, get_thread_session(), max_pages, prefetch_from)
+        try:
+            first_page = next(pages)
+        except StopIteration:
+            return
+        except Exception as e:
+            logger.warning(f"Busca HTTP falhou para '{search_term}' ({e}); usando Selenium como fallback")
+            pages = iter_result_pages_selenium(search_term, driver_pool, max_pages)
+            first_page = None
+        with closing(pages):
+            if first_page is not None:
+                yield first_page
+            yield from pages
+    else:
+        with closing(iter_result_pages_selenium(search_term, driver_pool, max_pages)) as pages:
+            yield from pages
+
+
+def extract_date_strings(page_html: str) -> List[str]:
     """
-    new_dates = []
+    Extrai as datas dd/mm/yyyy das linhas da tabela de resultados
 
-    try:
-        with conn.cursor() as cur:
-            for date in dates:
-                cur.execute(
-                    """
-                    INSERT INTO decree_publications (publication_date, search_term)
-                    VALUES (%s, %s)
-                    ON CONFLICT (publication_date, search_term) DO NOTHING
-                    RETURNING publication_date
-                    """,
-                    (date, search_term)
-                )
+    Datas de cabeçalho e rodapé ficam de fora. Se a página não tiver a tabela
+    esperada (layout alterado), volta a procurar datas na página inteira.
+    """
+    records = parse_publications(page_html)
+    if records:
+        return [r.date for r in records]
+    return DATE_PATTERN.findall(page_html)
 
-                result = cur.fetchone()
-                if result:
-                    new_dates.append(date)
-                    logger.info(
-                        f"Nova publicação para '{search_term}': {date.strftime('%d/%m/%Y')}"
-                    )
 
-        conn.commit()
+def fetch_results_page(search_term: str, driver_pool: Optional[DriverPool] = None) -> str:
+    """
+    Realiza a busca no site do DOERJ e retorna o HTML da página de resultados
+
+    Usa o motor definido em FETCH_ENGINE ("http" ou "selenium"). No modo "http",
+    o Selenium é usado como fallback se a busca HTTP falhar.
+
+    Args:
+        search_term: Termo de busca (número do decreto)
+        driver_pool: Pool de navegadores compartilhado entre termos (opcional)
+
+    Returns:
+        HTML da página de resultados
+    """
+    try:
+        logger.info(f"Iniciando busca por '{search_term}' no DOERJ (motor: {FETCH_ENGINE})")
+
+        if FETCH_ENGINE == "http":
+            try:
+                page_html = fetch_page_http(search_term, DIARIO_URL, get_thread_session())
+            except Exception as e:
+                logger.warning(f"Busca HTTP falhou para '{search_term}' ({e}); usando Selenium como fallback")
+                page_html = fetch_page_selenium(search_term, driver_pool)
+        else:
+            page_html = fetch_page_selenium(search_term, driver_pool)
+
+        get_page_archive().save(search_term, 1, page_html)
+        return page_html
 
     except Exception as e:
-        conn.rollback()
-        logger.error(f"Erro ao inserir publicações no banco: {e}")
+        logger.error(f"Erro ao realizar scraping: {e}")
         raise
 
-    return new_dates
 
+#def fetch_publications(search_term: str = SEARCH_TERM) -> List[str]:
+def fetch_publications(search_term: str, driver_pool: Optional[DriverPool] = None):
+    """
+    Realiza scraping do site do DOERJ e retorna lista de datas encontradas
+
+    Args:
+        search_term: Termo de busca (número do decreto)
+        driver_pool: Pool de navegadores compartilhado entre termos (opcional)
+
+    Returns:
+        Lista de strings com datas no formato dd/mm/yyyy
+    """
+    dates = extract_date_strings(fetch_results_page(search_term, driver_pool))
+    logger.info(f"Encontradas {len(dates)} datas na busca")
+    return dates
+
+
+def _parse_date_uncached(date_str: str) -> Optional[date]:
+    # Formato fixo dd/mm/yyyy (o que DATE_PATTERN extrai): fatiar é bem mais rápido que strptime
+    if (
+        len(date_str) == 10 and date_str[2] == "/" and date_str[5] == "/"
+        and date_str.isascii() and (date_str[:2] + date_str[3:5] + date_str[6:]).isdigit()
+    ):
+        try:
+            return date(int(date_str[6:]), int(date_str[3:5]), int(date_str[:2]))
+        except ValueError:
+            return None
+    # Demais formatos aceitos por strptime (ex.: 1/2/2025)
+    try:
+        return datetime.strptime(date_str, "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+
+def parse_date(date_str: str) -> Optional[date]:
+    """Converte uma data dd/mm/yyyy (None se inválida), com cache entre os termos"""
+    try:
+        return _date_cache[date_str]
+    except KeyError:
+        pass
+    parsed = _parse_date_uncached(date_str)
+    if len(_date_cache) >= DATE_CACHE_MAX:
+        _date_cache.clear()
+    _date_cache[date_str] = parsed
+    return parsed
+
+
+def normalize_dates(date_strings: List[str]) -> List[datetime.date]:
+    """
+    Converte strings de data para objetos date e remove duplicatas
+
+    Args:
+        date_strings: Lista de strings no formato dd/mm/yyyy
+
+    Returns:
+        Lista de objetos date ordenados (mais recente primeiro)
+    """
+    # Remover duplicatas antes de converter: a mesma data se repete muito nas páginas
+    dates = set()
+    for date_str in dict.fromkeys(date_strings):
+        date_obj = parse_date(date_str)
+        if date_obj is None:
+            logger.warning(f"Data inválida ignorada: {date_str}")
+        else:
+            dates.add(date_obj)
+
+    # Ordenar (mais recente primeiro)
+    unique_dates = sorted(dates, reverse=True)
+    logger.info(f"{len(unique_dates)} datas únicas após normalização")
+
+    return unique_dates
 
 
 # def upsert_publications(conn, dates: List[datetime.date]) -> List[datetime.date]:
@@ -298,56 +469,19 @@ def upsert_publications(conn, dates: List[datetime.date], search_term: str):
 #     return new_dates
 
 
-def send_email(new_dates: List[datetime.date], search_term: str):
+def send_email(new_dates: List[datetime.date], search_term: str,
+               titles: Optional[Dict[datetime.date, str]] = None):
     """
     Envia email notificando sobre novas publicações de um termo específico.
+
+    Abre uma sessão SMTP só para este envio; dentro de uma execução, run_terms
+    usa um NotificationDispatcher com uma sessão para todos os termos.
     """
     if not new_dates:
         return
 
-    try:
-        email_user = os.getenv("EMAIL_USER")
-        email_password = os.getenv("EMAIL_PASSWORD")
-        email_recipients = os.getenv("EMAIL_RECIPIENTS", "").split(",")
-        smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-
-        dates_html = "<br>".join(
-            f"• {d.strftime('%d/%m/%Y')}" for d in new_dates
-        )
-
-        msg = EmailMessage()
-        msg["Subject"] = f"ALERTA: Novas publicações encontradas para '{search_term}'"
-        msg["From"] = email_user
-        msg["To"] = ", ".join(email_recipients)
-
-        corpo_email = f"""
-        <html>
-        <body>
-            <p>Prezados,</p>
-            <p>Foram encontradas <b>{len(new_dates)}</b> nova(s) publicação(ões) no DOERJ para o termo:</p>
-            <p><b>{search_term}</b></p>
-            <p>{dates_html}</p>
-            <br>
-            <p><em>Gerado automaticamente em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</em></p>
-        </body>
-        </html>
-        """
-
-        msg.set_content(corpo_email, subtype="html")
-
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(email_user, email_password)
-            server.send_message(msg)
-
-        logger.info(
-            f"E-mail enviado ({search_term}) para {len(email_recipients)} destinatários"
-        )
-
-    except Exception as e:
-        logger.error(f"Erro ao enviar email: {e}")
-        raise
+    with NotificationDispatcher(digest=False) as notifier:
+        notifier.notify(new_dates, search_term, titles)
 
 
 
@@ -413,62 +547,441 @@ def send_email(new_dates: List[datetime.date], search_term: str):
 
 
 
-def main():
-    """Executa o monitoramento para todos os termos de busca"""
-    try:
-        logger.info("=" * 60)
-        logger.info("Iniciando execução do scraper (múltiplos termos)")
-        logger.info("=" * 60)
+def load_search_terms() -> List[str]:
+    """
+    Termos buscados: os termos únicos das assinaturas ativas (SUBSCRIPTIONS=true),
+    recarregados quando a tabela muda, ou a lista de SEARCH_TERMS (separados por vírgula)
+    """
+    return get_subscriptions().terms()
 
-        # Carregar lista de termos do .env
-        search_terms_raw = os.getenv("SEARCH_TERMS", "")
-        search_terms = [t.strip() for t in search_terms_raw.split(",") if t.strip()]
 
-        if not search_terms:
-            logger.error("Nenhum termo definido em SEARCH_TERMS")
-            return
+def build_publications(records: List[Publication], date_strings: List[str]) -> Dict[datetime.date, Optional[str]]:
+    """Normaliza as datas e associa a cada uma o título lido da tabela de resultados"""
+    titles = titles_by_date(records)
+    return {d: titles.get(d.strftime("%d/%m/%Y")) for d in normalize_dates(date_strings)}
 
-        logger.info(f"Monitorando {len(search_terms)} termo(s): {search_terms}")
 
-        conn = get_db_connection()
+def collect_term(search_term: str, driver_pool: Optional[DriverPool] = None) -> Dict[datetime.date, Optional[str]]:
+    """
+    Etapas de coleta de um termo: busca no DOERJ e normalização das datas
+
+    Pode rodar em paralelo (não usa a conexão com o banco). Se a tabela de
+    resultados não mudou desde a última execução, nada é analisado; se mudou,
+    só as linhas novas são.
+
+    Returns:
+        Dicionário {data: título} com as datas normalizadas, mais recente
+        primeiro (vazio se nada for encontrado)
+    """
+    start = time.perf_counter()
+    logger.info(f"Iniciando busca por '{search_term}' no DOERJ (motor: {FETCH_ENGINE})")
+    known_dates = get_known_dates_cache()
+    records, date_strings = [], []
+
+    with closing(iter_result_pages(search_term, driver_pool)) as pages:
+        for page_number, page_html in enumerate(pages, start=1):
+            # Gravada em segundo plano (page_archive.py), para depuração e benchmarks
+            get_page_archive().save(search_term, page_number, page_html)
+            html_to_parse, reached_seen_rows = page_html, False
+            if page_number == 1:
+                html_to_parse, reached_seen_rows = get_fingerprint_store().compare(search_term, page_html)
+                if html_to_parse is None:
+                    logger.info(f"Termo '{search_term}': página de resultados inalterada, nada a processar")
+                    return {}
+
+            with metrics.timed("parse", search_term):
+                page_records = parse_publications(html_to_parse, DIARIO_URL)
+                page_dates = [r.date for r in page_records] or DATE_PATTERN.findall(html_to_parse)
+            records.extend(page_records)
+            date_strings.extend(page_dates)
+
+            # Resultados vêm do mais recente para o mais antigo: ao chegar a uma
+            # data já gravada (ou a linhas já vistas na página 1), o resto é conhecido.
+            # Página 1 só com linhas novas: as novidades podem continuar na página 2
+            if not page_dates or reached_seen_rows:
+                break
+            if known_dates.has_known(search_term, normalize_dates(page_dates)):
+                if page_number > 1:
+                    logger.info(f"Termo '{search_term}': data já gravada na página {page_number}, busca encerrada")
+                break
+
+    # Linhas para o índice local (gravadas e casadas com os demais termos na thread principal)
+    get_result_index().stage(search_term, [(d, r) for r in records if (d := parse_date(r.date))])
+    logger.info(f"Encontradas {len(date_strings)} datas na busca")
+
+    if not date_strings:
+        logger.warning(f"Nenhuma data encontrada para '{search_term}'")
+        return {}
+
+    publications = build_publications(records, date_strings)
+    logger.info(f"Termo '{search_term}': coleta concluída em {time.perf_counter() - start:.2f}s")
+    return publications
+
+
+def publish_term(publications: Dict[datetime.date, Optional[str]], search_term: str,
+                 notifier: Optional[NotificationDispatcher] = None):
+    """
+    Etapas de publicação de um termo: gravação no banco e envio do e-mail
+
+    Só as datas ausentes do cache de datas conhecidas vão ao banco; se não
+    houver nenhuma, o banco nem é consultado.
+
+    Args:
+        publications: Dicionário {data: título} devolvido por collect_term
+        search_term: Termo de busca
+        notifier: Despachante de e-mails da execução (sem ele, o e-mail usa uma sessão própria)
+    """
+    known_dates = get_known_dates_cache()
+    candidates = known_dates.filter_new(search_term, list(publications))
+    if not candidates:
+        logger.info(f"Termo '{search_term}': nenhuma data nova (cache), banco não consultado")
+        return
+
+    # 3. Inserir no banco (agora passando o termo!)
+    outbox = NOTIFY_MODE == "outbox"
+    with metrics.timed("db_upsert", search_term), db.connection() as conn:
+        new_dates = upsert_publications(conn, candidates, search_term, publications, enqueue=outbox)
+    known_dates.add(search_term, candidates)
+    metrics.record_dates(search_term, len(candidates), len(new_dates))
+
+    # 4. Enviar e-mail por termo
+    if new_dates and outbox:
+        logger.info(f"Termo '{search_term}': {len(new_dates)} novas publicações enfileiradas para notificação")
+    elif new_dates:
+        if notifier is None:
+            send_email(new_dates, search_term, publications)
+        else:
+            notifier.notify(new_dates, search_term, publications)
+        logger.info(
+            f"Termo '{search_term}': {len(new_dates)} novas publicações notificadas"
+        )
+    else:
+        logger.info(f"Termo '{search_term}': nenhuma nova publicação encontrada")
 
-        for term in search_terms:
-            logger.info("-" * 60)
-            logger.info(f"Iniciando busca para termo: {term}")
-            logger.info("-" * 60)
 
-            # 1. Buscar publicações
-            date_strings = fetch_publications(term)
+def publish_run(publications_by_term: Dict[str, Dict[datetime.date, Optional[str]]],
+                notifier: NotificationDispatcher) -> List[str]:
+    """
+    Grava as datas de todos os termos da execução em uma única transação
+    e envia os e-mails de cada termo (UPSERT_MODE=run)
 
-            if not date_strings:
-                logger.warning(f"Nenhuma data encontrada para '{term}'")
-                continue
+    Args:
+        publications_by_term: Dicionário {termo: {data: título}}
+        notifier: Despachante de e-mails da execução
 
-            # 2. Normalizar datas
-            dates = normalize_dates(date_strings)
+    Returns:
+        Lista dos termos cujo e-mail falhou
+    """
+    known_dates = get_known_dates_cache()
+    candidates_by_term = {
+        term: candidates
+        for term, publications in publications_by_term.items()
+        if (candidates := known_dates.filter_new(term, list(publications)))
+    }
+    if not candidates_by_term:
+        logger.info("Nenhuma data nova em nenhum termo (cache), banco não consultado")
+        return []
+
+    outbox = NOTIFY_MODE == "outbox"
+    with metrics.timed("db_upsert"), db.connection() as conn:
+        new_by_term = upsert_publications_batch(conn, candidates_by_term, publications_by_term, enqueue=outbox)
+    for term, candidates in candidates_by_term.items():
+        known_dates.add(term, candidates)
+        metrics.record_dates(term, len(candidates), len(new_by_term[term]))
+    logger.info(f"{sum(len(d) for d in new_by_term.values())} novas publicações gravadas em lote")
+    if outbox:
+        return []
+
+    failed_terms = []
+    for term, new_dates in new_by_term.items():
+        if not new_dates:
+            logger.info(f"Termo '{term}': nenhuma nova publicação encontrada")
+            continue
+        try:
+            notifier.notify(new_dates, term, publications_by_term[term])
+            logger.info(f"Termo '{term}': {len(new_dates)} novas publicações notificadas")
+        except Exception as e:
+            logger.error(f"Falha ao notificar termo '{term}': {e}")
+            failed_terms.append(term)
+    return failed_terms
 
-            # 3. Inserir no banco (agora passando o termo!)
-            new_dates = upsert_publications(conn, dates, term)
 
-            # 4. Enviar e-mail por termo
-            if new_dates:
-                send_email(new_dates, term)
-                logger.info(
-                    f"Termo '{term}': {len(new_dates)} novas publicações notificadas"
-                )
+_collect_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_collect_executor() -> ThreadPoolExecutor:
+    """
+    Pool de threads da coleta, criado na primeira execução paralela e mantido
+    no processo: as threads (e as sessões HTTP de cada uma) seguem aquecidas
+    entre execuções do scheduler
+    """
+    global _collect_executor
+    if _collect_executor is None:
+        _collect_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="coleta")
+    return _collect_executor
+
+
+def run_terms(search_terms: List[str], driver_pool: DriverPool) -> List[str]:
+    """
+    Processa todos os termos, isolando as falhas de cada um
+
+    Com MAX_WORKERS > 1, a coleta roda em um pool de threads e os resultados
+    alimentam, na ordem em que ficam prontos, as etapas de banco e e-mail na
+    thread principal. Com UPSERT_MODE=run, as datas de todos os termos são
+    gravadas juntas ao final da coleta. Os e-mails saem por uma única sessão
+    SMTP (ou em um único resumo, com EMAIL_DIGEST=true).
+
+    Com LOCAL_INDEX=true, os termos são respondidos primeiro pelo índice local
+    e cada linha nova trazida por um termo também é entregue aos outros termos
+    que ela contém, antes mesmo da busca deles.
+
+    Returns:
+        Lista dos termos que falharam
+    """
+    failed_terms = []
+    collected: Dict[str, Dict[datetime.date, Optional[str]]] = {}
+    fingerprints = get_fingerprint_store()
+    known_dates = get_known_dates_cache()
+    result_index = get_result_index()
+    result_index.set_terms([*load_search_terms(), *search_terms])
+    # Uma sessão SMTP para todos os e-mails da execução
+    notifier = NotificationDispatcher()
+
+    def collect(term: str, publications: Dict[datetime.date, Optional[str]]):
+        # Os títulos lidos na busca do próprio termo prevalecem sobre os do índice local
+        pending = collected.setdefault(term, {})
+        for publication_date, title in publications.items():
+            if pending.get(publication_date) is None:
+                pending[publication_date] = title
+
+    def deliver_local(term: str, publications: Dict[datetime.date, Optional[str]]):
+        # Resultados do índice local: só o que ainda não foi gravado segue adiante
+        if not known_dates.filter_new(term, list(publications)):
+            return
+        try:
+            if UPSERT_MODE == "run":
+                collect(term, publications)
             else:
-                logger.info(f"Termo '{term}': nenhuma nova publicação encontrada")
+                publish_term(publications, term, notifier)
+        except Exception as e:
+            logger.error(f"Falha ao gravar resultados do índice local para '{term}': {e}")
+
+    def handle(term: str, publications: Dict[datetime.date, Optional[str]]):
+        for other_term, hits in result_index.ingest(term).items():
+            deliver_local(other_term, hits)
+        if publications and UPSERT_MODE == "run":
+            # Confirmado só depois que o lote for gravado
+            collect(term, publications)
+            return
+        if publications:
+            publish_term(publications, term, notifier)
+        fingerprints.confirm(term)
+
+    try:
+        for term, publications in result_index.lookup(search_terms).items():
+            deliver_local(term, publications)
+
+        if MAX_WORKERS <= 1:
+            for term in search_terms:
+                logger.info("-" * 60)
+                logger.info(f"Iniciando busca para termo: {term}")
+                logger.info("-" * 60)
+
+                term_start = time.perf_counter()
+                try:
+                    handle(term, collect_term(term, driver_pool))
+                except Exception as e:
+                    logger.error(f"Falha ao processar termo '{term}': {e}")
+                    failed_terms.append(term)
+                finally:
+                    logger.info(f"Termo '{term}' processado em {time.perf_counter() - term_start:.2f}s")
+        else:
+            logger.info(f"Coletando {len(search_terms)} termo(s) com {MAX_WORKERS} workers")
+            executor = get_collect_executor()
+            futures = {executor.submit(collect_term, term, driver_pool): term for term in search_terms}
+            for future in as_completed(futures):
+                term = futures[future]
+                try:
+                    handle(term, future.result())
+                except Exception as e:
+                    logger.error(f"Falha ao processar termo '{term}': {e}")
+                    failed_terms.append(term)
+
+        if collected:
+            try:
+                failed_run_terms = publish_run(collected, notifier)
+                failed_terms.extend(failed_run_terms)
+                for term in collected:
+                    if term not in failed_terms:
+                        fingerprints.confirm(term)
+            except Exception as e:
+                logger.error(f"Falha ao gravar o lote da execução: {e}")
+                failed_terms.extend(collected)
+
+        # Modo resumo: um único e-mail com todos os termos da execução
+        failed_terms.extend(notifier.flush())
+    finally:
+        notifier.close()
+
+    return failed_terms
+
+
+def run_edition(search_terms: List[str]) -> List[str]:
+    """
+    Procura todos os termos nas edições recentes do DOERJ, baixadas uma vez (SEARCH_MODE=edition)
+
+    As datas encontradas seguem o mesmo caminho da busca por termo: cache de
+    datas conhecidas, gravação no banco (por termo ou em lote, conforme
+    UPSERT_MODE) e e-mail.
+
+    Os documentos só contam como lidos para os termos publicados sem falha; os
+    dos termos que falharam são lidos de novo na próxima execução.
+
+    Returns:
+        Lista dos termos que falharam (todos, se nenhuma edição pôde ser lida)
+    """
+    scanner = get_edition_scanner()
+    matches, failed_days = scanner.scan(search_terms)
+    if len(failed_days) > EDITION_LOOKBACK_DAYS:
+        # Nenhuma edição pôde ser lida: a execução falhou para todos os termos
+        return list(search_terms)
+
+    failed_terms = []
+    notifier = NotificationDispatcher()
+    try:
+        if UPSERT_MODE == "run":
+            if matches:
+                try:
+                    failed_terms.extend(publish_run(matches, notifier))
+                except Exception as e:
+                    logger.error(f"Falha ao gravar o lote da execução: {e}")
+                    failed_terms.extend(matches)
+        else:
+            for term in search_terms:
+                if term not in matches:
+                    continue
+                try:
+                    publish_term(matches[term], term, notifier)
+                except Exception as e:
+                    logger.error(f"Falha ao processar termo '{term}': {e}")
+                    failed_terms.append(term)
+        failed_terms.extend(notifier.flush())
+    finally:
+        notifier.close()
+    for term in search_terms:
+        if term not in failed_terms:
+            scanner.confirm(term)
+    return failed_terms
+
+
+def report_run_resources(driver_pool: DriverPool, page_loads_before):
+    """Registra (log e métricas) a carga média das páginas da execução e a memória dos navegadores abertos"""
+    count_before, seconds_before = page_loads_before
+    count, seconds = metrics.stage_totals("page_load")
+    pages, page_seconds = count - count_before, seconds - seconds_before
+    if pages:
+        metrics.RUN_PAGE_LOAD.set(page_seconds / pages)
+        logger.info(f"Carga de páginas: {pages:.0f} página(s), média de {page_seconds / pages:.2f}s")
+
+    drivers = driver_pool.active_drivers()
+    rss = sum(browser_rss_bytes(driver) for driver in drivers)
+    metrics.BROWSERS_OPEN.set(len(drivers))
+    metrics.BROWSER_RSS.set(rss)
+    if drivers:
+        logger.info(f"Navegadores: {len(drivers)} aberto(s), RSS total de {rss / 2**20:.0f} MB")
+
+
+def create_driver_pool() -> DriverPool:
+    """Cria o pool de navegadores da execução (um navegador por worker, no máximo)"""
+    return DriverPool(create_chrome_driver, max(BROWSER_POOL_SIZE, MAX_WORKERS), BROWSER_MAX_PAGES)
 
-        conn.close()
-        logger.info("Conexão com banco fechada")
 
+def main(driver_pool: Optional[DriverPool] = None, search_terms: Optional[List[str]] = None):
+    """
+    Executa o monitoramento para todos os termos de busca
+
+    Args:
+        driver_pool: Pool de navegadores mantido por quem chama (ex.: o scheduler,
+            que o reaproveita entre execuções). Sem ele, um pool é criado e
+            fechado nesta execução.
+        search_terms: Subconjunto dos termos a buscar nesta execução (ex.: o
+            scheduler adaptativo); padrão: todos os das assinaturas ou de SEARCH_TERMS.
+            No modo distribuído (CLUSTER_MODE=true), só a parte deste nó é buscada.
+    """
+    cluster = get_cluster()
+    try:
         logger.info("=" * 60)
-        logger.info("Execução finalizada com sucesso")
+        logger.info("Iniciando execução do scraper (múltiplos termos)")
+        logger.info("=" * 60)
+
+        # Carregar lista de termos (assinaturas ou .env)
+        if search_terms is None:
+            search_terms = load_search_terms()
+
+        if not search_terms:
+            logger.error("Nenhum termo definido em SEARCH_TERMS nem nas assinaturas")
+            return
+
+        cluster.start()
+        search_terms = cluster.claim(search_terms)
+        if not search_terms:
+            logger.info("Nenhum termo coube a este nó nesta execução")
+            return
+
+        logger.info(f"Monitorando {len(search_terms)} termo(s): {search_terms}")
+        run_id = get_page_archive().begin_run()
+        if run_id:
+            logger.info(f"Páginas desta execução: arquivo {run_id}")
+
+        run_start = time.perf_counter()
+
+        # Datas já conhecidas: uma consulta só se o cache estiver vencido ou incompleto
+        known_dates = get_known_dates_cache()
+        known_dates.ensure_loaded(search_terms)
+
+        # Navegadores abertos sob demanda, um por worker no máximo.
+        # Conexões com o banco são emprestadas do pool só quando há datas novas.
+        page_loads_before = metrics.stage_totals("page_load")
+        if SEARCH_MODE == "edition":
+            failed_terms = run_edition(search_terms)
+        elif driver_pool is not None:
+            failed_terms = run_terms(search_terms, driver_pool)
+            report_run_resources(driver_pool, page_loads_before)
+        else:
+            with create_driver_pool() as own_pool:
+                failed_terms = run_terms(search_terms, own_pool)
+                report_run_resources(own_pool, page_loads_before)
+
+        known_dates.save()
+        fingerprints = get_fingerprint_store()
+        fingerprints.save()
+        fingerprints.log_summary()
+
+        for term in set(failed_terms):
+            metrics.TERM_FAILURES.labels(term).inc()
+        metrics.record_run(time.perf_counter() - run_start, len(set(failed_terms)))
+
+        logger.info("=" * 60)
+        if failed_terms:
+            logger.warning(
+                f"Execução finalizada com {len(failed_terms)} termo(s) com falha: {failed_terms}"
+            )
+        else:
+            logger.info("Execução finalizada com sucesso")
+        logger.info(f"Tempo total: {time.perf_counter() - run_start:.2f}s")
         logger.info("=" * 60)
 
     except Exception as e:
         logger.error(f"Erro crítico na execução: {e}")
         sys.exit(1)
+    finally:
+        # Fora do caminho da coleta: só espera o que ainda estiver na fila de gravação
+        get_page_archive().end_run(PAGE_ARCHIVE_FLUSH_TIMEOUT)
+        # Execução avulsa sai do cluster; a do scheduler só libera os termos para a próxima divisão
+        if driver_pool is None:
+            cluster.shutdown()
+        else:
+            cluster.release()
 
 
 # def main():
@@ -0,0 +1,126 @@
+"""
+Calendário de dias úteis do scheduler
+Índice compacto (um bit por dia) dos dias úteis, com o salto até o próximo dia
+útil pré-calculado, para responder "próximo horário de execução" em O(1).
+O índice se estende sozinho quando a data consultada passa do último ano
+coberto: um scheduler que fica no ar por anos não perde os feriados.
+"""
+
+import logging
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BusinessCalendar:
+    """
+    Dias úteis (segunda a sexta, exceto feriados) em anos contíguos
+
+    Args:
+        holidays_for: Recebe uma lista de anos e devolve os feriados desses anos,
+            como datas ou um mapeamento {data: nome} (ex.: holidays.BR)
+        years: Anos indexados de início (os demais entram sob demanda)
+    """
+
+    def __init__(self, holidays_for: Callable[[List[int]], Iterable[date]], years: Iterable[int] = ()):
+        self._holidays_for = holidays_for
+        self._holidays: Dict[date, str] = {}
+        self._first_year: Optional[int] = None
+        self._last_year: Optional[int] = None
+        self._base = 0
+        self._bits = bytearray()
+        # Dias até o próximo dia útil (0 se o próprio dia for útil)
+        self._skip = array("B")
+        years = sorted(years)
+        if years:
+            self._extend(years[0], years[-1])
+
+    # ---------------------------------------------------------------- índice
+
+    def _extend(self, first_year: int, last_year: int):
+        """Passa a cobrir [first_year, last_year] (mais os anos já cobertos) e refaz o índice"""
+        if self._first_year is not None:
+            first_year = min(first_year, self._first_year)
+            last_year = max(last_year, self._last_year)
+        new_years = [
+            year for year in range(first_year, last_year + 1)
+            if self._first_year is None or not self._first_year <= year <= self._last_year
+        ]
+        found = self._holidays_for(new_years)
+        names = found if isinstance(found, Mapping) else dict.fromkeys(found, "Feriado")
+        self._holidays.update((d, names[d]) for d in names if first_year <= d.year <= last_year)
+
+        self._first_year, self._last_year = first_year, last_year
+        self._base = date(first_year, 1, 1).toordinal()
+        size = date(last_year, 12, 31).toordinal() - self._base + 1
+        self._bits = bytearray((size + 7) // 8)
+        self._skip = array("B", bytes(size))
+
+        # De trás para frente: o salto de cada dia vem do salto do dia seguinte.
+        # O último dia pode não ter útil à frente dentro do índice; next_business_day cuida disso.
+        skip = 0
+        for i in range(size - 1, -1, -1):
+            d = date.fromordinal(self._base + i)
+            if d.weekday() < 5 and d not in self._holidays:
+                self._bits[i >> 3] |= 1 << (i & 7)
+                skip = 0
+            else:
+                skip = min(skip + 1, 255)
+            self._skip[i] = skip
+        logger.info(f"Calendário de dias úteis indexado de {first_year} a {last_year} ({len(self._holidays)} feriados)")
+
+    def _index(self, d: date) -> int:
+        if self._first_year is None or not self._first_year <= d.year <= self._last_year:
+            # Sempre um ano de folga à frente, para os saltos na virada do ano
+            self._extend(d.year, d.year + 1)
+        return d.toordinal() - self._base
+
+    # ---------------------------------------------------------------- consultas
+
+    def is_business_day(self, d: date) -> bool:
+        i = self._index(d)
+        return bool(self._bits[i >> 3] >> (i & 7) & 1)
+
+    def is_holiday(self, d: date) -> bool:
+        self._index(d)
+        return d in self._holidays
+
+    def holiday_name(self, d: date) -> Optional[str]:
+        self._index(d)
+        return self._holidays.get(d)
+
+    def next_business_day(self, d: date) -> date:
+        """Primeiro dia útil em `d` ou depois"""
+        i = self._index(d)
+        skip = self._skip[i]
+        candidate = date.fromordinal(self._base + i + skip)
+        if skip == 255 or candidate.year > self._last_year or not self.is_business_day(candidate):
+            # Salto saturado ou além do índice (última semana do último ano): continua dali
+            return self.next_business_day(candidate)
+        return candidate
+
+    def next_run(self, after: datetime, slots: List[time], tz: Optional[tzinfo] = None) -> datetime:
+        """
+        Primeiro horário de `slots` (ordenados) em dia útil, estritamente depois de `after`
+
+        Args:
+            after: Momento de referência
+            slots: Horários de execução de um dia útil, em ordem crescente
+            tz: Fuso dos horários (padrão: o de `after`)
+        """
+        if not slots:
+            raise ValueError("Nenhum horário de execução configurado")
+        if tz is None:
+            tz = after.tzinfo
+        elif after.tzinfo is not None:
+            after = after.astimezone(tz)
+        day = after.date()
+        if self.is_business_day(day):
+            position = bisect_right(slots, after.time())
+            if position < len(slots):
+                return datetime.combine(day, slots[position], tzinfo=tz)
+        day = self.next_business_day(day + timedelta(days=1))
+        return datetime.combine(day, slots[0], tzinfo=tz)
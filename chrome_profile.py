@@ -0,0 +1,168 @@
+"""
+Perfil enxuto do Chromium para o scraping
+Bloqueia imagens, fontes, mídia e scripts de terceiros do portal do IOERJ,
+usa pageLoadStrategy=eager (o scraper só precisa do DOM), mantém um cache em
+disco entre execuções e limita a memória do renderizador. Também mede o
+consumo de memória (RSS) dos navegadores abertos.
+"""
+
+import logging
+import os
+import threading
+from typing import Iterable, List
+
+import psutil
+from dotenv import load_dotenv
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+# Desative (false) para voltar ao perfil padrão do Chromium
+CHROME_LEAN = os.getenv("CHROME_LEAN", "true").lower() == "true"
+# normal (espera imagens, CSS e scripts) | eager (só o DOM) | none
+CHROME_PAGE_LOAD_STRATEGY = os.getenv("CHROME_PAGE_LOAD_STRATEGY", "eager").lower()
+# Tipos de recurso bloqueados: image, font, media, stylesheet
+CHROME_BLOCK_RESOURCES = [
+    t.strip().lower() for t in os.getenv("CHROME_BLOCK_RESOURCES", "image,font,media").split(",") if t.strip()
+]
+# Padrões de URL bloqueados (scripts de terceiros), separados por vírgula
+CHROME_BLOCK_URLS = [
+    u.strip() for u in os.getenv(
+        "CHROME_BLOCK_URLS",
+        "*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,*facebook.net*,*hotjar.com*",
+    ).split(",") if u.strip()
+]
+# Cache em disco persistente (vazio = cache temporário do perfil); um subdiretório por navegador simultâneo
+CHROME_CACHE_DIR = os.getenv("CHROME_CACHE_DIR", ".chrome-cache")
+CHROME_CACHE_MB = int(os.getenv("CHROME_CACHE_MB", "100"))
+# Heap do JavaScript por renderizador, em MB
+CHROME_JS_HEAP_MB = int(os.getenv("CHROME_JS_HEAP_MB", "256"))
+
+# Padrões de URL por tipo de recurso (Network.setBlockedURLs)
+RESOURCE_URL_PATTERNS = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav"],
+    "stylesheet": ["*.css"],
+}
+
+_cache_slots_lock = threading.Lock()
+_cache_slots_in_use = set()
+
+
+def blocked_url_patterns(resource_types: Iterable[str] = None, extra: Iterable[str] = None) -> List[str]:
+    """Padrões de URL bloqueados para os tipos de recurso e URLs extras informados"""
+    resource_types = CHROME_BLOCK_RESOURCES if resource_types is None else resource_types
+    extra = CHROME_BLOCK_URLS if extra is None else extra
+    patterns = []
+    for resource_type in resource_types:
+        if resource_type not in RESOURCE_URL_PATTERNS:
+            logger.warning(f"Tipo de recurso desconhecido em CHROME_BLOCK_RESOURCES: {resource_type!r}")
+            continue
+        patterns.extend(RESOURCE_URL_PATTERNS[resource_type])
+    patterns.extend(extra)
+    return patterns
+
+
+def _acquire_cache_slot() -> int:
+    """Menor subdiretório de cache livre: dois navegadores nunca usam o mesmo ao mesmo tempo"""
+    with _cache_slots_lock:
+        slot = 0
+        while slot in _cache_slots_in_use:
+            slot += 1
+        _cache_slots_in_use.add(slot)
+        return slot
+
+
+def _release_cache_slot(slot: int):
+    with _cache_slots_lock:
+        _cache_slots_in_use.discard(slot)
+
+
+def apply_lean_options(options: Options, cache_slot: int = 0) -> Options:
+    """Acrescenta às opções do Chrome os argumentos e preferências do perfil enxuto"""
+    options.page_load_strategy = CHROME_PAGE_LOAD_STRATEGY
+    for argument in (
+        "--disable-extensions",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--no-first-run",
+        "--mute-audio",
+        "--renderer-process-limit=1",
+        f"--js-flags=--max-old-space-size={CHROME_JS_HEAP_MB}",
+    ):
+        options.add_argument(argument)
+    if CHROME_CACHE_DIR:
+        cache_dir = os.path.abspath(os.path.join(CHROME_CACHE_DIR, str(cache_slot)))
+        os.makedirs(cache_dir, exist_ok=True)
+        options.add_argument(f"--disk-cache-dir={cache_dir}")
+        options.add_argument(f"--disk-cache-size={CHROME_CACHE_MB * 1024 * 1024}")
+    if "image" in CHROME_BLOCK_RESOURCES:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    return options
+
+
+class LeanChrome(webdriver.Chrome):
+    """Chrome com o perfil enxuto: bloqueio de recursos via CDP e subdiretório de cache próprio"""
+
+    def __init__(self, service, options: Options):
+        self._cache_slot = _acquire_cache_slot()
+        started = False
+        try:
+            super().__init__(service=service, options=apply_lean_options(options, self._cache_slot))
+            started = True
+            patterns = blocked_url_patterns()
+            if patterns:
+                self.execute_cdp_cmd("Network.enable", {})
+                self.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception:
+            if started:
+                # O Chromium já está aberto: sem quit() o processo ficaria órfão
+                try:
+                    self.quit()
+                except Exception as e:
+                    logger.warning(f"Não foi possível fechar o navegador após a falha no perfil enxuto: {e}")
+            _release_cache_slot(self._cache_slot)
+            raise
+        logger.info(
+            f"Perfil enxuto: pageLoadStrategy={CHROME_PAGE_LOAD_STRATEGY}, "
+            f"{len(patterns)} padrões bloqueados, cache #{self._cache_slot}"
+        )
+
+    def quit(self):
+        try:
+            super().quit()
+        finally:
+            _release_cache_slot(self._cache_slot)
+
+
+def browser_rss_bytes(driver) -> int:
+    """
+    Memória residente (RSS) do chromedriver e de todos os processos do navegador, em bytes
+
+    Aproximada: páginas compartilhadas entre os processos do Chromium entram
+    mais de uma vez. Retorna 0 se o processo não puder ser lido.
+    """
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    if process is None:
+        return 0
+    try:
+        root = psutil.Process(process.pid)
+        total = 0
+        for proc in [root] + root.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return total
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return 0
@@ -0,0 +1,210 @@
+"""
+Execução distribuída: vários scrapers dividem os termos pelo PostgreSQL
+Cada nó mantém um heartbeat em scraper_nodes e, a cada execução, busca só os
+termos que lhe cabem: a divisão entre os nós ativos é feita por rendezvous
+hashing (todo nó chega à mesma divisão sem conversar com os outros, e a saída
+ou entrada de um nó só move os termos dele) e confirmada por um lease por termo
+em term_leases, tomado em um único comando.
+
+Os leases são renovados pelo heartbeat; os de um nó parado vencem em
+CLUSTER_LEASE_SEC e os termos passam para os nós restantes. Um termo buscado
+duas vezes (na troca de dono) não gera alerta repetido: o upsert com
+ON CONFLICT (publication_date, search_term) DO NOTHING só devolve as datas novas
+uma vez.
+
+Uso:
+    python cluster.py        # nós registrados e os termos de cada um
+"""
+
+import hashlib
+import logging
+import os
+import socket
+import sys
+import threading
+from typing import Callable, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+CLUSTER_MODE = os.getenv("CLUSTER_MODE", "false").lower() == "true"
+# Identificador do nó (único no cluster); padrão: host e PID
+CLUSTER_NODE_ID = os.getenv("CLUSTER_NODE_ID", "").strip() or f"{socket.gethostname()}-{os.getpid()}"
+# Intervalo do heartbeat e prazo sem heartbeat para o nó deixar de receber termos (segundos)
+CLUSTER_HEARTBEAT_SEC = float(os.getenv("CLUSTER_HEARTBEAT_SEC", "30"))
+CLUSTER_NODE_TTL_SEC = float(os.getenv("CLUSTER_NODE_TTL_SEC", "120"))
+# Validade do lease de um termo sem renovação (segundos)
+CLUSTER_LEASE_SEC = float(os.getenv("CLUSTER_LEASE_SEC", "180"))
+
+
+def _weight(node_id: str, search_term: str) -> bytes:
+    return hashlib.sha1(f"{node_id}\0{search_term}".encode("utf-8")).digest()
+
+
+def assign_terms(search_terms: Iterable[str], nodes: Iterable[str], node_id: str) -> List[str]:
+    """
+    Termos que cabem a `node_id` entre os `nodes` ativos (rendezvous hashing)
+
+    Cada termo fica com o nó de maior peso sha1(nó, termo): a divisão é a mesma
+    em todos os nós e só os termos de um nó que entra ou sai mudam de dono.
+    """
+    nodes = sorted(set(nodes) | {node_id})
+    return [term for term in search_terms if max(nodes, key=lambda node: _weight(node, term)) == node_id]
+
+
+class ClusterCoordinator:
+    """
+    Nó do cluster: heartbeat em segundo plano e divisão dos termos por execução
+
+    Args:
+        node_id: Identificador único do nó
+        heartbeat_interval: Segundos entre heartbeats
+        node_ttl: Segundos sem heartbeat para o nó ser considerado parado
+        lease_seconds: Validade de cada lease sem renovação
+    """
+
+    def __init__(self, node_id: str = CLUSTER_NODE_ID, heartbeat_interval: float = CLUSTER_HEARTBEAT_SEC,
+                 node_ttl: float = CLUSTER_NODE_TTL_SEC, lease_seconds: float = CLUSTER_LEASE_SEC):
+        self.node_id = node_id
+        self.heartbeat_interval = heartbeat_interval
+        self.node_ttl = node_ttl
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _with_conn(self, action: Callable, conn=None):
+        if conn is not None:
+            return action(conn)
+        with db.connection() as pooled_conn:
+            return action(pooled_conn)
+
+    # ------------------------------------------------------------ heartbeat
+
+    def heartbeat(self, conn=None):
+        """Registra o nó como ativo e renova os seus leases"""
+        self._with_conn(lambda c: db.heartbeat_node(c, self.node_id, self.lease_seconds), conn)
+
+    def start(self):
+        """Registra o nó e inicia o heartbeat em segundo plano (idempotente)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._heartbeat_loop, name="cluster-heartbeat", daemon=True)
+        try:
+            self.heartbeat()
+            logger.info(f"Nó {self.node_id} registrado no cluster")
+        except Exception as e:
+            logger.warning(f"Não foi possível registrar o nó {self.node_id}: {e}")
+        self._thread.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                # Sem heartbeat por CLUSTER_NODE_TTL_SEC, os termos do nó passam para os outros
+                logger.warning(f"Falha no heartbeat do nó {self.node_id}: {e}")
+
+    # ------------------------------------------------------------ termos
+
+    def claim(self, search_terms: List[str], conn=None) -> List[str]:
+        """
+        Termos desta execução: a parte do nó entre os nós ativos, com lease tomado
+
+        Termos cujo lease ainda está com outro nó ativo ficam de fora. Sem banco,
+        o nó busca todos os termos (os alertas continuam sem repetição).
+        """
+        def claim_with(c):
+            db.heartbeat_node(c, self.node_id, self.lease_seconds)
+            nodes = db.fetch_live_nodes(c, self.node_ttl)
+            preferred = assign_terms(search_terms, nodes, self.node_id)
+            return nodes, preferred, set(db.claim_term_leases(c, self.node_id, preferred, self.lease_seconds))
+
+        try:
+            nodes, preferred, claimed = self._with_conn(claim_with, conn)
+        except Exception as e:
+            logger.warning(f"Não foi possível dividir os termos no cluster ({e}) — buscando todos")
+            return list(search_terms)
+
+        mine = [term for term in search_terms if term in claimed]
+        held = len(preferred) - len(mine)
+        logger.info(
+            f"Nó {self.node_id}: {len(mine)} de {len(search_terms)} termo(s) entre {len(nodes)} nó(s) ativo(s)"
+            + (f"; {held} com lease de outro nó" if held else "")
+        )
+        return mine
+
+    def release(self, conn=None):
+        """Libera os leases do nó ao fim da execução"""
+        try:
+            self._with_conn(lambda c: db.release_term_leases(c, self.node_id), conn)
+        except Exception as e:
+            # Os leases vencem sozinhos em CLUSTER_LEASE_SEC
+            logger.warning(f"Não foi possível liberar os leases do nó {self.node_id}: {e}")
+
+    def shutdown(self, conn=None):
+        """Para o heartbeat e sai do cluster (os termos do nó passam na hora para os outros)"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=5)
+        try:
+            self._with_conn(lambda c: db.release_term_leases(c, self.node_id, deregister=True), conn)
+            logger.info(f"Nó {self.node_id} saiu do cluster")
+        except Exception as e:
+            logger.warning(f"Não foi possível remover o nó {self.node_id} do cluster: {e}")
+
+
+class _NoCluster:
+    """Substituto usado quando CLUSTER_MODE=false: um nó só, com todos os termos"""
+
+    def start(self):
+        pass
+
+    def claim(self, search_terms, conn=None):
+        return list(search_terms)
+
+    def release(self, conn=None):
+        pass
+
+    def shutdown(self, conn=None):
+        pass
+
+
+_cluster = None
+
+
+def get_cluster():
+    """Retorna o coordenador do processo (compartilhado entre execuções do scheduler)"""
+    global _cluster
+    if _cluster is None:
+        _cluster = ClusterCoordinator() if CLUSTER_MODE else _NoCluster()
+    return _cluster
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        with db.connection() as conn:
+            status = db.fetch_cluster_status(conn)
+    except Exception as e:
+        logger.error(f"Não foi possível consultar o cluster: {e}")
+        sys.exit(1)
+    if not status:
+        print("Nenhum nó registrado")
+    for node_id, heartbeat_at, terms in status:
+        print(f"{node_id}\t{heartbeat_at:%d/%m/%Y %H:%M:%S}\t{len(terms)} termo(s): {', '.join(terms)}")
+
+
+if __name__ == "__main__":
+    main()
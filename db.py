@@ -0,0 +1,481 @@
+"""
+Camada de acesso ao PostgreSQL compartilhada pelo scraper e pelo scheduler
+Mantém um pool de conexões (psycopg_pool) que sobrevive entre execuções do main()
+no mesmo processo, com consultas preparadas e verificação de saúde.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Desative (false) ao usar PgBouncer em modo transaction, que não suporta prepared statements
+DB_PREPARE = os.getenv("DB_PREPARE", "true").lower() == "true"
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_db_conninfo() -> str:
+    """Retorna a string de conexão do PostgreSQL (POSTGRES_DSN ou variáveis separadas)"""
+    # Tentar usar DSN primeiro
+    dsn = os.getenv("POSTGRES_DSN")
+    if dsn:
+        return dsn
+    # Caso contrário, construir a string de conexão
+    return make_conninfo(
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        dbname=os.getenv("POSTGRES_DB"),
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD")
+    )
+
+
+def get_db_connection():
+    """Cria e retorna uma conexão avulsa (fora do pool) com o banco PostgreSQL"""
+    try:
+        conn = psycopg.connect(get_db_conninfo())
+        logger.info("Conexão com banco de dados estabelecida")
+        return conn
+    except Exception as e:
+        logger.error(f"Erro ao conectar ao banco de dados: {e}")
+        raise
+
+
+def get_pool() -> ConnectionPool:
+    """Retorna o pool de conexões do processo, criando-o na primeira chamada"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                get_db_conninfo(),
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=max(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+                timeout=DB_POOL_TIMEOUT,
+                check=ConnectionPool.check_connection,
+                name="decreto",
+                open=True,
+            )
+            atexit.register(close_pool)
+            logger.info(
+                f"Pool de conexões criado (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE})"
+            )
+        return _pool
+
+
+def close_pool():
+    """Fecha o pool de conexões (chamado automaticamente ao encerrar o processo)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+            logger.info("Pool de conexões fechado")
+
+
+@contextmanager
+def connection():
+    """
+    Empresta uma conexão do pool
+
+    A conexão volta ao pool ao sair do bloco, mesmo em caso de erro
+    (transações pendentes são desfeitas).
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def health_check() -> bool:
+    """Verifica se o banco responde e as tabelas principais existem"""
+    try:
+        with connection() as conn:
+            row = conn.execute(
+                "SELECT to_regclass('decree_publications') IS NOT NULL"
+            ).fetchone()
+        if not row[0]:
+            logger.error("Tabela decree_publications não encontrada")
+            return False
+        return True
+    except Exception as e:
+        logger.error(f"Banco de dados indisponível: {e}")
+        return False
+
+
+# Inserção de uma linha por vez (mantida para comparação no benchmark)
+UPSERT_PUBLICATION_SQL = """
+    INSERT INTO decree_publications (publication_date, search_term)
+    VALUES (%s, %s)
+    ON CONFLICT (publication_date, search_term) DO NOTHING
+    RETURNING publication_date
+"""
+
+# Inserção em lote: um único comando para todas as datas (de um ou vários termos)
+UPSERT_PUBLICATIONS_BATCH_SQL = """
+    INSERT INTO decree_publications (publication_date, search_term, raw_title)
+    SELECT publication_date, search_term, raw_title
+    FROM unnest(%s::date[], %s::varchar[], %s::text[]) AS t(publication_date, search_term, raw_title)
+    ON CONFLICT (publication_date, search_term) DO NOTHING
+    RETURNING publication_date, search_term
+"""
+
+# Inserção em lote que também enfileira as datas novas na outbox, no mesmo comando
+# (e portanto na mesma transação): ou a data é gravada e enfileirada, ou nenhum dos dois
+UPSERT_AND_ENQUEUE_SQL = """
+    WITH inserted AS (
+        INSERT INTO decree_publications (publication_date, search_term, raw_title)
+        SELECT publication_date, search_term, raw_title
+        FROM unnest(%s::date[], %s::varchar[], %s::text[]) AS t(publication_date, search_term, raw_title)
+        ON CONFLICT (publication_date, search_term) DO NOTHING
+        RETURNING publication_date, search_term
+    ), queued AS (
+        INSERT INTO notification_outbox (publication_date, search_term)
+        SELECT publication_date, search_term FROM inserted
+    )
+    SELECT publication_date, search_term FROM inserted
+"""
+
+# Registro dos envios de e-mail em lote (uma linha por data notificada)
+LOG_NOTIFICATIONS_SQL = """
+    INSERT INTO notifications_log (publication_date, search_term, email_to, status, error_message)
+    SELECT *
+    FROM unnest(%s::date[], %s::varchar[], %s::text[], %s::varchar[], %s::text[])
+"""
+
+# Datas já conhecidas de um termo
+KNOWN_DATES_SQL = """
+    SELECT publication_date
+    FROM decree_publications
+    WHERE search_term = %s
+    ORDER BY publication_date DESC
+"""
+
+# Alguma das datas já está gravada para o termo (parada da paginação sem o cache de datas)
+ANY_KNOWN_DATE_SQL = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM decree_publications
+        WHERE search_term = %s AND publication_date = ANY(%s)
+    )
+"""
+
+# Momentos em que as publicações recentes foram detectadas (base do agendamento adaptativo)
+PUBLICATION_HISTORY_SQL = """
+    SELECT search_term, first_seen_at
+    FROM decree_publications
+    WHERE first_seen_at >= NOW() - make_interval(days => %s)
+      AND first_seen_at IS NOT NULL
+"""
+
+# Índice local das linhas de resultado já baixadas (result_index.py): grava só as
+# linhas inéditas e devolve-as para o casamento com os demais termos
+INDEX_RESULT_ROWS_SQL = """
+    INSERT INTO result_index (row_key, publication_date, title, section, url, normalized_text, found_by)
+    SELECT *
+    FROM unnest(%s::text[], %s::date[], %s::text[], %s::text[], %s::text[], %s::text[], %s::varchar[])
+    ON CONFLICT (row_key) DO NOTHING
+    RETURNING publication_date, title, normalized_text
+"""
+
+# Busca de vários termos no índice local em um único comando (frase exata, palavras inteiras)
+SEARCH_RESULT_INDEX_SQL = """
+    SELECT q.term, r.publication_date, r.title
+    FROM unnest(%s::varchar[], %s::text[]) AS q(term, query)
+    JOIN result_index r ON r.search_vector @@ phraseto_tsquery('simple', q.query)
+    WHERE r.publication_date >= %s
+    ORDER BY r.publication_date DESC
+"""
+
+# Assinaturas ativas (subscriptions.py), da maior para a menor prioridade
+LOAD_SUBSCRIPTIONS_SQL = """
+    SELECT search_term, recipient, priority, interval_min
+    FROM term_subscriptions
+    WHERE active
+    ORDER BY priority DESC, search_term, id
+"""
+
+# Versão da tabela de assinaturas: muda a cada INSERT, UPDATE ou DELETE (a tabela é pequena)
+SUBSCRIPTIONS_VERSION_SQL = """
+    SELECT md5(coalesce(string_agg(s::text, '|' ORDER BY s.id), ''))
+    FROM term_subscriptions s
+"""
+
+# Modo distribuído (cluster.py): heartbeat do nó e renovação dos seus leases, com o
+# relógio do banco (nós com relógios diferentes concordam sobre o que venceu)
+HEARTBEAT_NODE_SQL = """
+    INSERT INTO scraper_nodes (node_id, heartbeat_at)
+    VALUES (%s, NOW())
+    ON CONFLICT (node_id) DO UPDATE SET heartbeat_at = NOW()
+"""
+
+RENEW_TERM_LEASES_SQL = """
+    UPDATE term_leases
+    SET expires_at = NOW() + make_interval(secs => %s)
+    WHERE node_id = %s
+"""
+
+# Nós com heartbeat recente
+LIVE_NODES_SQL = """
+    SELECT node_id
+    FROM scraper_nodes
+    WHERE heartbeat_at > NOW() - make_interval(secs => %s)
+    ORDER BY node_id
+"""
+
+# Toma os leases livres, vencidos ou já do próprio nó; os de outro nó ativo ficam com ele
+CLAIM_TERM_LEASES_SQL = """
+    INSERT INTO term_leases (search_term, node_id, expires_at)
+    SELECT term, %s, NOW() + make_interval(secs => %s)
+    FROM unnest(%s::varchar[]) AS term
+    ON CONFLICT (search_term) DO UPDATE
+        SET node_id = EXCLUDED.node_id, expires_at = EXCLUDED.expires_at
+        WHERE term_leases.node_id = EXCLUDED.node_id OR term_leases.expires_at < NOW()
+    RETURNING search_term
+"""
+
+RELEASE_TERM_LEASES_SQL = """
+    DELETE FROM term_leases WHERE node_id = %s
+"""
+
+DEREGISTER_NODE_SQL = """
+    DELETE FROM scraper_nodes WHERE node_id = %s
+"""
+
+# Situação do cluster: nós e termos com lease
+CLUSTER_STATUS_SQL = """
+    SELECT n.node_id, n.heartbeat_at, array_remove(array_agg(l.search_term ORDER BY l.search_term), NULL)
+    FROM scraper_nodes n
+    LEFT JOIN term_leases l ON l.node_id = n.node_id AND l.expires_at > NOW()
+    GROUP BY n.node_id, n.heartbeat_at
+    ORDER BY n.node_id
+"""
+
+
+def batch_params(dates_by_term: Dict[str, List[date]],
+                 titles_by_term: Optional[Dict[str, Dict[date, str]]] = None) -> Tuple[list, list, list]:
+    """
+    Converte {termo: [datas]} nos três arrays paralelos usados pelo unnest
+
+    Os títulos ({termo: {data: título}}) são opcionais; datas sem título vão como NULL.
+    """
+    titles_by_term = titles_by_term or {}
+    all_dates, all_terms, all_titles = [], [], []
+    for term, dates in dates_by_term.items():
+        titles = titles_by_term.get(term) or {}
+        all_dates.extend(dates)
+        all_terms.extend([term] * len(dates))
+        all_titles.extend(titles.get(d) for d in dates)
+    return all_dates, all_terms, all_titles
+
+
+def split_new_dates(dates_by_term: Dict[str, List[date]], inserted) -> Dict[str, List[date]]:
+    """
+    Filtra as datas de cada termo mantendo só as inseridas agora
+
+    Preserva a ordem recebida (o RETURNING não garante ordem).
+    """
+    inserted = set(inserted)
+    new_by_term = {}
+    for term, dates in dates_by_term.items():
+        new_dates = [d for d in dates if (d, term) in inserted]
+        for d in new_dates:
+            logger.info(f"Nova publicação para '{term}': {d.strftime('%d/%m/%Y')}")
+        new_by_term[term] = new_dates
+    return new_by_term
+
+
+def upsert_publications_batch(conn, dates_by_term: Dict[str, List[date]],
+                              titles_by_term: Optional[Dict[str, Dict[date, str]]] = None,
+                              enqueue: bool = False) -> Dict[str, List[date]]:
+    """
+    Insere as datas de vários termos em um único comando e transação
+
+    Args:
+        conn: Conexão com o banco PostgreSQL
+        dates_by_term: Dicionário {termo: [datas]}
+        titles_by_term: Dicionário {termo: {data: título}} para preencher raw_title (opcional)
+        enqueue: Enfileira as datas novas em notification_outbox na mesma transação
+
+    Returns:
+        Dicionário {termo: [datas novas]}
+    """
+    try:
+        with conn.cursor() as cur:
+            sql = UPSERT_AND_ENQUEUE_SQL if enqueue else UPSERT_PUBLICATIONS_BATCH_SQL
+            cur.execute(sql, batch_params(dates_by_term, titles_by_term), prepare=DB_PREPARE)
+            inserted = cur.fetchall()
+        conn.commit()
+
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Erro ao inserir publicações no banco: {e}")
+        raise
+
+    return split_new_dates(dates_by_term, inserted)
+
+
+def upsert_publications(conn, dates: List[date], search_term: str,
+                        titles: Optional[Dict[date, str]] = None, enqueue: bool = False):
+    """
+    Insere datas no banco associadas ao termo de busca (com o título, se houver).
+    Retorna apenas as datas novas.
+    """
+    return upsert_publications_batch(conn, {search_term: dates}, {search_term: titles or {}}, enqueue)[search_term]
+
+
+def log_notifications(conn, entries: List[tuple]):
+    """
+    Grava os envios em notifications_log em um único comando
+
+    Args:
+        conn: Conexão com o banco PostgreSQL
+        entries: Tuplas (data, termo, destinatários, status, mensagem de erro)
+    """
+    if not entries:
+        return
+    try:
+        with conn.cursor() as cur:
+            cur.execute(LOG_NOTIFICATIONS_SQL, [list(column) for column in zip(*entries)], prepare=DB_PREPARE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def fetch_known_dates(conn, search_term: str) -> List[date]:
+    """Retorna as datas já gravadas para o termo (mais recente primeiro)"""
+    with conn.cursor() as cur:
+        cur.execute(KNOWN_DATES_SQL, (search_term,), prepare=DB_PREPARE)
+        return [row[0] for row in cur.fetchall()]
+
+
+def has_known_date(conn, search_term: str, dates: List[date]) -> bool:
+    """Indica se alguma das datas já está gravada para o termo (uma consulta por página)"""
+    with conn.cursor() as cur:
+        cur.execute(ANY_KNOWN_DATE_SQL, (search_term, list(dates)), prepare=DB_PREPARE)
+        return cur.fetchone()[0]
+
+
+def index_result_rows(conn, rows: List[tuple]) -> List[Tuple[date, str, str]]:
+    """
+    Grava as linhas de resultado no índice local em um único comando
+
+    Args:
+        conn: Conexão com o banco PostgreSQL
+        rows: Tuplas (chave, data, título, seção, link, texto normalizado, termo que encontrou)
+
+    Returns:
+        (data, título, texto normalizado) das linhas que ainda não estavam no índice
+    """
+    if not rows:
+        return []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(INDEX_RESULT_ROWS_SQL, [list(column) for column in zip(*rows)], prepare=DB_PREPARE)
+            inserted = cur.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted
+
+
+def search_result_index(conn, queries: Dict[str, str], since: date) -> List[Tuple[str, date, str]]:
+    """Retorna (termo, data, título) das linhas do índice local que contêm cada consulta {termo: texto normalizado}"""
+    if not queries:
+        return []
+    with conn.cursor() as cur:
+        cur.execute(SEARCH_RESULT_INDEX_SQL, (list(queries), list(queries.values()), since), prepare=DB_PREPARE)
+        return cur.fetchall()
+
+
+def fetch_subscriptions_version(conn) -> str:
+    """Retorna a versão (hash do conteúdo) da tabela de assinaturas"""
+    with conn.cursor() as cur:
+        cur.execute(SUBSCRIPTIONS_VERSION_SQL, prepare=DB_PREPARE)
+        return cur.fetchone()[0]
+
+
+def fetch_subscriptions(conn) -> List[Tuple[str, str, int, Optional[int]]]:
+    """Retorna (termo, destinatário, prioridade, intervalo em minutos) das assinaturas ativas"""
+    with conn.cursor() as cur:
+        cur.execute(LOAD_SUBSCRIPTIONS_SQL, prepare=DB_PREPARE)
+        return cur.fetchall()
+
+
+def heartbeat_node(conn, node_id: str, lease_seconds: float):
+    """Registra o heartbeat do nó e renova os seus leases em uma transação"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(HEARTBEAT_NODE_SQL, (node_id,), prepare=DB_PREPARE)
+            cur.execute(RENEW_TERM_LEASES_SQL, (lease_seconds, node_id), prepare=DB_PREPARE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def fetch_live_nodes(conn, node_ttl: float) -> List[str]:
+    """Retorna os nós com heartbeat nos últimos `node_ttl` segundos"""
+    with conn.cursor() as cur:
+        cur.execute(LIVE_NODES_SQL, (node_ttl,), prepare=DB_PREPARE)
+        return [row[0] for row in cur.fetchall()]
+
+
+def claim_term_leases(conn, node_id: str, search_terms: List[str], lease_seconds: float) -> List[str]:
+    """Toma os leases dos termos em um único comando; retorna os termos que ficaram com o nó"""
+    if not search_terms:
+        return []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CLAIM_TERM_LEASES_SQL, (node_id, lease_seconds, list(search_terms)), prepare=DB_PREPARE)
+            claimed = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return claimed
+
+
+def release_term_leases(conn, node_id: str, deregister: bool = False):
+    """Libera os leases do nó (e, com deregister, remove o nó do cluster)"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(RELEASE_TERM_LEASES_SQL, (node_id,), prepare=DB_PREPARE)
+            if deregister:
+                cur.execute(DEREGISTER_NODE_SQL, (node_id,), prepare=DB_PREPARE)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def fetch_cluster_status(conn) -> List[Tuple[str, datetime, List[str]]]:
+    """Retorna (nó, último heartbeat, termos com lease) de cada nó registrado"""
+    with conn.cursor() as cur:
+        cur.execute(CLUSTER_STATUS_SQL, prepare=DB_PREPARE)
+        return cur.fetchall()
+
+
+def fetch_publication_history(conn, days: int) -> List[Tuple[str, datetime]]:
+    """Retorna (termo, first_seen_at) das publicações detectadas nos últimos `days` dias"""
+    with conn.cursor() as cur:
+        cur.execute(PUBLICATION_HISTORY_SQL, (days,), prepare=DB_PREPARE)
+        return cur.fetchall()
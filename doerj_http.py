@@ -0,0 +1,273 @@
+"""
+Motor de busca HTTP (sem navegador) para o DOERJ
+Submete o formulário de busca do IOERJ diretamente via HTTP, sem iniciar o Chromium.
+O Selenium continua disponível em busca_decreto_receita_despesa.py como fallback.
+"""
+
+import os
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+from dotenv import load_dotenv
+
+import metrics
+from results_parser import find_next_page_url
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+)
+
+# Presença de linhas na tabela de resultados (equivalente ao "table tbody tr" do Selenium)
+RESULTS_PATTERN = re.compile(r"<tbody[^>]*>\s*<tr", re.IGNORECASE)
+
+
+class BuscaHttpError(Exception):
+    """Erro na busca via HTTP (formulário não encontrado ou resultados ausentes)"""
+
+
+class _SearchFormParser(HTMLParser):
+    """Localiza o formulário que contém o campo textobusca e coleta seus campos"""
+
+    def __init__(self):
+        super().__init__()
+        self._current: Optional[dict] = None
+        self.form: Optional[dict] = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self._current = {
+                "action": attrs.get("action") or "",
+                "method": (attrs.get("method") or "get").lower(),
+                "fields": {},
+                "has_search": False,
+            }
+        elif tag == "input" and self._current is not None:
+            name = attrs.get("name")
+            if not name:
+                return
+            input_type = (attrs.get("type") or "text").lower()
+            if input_type in ("checkbox", "radio") and "checked" not in attrs:
+                return
+            self._current["fields"][name] = attrs.get("value") or ""
+            if name == "textobusca":
+                self._current["has_search"] = True
+
+    def handle_endtag(self, tag):
+        if tag == "form" and self._current is not None:
+            if self._current["has_search"] and self.form is None:
+                self.form = self._current
+            self._current = None
+
+
+def parse_search_form(page_html: str) -> dict:
+    """
+    Extrai action, método e campos padrão do formulário de busca
+
+    Args:
+        page_html: HTML da página de busca
+
+    Returns:
+        Dicionário com as chaves action, method e fields
+
+    Raises:
+        BuscaHttpError se o formulário não for encontrado
+    """
+    parser = _SearchFormParser()
+    parser.feed(page_html)
+    parser.close()
+    if parser.form is None:
+        raise BuscaHttpError("Formulário de busca (textobusca) não encontrado na página")
+    return parser.form
+
+
+def build_search_request(form_html: str, form_url: str, search_term: str) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Monta a requisição de busca a partir da página do formulário
+
+    Args:
+        form_html: HTML da página de busca
+        form_url: URL final da página de busca (após redirecionamentos)
+        search_term: Termo de busca
+
+    Returns:
+        Tupla (método, url_de_destino, campos)
+    """
+    form = parse_search_form(form_html)
+
+    fields: Dict[str, str] = dict(form["fields"])
+    fields["textobusca"] = search_term
+    fields.setdefault("buscar", "buscar")
+
+    action = urljoin(form_url, form["action"]) if form["action"] else form_url
+    return form["method"], action, fields
+
+
+def check_results(page_html: str, search_term: str):
+    """Levanta BuscaHttpError se a página não tiver a tabela de resultados"""
+    if not RESULTS_PATTERN.search(page_html):
+        raise BuscaHttpError(f"Resultados não encontrados na resposta HTTP para '{search_term}'")
+
+
+def create_http_session() -> requests.Session:
+    """Cria uma sessão HTTP com cabeçalhos padrão e keep-alive"""
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "pt-BR,pt;q=0.9",
+    })
+    return session
+
+
+_thread_local = threading.local()
+
+
+def get_thread_session() -> requests.Session:
+    """Retorna a sessão HTTP da thread atual, criando-a na primeira chamada (uma por worker)"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = create_http_session()
+        _thread_local.session = session
+    return session
+
+
+def _decode(response: requests.Response) -> str:
+    """Decodifica a resposta respeitando o charset declarado no cabeçalho, se houver"""
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = response.apparent_encoding or "utf-8"
+    return response.text
+
+
+def _search(session: requests.Session, search_term: str, url: str) -> Tuple[str, str]:
+    """Submete o formulário e retorna (HTML, URL) da primeira página de resultados"""
+    form_response = session.get(url, timeout=HTTP_TIMEOUT)
+    form_response.raise_for_status()
+    method, action, fields = build_search_request(
+        _decode(form_response), form_response.url, search_term
+    )
+
+    if method == "post":
+        response = session.post(action, data=fields, timeout=HTTP_TIMEOUT)
+    else:
+        response = session.get(action, params=fields, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+
+    page_html = _decode(response)
+    check_results(page_html, search_term)
+
+    logger.info(f"Busca HTTP concluída para '{search_term}' ({len(page_html)} bytes)")
+    return page_html, response.url
+
+
+def _get_page(session: requests.Session, url: str) -> Tuple[str, str]:
+    """Baixa uma página de resultados seguinte e retorna (HTML, URL)"""
+    response = session.get(url, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return _decode(response), response.url
+
+
+def _timed_fetch(fetch, search_term: str, *args) -> Tuple[str, str]:
+    """Executa _search/_get_page medindo a etapa page_load e contando timeouts"""
+    with metrics.timed("page_load", search_term):
+        try:
+            return fetch(*args)
+        except requests.Timeout:
+            metrics.TIMEOUTS.labels("page_load").inc()
+            raise
+
+
+def fetch_page_http(search_term: str, url: str, session: Optional[requests.Session] = None) -> str:
+    """
+    Busca o termo no DOERJ via HTTP e retorna o HTML da página de resultados
+
+    Args:
+        search_term: Termo de busca (número do decreto)
+        url: URL do formulário de busca (DIARIO_URL)
+        session: Sessão HTTP reutilizável (opcional)
+
+    Returns:
+        HTML da página de resultados
+
+    Raises:
+        BuscaHttpError se a página não contiver resultados
+    """
+    own_session = session is None
+    if own_session:
+        session = create_http_session()
+
+    try:
+        return _search(session, search_term, url)[0]
+    finally:
+        if own_session:
+            session.close()
+
+
+def iter_result_pages_http(search_term: str, url: str, session: Optional[requests.Session] = None,
+                           max_pages: int = 1, prefetch_from: int = 2) -> Iterator[str]:
+    """
+    Gera o HTML de cada página de resultados, seguindo o link de próxima página
+
+    A partir da página `prefetch_from`, a página N+1 é baixada em segundo plano
+    enquanto quem consome o gerador analisa a página N. Na primeira página não
+    há pré-busca por padrão: nas execuções diárias ela quase sempre já contém
+    uma data conhecida e a busca termina ali.
+
+    Args:
+        search_term: Termo de busca (número do decreto)
+        url: URL do formulário de busca (DIARIO_URL)
+        session: Sessão HTTP reutilizável (opcional)
+        max_pages: Número máximo de páginas a percorrer
+        prefetch_from: Primeira página durante cuja análise a seguinte é pré-buscada
+
+    Raises:
+        BuscaHttpError se a primeira página não contiver resultados
+    """
+    own_session = session is None
+    if own_session:
+        session = create_http_session()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+    try:
+        page_html, page_url = _timed_fetch(_search, search_term, session, search_term, url)
+        visited = {page_url}
+        for page_number in range(1, max_pages + 1):
+            next_url = find_next_page_url(page_html, page_url)
+            if next_url in visited:
+                # Paginação que aponta para uma página já lida: evita laço infinito
+                next_url = None
+            elif next_url and page_number == max_pages:
+                logger.warning(
+                    f"'{search_term}': limite de {max_pages} página(s) atingido; histórico mais antigo não lido"
+                )
+                next_url = None
+
+            prefetch = (
+                executor.submit(_timed_fetch, _get_page, search_term, session, next_url)
+                if next_url and page_number >= prefetch_from else None
+            )
+            yield page_html
+            if not next_url:
+                return
+
+            page_html, page_url = prefetch.result() if prefetch else _timed_fetch(_get_page, search_term, session, next_url)
+            visited.update((next_url, page_url))
+            logger.info(f"Página {page_number + 1} de resultados lida para '{search_term}' ({len(page_html)} bytes)")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if own_session:
+            session.close()
@@ -0,0 +1,139 @@
+"""
+Pool de navegadores Chrome reutilizáveis entre termos de busca
+Mantém uma ou mais instâncias do WebDriver abertas durante a execução,
+reciclando as que travarem ou que já atenderam páginas demais.
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    """Instância do WebDriver gerenciada pelo pool"""
+
+    def __init__(self, driver, driver_id: int):
+        self.driver = driver
+        self.driver_id = driver_id
+        self.pages = 0
+        self.broken = False
+
+
+class DriverPool:
+    """
+    Pool de navegadores com criação sob demanda
+
+    Args:
+        factory: Função que cria um novo WebDriver (ex.: create_chrome_driver)
+        size: Número máximo de navegadores simultâneos
+        max_pages: Páginas atendidas antes de reciclar o navegador
+    """
+
+    def __init__(self, factory: Callable, size: int = 1, max_pages: int = 50):
+        self._factory = factory
+        self._max_pages = max_pages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._lock = threading.Lock()
+        self._active = set()
+        self._next_id = 1
+        self._closed = False
+
+    def _create(self) -> PooledDriver:
+        with self._lock:
+            driver_id = self._next_id
+            self._next_id += 1
+        start = time.perf_counter()
+        pooled = PooledDriver(self._factory(), driver_id)
+        logger.info(f"Navegador #{driver_id} iniciado em {time.perf_counter() - start:.2f}s")
+        with self._lock:
+            self._active.add(pooled)
+        return pooled
+
+    def _destroy(self, pooled: PooledDriver, reason: str):
+        with self._lock:
+            self._active.discard(pooled)
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar navegador #{pooled.driver_id}: {e}")
+        logger.info(f"Navegador #{pooled.driver_id} fechado ({reason}, {pooled.pages} páginas)")
+
+    @staticmethod
+    def _is_alive(pooled: PooledDriver) -> bool:
+        """Verifica se o navegador ainda responde"""
+        try:
+            pooled.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    @contextmanager
+    def acquire(self):
+        """
+        Empresta um navegador do pool (cria um novo se não houver livre)
+
+        Yields:
+            Instância do WebDriver pronta para uso
+        """
+        if self._closed:
+            raise RuntimeError("DriverPool já foi fechado")
+
+        self._slots.acquire()
+        pooled = None
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._create()
+
+            try:
+                yield pooled.driver
+            except Exception:
+                if not self._is_alive(pooled):
+                    pooled.broken = True
+                raise
+            finally:
+                pooled.pages += 1
+        finally:
+            if pooled is not None:
+                self._release(pooled)
+            self._slots.release()
+
+    def _release(self, pooled: PooledDriver):
+        if self._closed:
+            self._destroy(pooled, "pool fechado")
+        elif pooled.broken:
+            self._destroy(pooled, "navegador sem resposta")
+        elif pooled.pages >= self._max_pages:
+            self._destroy(pooled, "limite de páginas atingido")
+        else:
+            self._idle.put(pooled)
+
+    def active_drivers(self) -> list:
+        """Navegadores abertos no momento (livres e emprestados)"""
+        with self._lock:
+            return [pooled.driver for pooled in self._active]
+
+    def close(self):
+        """Fecha todos os navegadores abertos pelo pool"""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(pooled, "fim da execução")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
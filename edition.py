@@ -0,0 +1,380 @@
+"""
+Modo por edição: baixa a edição do dia do DOERJ uma vez e procura todos os termos nela
+Lê a página de índice da edição, baixa cada documento (HTML, texto ou PDF) em
+streaming e casa todos os termos monitorados em uma única passada pelo texto
+(Aho-Corasick, result_index.TermMatcher). O número de requisições por dia
+depende do tamanho da edição, não da quantidade de termos.
+
+Documentos já lidos não são baixados de novo nas execuções seguintes do mesmo
+processo (ex.: o scheduler), a menos que um termo novo tenha sido cadastrado.
+
+Uso:
+    SEARCH_MODE=edition python scheduler.py
+    python edition.py                      # edição de hoje, termos de SEARCH_TERMS (só lista, sem gravar)
+    python edition.py 46930 --date 2025-10-28 --days 2
+"""
+
+import argparse
+import codecs
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+import requests
+from dotenv import load_dotenv
+from pypdf import PdfReader
+
+import metrics
+from doerj_http import HTTP_TIMEOUT, get_thread_session
+from result_index import TermMatcher
+from results_parser import mask_session_params
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+# Página com os documentos da edição de um dia ({data} no formato EDITION_DATE_FORMAT)
+EDITION_INDEX_URL = os.getenv(
+    "EDITION_INDEX_URL",
+    "https://www.ioerj.com.br/portal/modules/conteudoonline/do_seleciona_edicao.php?data={data}",
+)
+EDITION_DATE_FORMAT = os.getenv("EDITION_DATE_FORMAT", "%Y%m%d")
+# Links da página de índice que apontam para documentos da edição
+EDITION_LINK_PATTERN = re.compile(
+    os.getenv("EDITION_LINK_PATTERN", r"mostra_edicao\.php|\.pdf(\?|$)"), re.IGNORECASE
+)
+# Edições lidas por execução: hoje e os N dias anteriores (publicações tardias e execuções perdidas)
+EDITION_LOOKBACK_DAYS = int(os.getenv("EDITION_LOOKBACK_DAYS", "1"))
+# Documentos baixados em paralelo e limite de documentos por edição
+EDITION_WORKERS = int(os.getenv("EDITION_WORKERS", "4"))
+EDITION_MAX_DOCS = int(os.getenv("EDITION_MAX_DOCS", "1000"))
+# Tamanho dos pedaços lidos da resposta; PDFs maiores que o limite vão para disco
+EDITION_CHUNK_SIZE = 64 * 1024
+EDITION_PDF_SPOOL_MB = int(os.getenv("EDITION_PDF_SPOOL_MB", "16"))
+
+SPACE_PATTERN = re.compile(r"\s+")
+
+
+class EditionError(Exception):
+    """Erro ao ler a página de índice da edição"""
+
+
+class EditionDocument:
+    """Documento listado na página de índice da edição"""
+
+    __slots__ = ("url", "title")
+
+    def __init__(self, url: str, title: str):
+        self.url = url
+        self.title = title
+
+    def __repr__(self):
+        return f"EditionDocument({self.url!r}, {self.title!r})"
+
+
+class _EditionIndexParser(HTMLParser):
+    """Coleta os links (href e texto) que casam com EDITION_LINK_PATTERN"""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self._base_url = base_url
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+        self.documents: List[EditionDocument] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href and EDITION_LINK_PATTERN.search(href):
+                self._href = urljoin(self._base_url, href)
+                self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            title = SPACE_PATTERN.sub(" ", "".join(self._text)).strip()
+            self.documents.append(EditionDocument(self._href, title or self._href))
+            self._href = None
+
+
+class _TextExtractor(HTMLParser):
+    """Extrai o texto de um HTML recebido em pedaços, sem scripts nem estilos"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip = 0
+        self._parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._parts.append(data)
+
+    def take(self) -> str:
+        """Texto acumulado desde a última chamada"""
+        text = " ".join(self._parts)
+        self._parts = []
+        return text
+
+
+def edition_index_url(day: date) -> str:
+    return EDITION_INDEX_URL.format(data=day.strftime(EDITION_DATE_FORMAT))
+
+
+def list_documents(day: date, session: Optional[requests.Session] = None) -> List[EditionDocument]:
+    """
+    Lê a página de índice da edição do dia e retorna os documentos, sem repetições
+
+    Raises:
+        EditionError: se a página não puder ser lida
+    """
+    session = session or get_thread_session()
+    url = edition_index_url(day)
+    try:
+        with metrics.timed("page_load", "edicao"):
+            response = session.get(url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise EditionError(f"Falha ao ler a edição de {day:%d/%m/%Y}: {e}") from e
+
+    parser = _EditionIndexParser(response.url or url)
+    parser.feed(response.text)
+    parser.close()
+    unique: Dict[str, EditionDocument] = {}
+    for document in parser.documents:
+        unique.setdefault(mask_session_params(document.url), document)
+    documents = list(unique.values())
+    if len(documents) > EDITION_MAX_DOCS:
+        logger.warning(f"Edição de {day:%d/%m/%Y}: {len(documents)} documentos, lendo só {EDITION_MAX_DOCS}")
+        documents = documents[:EDITION_MAX_DOCS]
+    return documents
+
+
+def _is_pdf(response: requests.Response) -> bool:
+    content_type = response.headers.get("Content-Type", "").lower()
+    return "application/pdf" in content_type or response.url.lower().split("?")[0].endswith(".pdf")
+
+
+def _iter_pdf_text(response: requests.Response) -> Iterator[str]:
+    # O PDF precisa ser lido inteiro antes de extrair o texto: fica em memória até
+    # EDITION_PDF_SPOOL_MB e, acima disso, em arquivo temporário
+    with tempfile.SpooledTemporaryFile(max_size=EDITION_PDF_SPOOL_MB * 1024 * 1024) as spool:
+        for chunk in response.iter_content(EDITION_CHUNK_SIZE):
+            spool.write(chunk)
+        spool.seek(0)
+        for page in PdfReader(spool).pages:
+            yield page.extract_text() or ""
+
+
+def _iter_markup_text(response: requests.Response) -> Iterator[str]:
+    encoding = response.encoding
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        encoding = "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    if "text/plain" in response.headers.get("Content-Type", "").lower():
+        for chunk in response.iter_content(EDITION_CHUNK_SIZE):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+        return
+
+    extractor = _TextExtractor()
+    for chunk in response.iter_content(EDITION_CHUNK_SIZE):
+        extractor.feed(decoder.decode(chunk))
+        yield extractor.take()
+    extractor.feed(decoder.decode(b"", final=True))
+    extractor.close()
+    yield extractor.take()
+
+
+def iter_document_text(url: str, session: Optional[requests.Session] = None) -> Iterator[str]:
+    """Baixa um documento em streaming e gera o texto em pedaços (HTML, texto puro ou PDF)"""
+    session = session or get_thread_session()
+    with session.get(url, timeout=HTTP_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        if _is_pdf(response):
+            yield from _iter_pdf_text(response)
+        else:
+            yield from _iter_markup_text(response)
+
+
+def document_key(day: date, document: EditionDocument) -> Tuple[date, str, str]:
+    """Identifica o documento entre execuções: dia, título e link sem o token de sessão"""
+    return day, document.title, mask_session_params(document.url)
+
+
+class EditionScanner:
+    """
+    Lê as edições e casa os termos, lembrando quais documentos já foram lidos
+    para quais termos (compartilhado entre execuções do scheduler)
+
+    Um documento só conta como lido para um termo após confirm(), chamado quando
+    o termo foi gravado e notificado: uma falha no banco ou no e-mail faz os
+    documentos serem lidos (e o termo encontrado) de novo na próxima execução.
+    Documentos de edições fora da janela de scan() são esquecidos.
+
+    Args:
+        workers: Documentos baixados em paralelo
+    """
+
+    def __init__(self, workers: int = 4):
+        self._workers = max(1, workers)
+        self._lock = threading.Lock()
+        # {document_key: termos já procurados no documento}
+        self._scanned: Dict[Tuple[date, str, str], Set[str]] = {}
+        # {termo: document_key dos documentos lidos para ele, à espera de confirm()}
+        self._pending: Dict[str, Set[Tuple[date, str, str]]] = {}
+
+    def _scan_document(self, document: EditionDocument, matcher: TermMatcher) -> Set[str]:
+        with metrics.timed("parse", "edicao"):
+            return matcher.scan(iter_document_text(document.url))
+
+    def scan_day(self, day: date, terms: Iterable[str]) -> Dict[str, Dict[date, Optional[str]]]:
+        """
+        Procura os termos na edição de um dia
+
+        Documentos que falham são registrados e pulados (e lidos de novo na próxima execução).
+
+        Returns:
+            Dicionário {termo: {data da edição: título do primeiro documento que o contém}}
+
+        Raises:
+            EditionError: se a página de índice da edição não puder ser lida
+        """
+        terms = list(dict.fromkeys(terms))
+        documents = list_documents(day)
+        work = []
+        for document in documents:
+            with self._lock:
+                missing = [t for t in terms if t not in self._scanned.get(document_key(day, document), ())]
+            if missing:
+                work.append((document, missing))
+        logger.info(
+            f"Edição de {day:%d/%m/%Y}: {len(documents)} documento(s), {len(work)} a ler para {len(terms)} termo(s)"
+        )
+        if not work:
+            return {}
+
+        matchers: Dict[Tuple[str, ...], TermMatcher] = {}
+        for _, missing in work:
+            key = tuple(missing)
+            if key not in matchers:
+                matchers[key] = TermMatcher(missing)
+
+        def scan(item):
+            document, missing = item
+            try:
+                return document, missing, self._scan_document(document, matchers[tuple(missing)])
+            except Exception as e:
+                logger.warning(f"Falha ao ler o documento '{document.title}' ({document.url}): {e}")
+                return document, missing, None
+
+        matches: Dict[str, Dict[date, Optional[str]]] = {}
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="edicao") as executor:
+            # map preserva a ordem da edição: o título é o do primeiro documento que contém o termo
+            for document, missing, found in executor.map(scan, work):
+                if found is None:
+                    continue
+                with self._lock:
+                    for term in missing:
+                        self._pending.setdefault(term, set()).add(document_key(day, document))
+                for term in found:
+                    matches.setdefault(term, {}).setdefault(day, document.title)
+        logger.info(f"Edição de {day:%d/%m/%Y}: {len(matches)} termo(s) encontrado(s)")
+        return matches
+
+    def scan(self, terms: Iterable[str], today: Optional[date] = None,
+             lookback_days: int = EDITION_LOOKBACK_DAYS) -> Tuple[Dict[str, Dict[date, Optional[str]]], List[date]]:
+        """
+        Procura os termos nas edições de hoje e dos `lookback_days` dias anteriores
+
+        Returns:
+            Tupla ({termo: {data: título}}, dias cuja edição não pôde ser lida)
+        """
+        terms = list(terms)
+        today = today or date.today()
+        self._forget_before(today - timedelta(days=lookback_days))
+        matches: Dict[str, Dict[date, Optional[str]]] = {}
+        failed_days = []
+        for offset in range(lookback_days, -1, -1):
+            day = today - timedelta(days=offset)
+            try:
+                for term, found in self.scan_day(day, terms).items():
+                    matches.setdefault(term, {}).update(found)
+            except EditionError as e:
+                logger.error(str(e))
+                failed_days.append(day)
+        # Mais recente primeiro, como em collect_term
+        return {term: dict(sorted(found.items(), reverse=True)) for term, found in matches.items()}, failed_days
+
+    def confirm(self, term: str):
+        """Marca como lidos para o termo os documentos pendentes (após gravá-lo e notificá-lo com sucesso)"""
+        with self._lock:
+            for key in self._pending.pop(term, ()):
+                self._scanned.setdefault(key, set()).add(term)
+
+    def _forget_before(self, first_day: date):
+        """Esquece os documentos das edições anteriores a `first_day` (não são mais lidos)"""
+        with self._lock:
+            self._scanned = {key: terms for key, terms in self._scanned.items() if key[0] >= first_day}
+            for term, keys in list(self._pending.items()):
+                keys = {key for key in keys if key[0] >= first_day}
+                if keys:
+                    self._pending[term] = keys
+                else:
+                    del self._pending[term]
+
+
+_scanner = None
+
+
+def get_edition_scanner() -> EditionScanner:
+    """Retorna o leitor de edições do processo (compartilhado entre execuções do scheduler)"""
+    global _scanner
+    if _scanner is None:
+        _scanner = EditionScanner(EDITION_WORKERS)
+    return _scanner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("terms", nargs="*", help="termos procurados (padrão: SEARCH_TERMS)")
+    parser.add_argument("--date", help="dia da edição (AAAA-MM-DD, padrão: hoje)")
+    parser.add_argument("--days", type=int, default=0, help="dias anteriores também lidos")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    terms = args.terms or [t.strip() for t in os.getenv("SEARCH_TERMS", "").split(",") if t.strip()]
+    if not terms:
+        logger.error("Nenhum termo informado e SEARCH_TERMS vazio")
+        sys.exit(1)
+    day = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+    matches, failed_days = get_edition_scanner().scan(terms, day, args.days)
+    for term in terms:
+        for publication_date, title in matches.get(term, {}).items():
+            print(f"{term}\t{publication_date:%d/%m/%Y}\t{title}")
+    if failed_days:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
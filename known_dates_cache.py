@@ -0,0 +1,185 @@
+"""
+Cache local das datas já conhecidas de cada termo
+Evita enviar ao banco datas que já foram gravadas: só as datas candidatas a novas
+chegam ao upsert. O cache é carregado do banco uma vez, pode ser persistido em
+disco (JSON) entre execuções e é reconciliado com o banco periodicamente.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from dotenv import load_dotenv
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+KNOWN_DATES_CACHE = os.getenv("KNOWN_DATES_CACHE", "true").lower() == "true"
+# Arquivo JSON para manter o cache entre processos (vazio = apenas em memória)
+KNOWN_DATES_CACHE_FILE = os.getenv("KNOWN_DATES_CACHE_FILE", "known_dates.json")
+# Intervalo de reconciliação com o banco, em horas
+KNOWN_DATES_RECONCILE_HOURS = float(os.getenv("KNOWN_DATES_RECONCILE_HOURS", "24"))
+
+LOAD_KNOWN_DATES_SQL = """
+    SELECT search_term, publication_date
+    FROM decree_publications
+    WHERE search_term = ANY(%s)
+"""
+
+
+class KnownDatesCache:
+    """
+    Conjunto de pares (termo, data) já gravados em decree_publications
+
+    Args:
+        path: Arquivo JSON de persistência (None = só memória)
+        reconcile_interval: Tempo após o qual o cache é recarregado do banco
+    """
+
+    def __init__(self, path: Optional[str] = None, reconcile_interval: timedelta = timedelta(hours=24)):
+        self._path = path
+        self._reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._known: Dict[str, Set[date]] = {}
+        self._reconciled_at: Optional[datetime] = None
+        self._dirty = False
+        self._load_file()
+
+    def _load_file(self):
+        if not self._path or not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+            reconciled_at = data.get("reconciled_at")
+            self._reconciled_at = datetime.fromisoformat(reconciled_at) if reconciled_at else None
+            self._known = {
+                term: {date.fromisoformat(d) for d in dates}
+                for term, dates in data["terms"].items()
+            }
+            logger.info(f"Cache de datas carregado de {self._path} ({len(self._known)} termos)")
+        except Exception as e:
+            logger.warning(f"Cache de datas inválido em {self._path} ({e}); será recarregado do banco")
+            self._known = {}
+            self._reconciled_at = None
+
+    def save(self):
+        """Grava o cache em disco (escrita atômica), se houver alterações"""
+        if not self._path or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                "reconciled_at": self._reconciled_at.isoformat() if self._reconciled_at else None,
+                "terms": {term: sorted(d.isoformat() for d in dates) for term, dates in self._known.items()},
+            }
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path)
+            self._dirty = False
+
+    def _is_stale(self) -> bool:
+        return (
+            self._reconciled_at is None
+            or datetime.now() - self._reconciled_at >= self._reconcile_interval
+        )
+
+    def ensure_loaded(self, search_terms: Iterable[str], conn=None, reconcile: bool = True):
+        """
+        Garante que os termos estão no cache, consultando o banco se necessário
+
+        Se o cache estiver vencido (e reconcile=True), recarrega todos os termos
+        informados; caso contrário, busca apenas os termos ausentes.
+        Sem termos a buscar, nenhuma consulta é feita.
+        """
+        search_terms = list(dict.fromkeys(search_terms))
+        stale = reconcile and self._is_stale()
+        missing = search_terms if stale else [t for t in search_terms if t not in self._known]
+        if not missing:
+            return
+
+        if conn is None:
+            with db.connection() as pooled_conn:
+                rows = pooled_conn.execute(LOAD_KNOWN_DATES_SQL, (missing,)).fetchall()
+        else:
+            rows = conn.execute(LOAD_KNOWN_DATES_SQL, (missing,)).fetchall()
+
+        loaded: Dict[str, Set[date]] = {term: set() for term in missing}
+        for term, publication_date in rows:
+            loaded[term].add(publication_date)
+
+        with self._lock:
+            self._known.update(loaded)
+            if stale:
+                self._reconciled_at = datetime.now()
+            self._dirty = True
+
+        action = "reconciliado" if stale else "carregado"
+        logger.info(f"Cache de datas {action} do banco: {len(missing)} termo(s), {len(rows)} data(s)")
+
+    def filter_new(self, search_term: str, dates: List[date]) -> List[date]:
+        """Retorna, na mesma ordem, só as datas que não constam do cache"""
+        self.ensure_loaded([search_term], reconcile=False)
+        known = self._known.get(search_term, set())
+        return [d for d in dates if d not in known]
+
+    def has_known(self, search_term: str, dates: List[date]) -> bool:
+        """Indica se alguma das datas consta do cache (parada da paginação)"""
+        return len(self.filter_new(search_term, dates)) < len(dates)
+
+    def add(self, search_term: str, dates: Iterable[date]):
+        """Registra datas que agora estão gravadas no banco"""
+        with self._lock:
+            self._known.setdefault(search_term, set()).update(dates)
+            self._dirty = True
+
+
+class _NoCache:
+    """Substituto usado quando KNOWN_DATES_CACHE=false: todas as datas vão ao banco"""
+
+    def ensure_loaded(self, search_terms, conn=None, reconcile=True):
+        pass
+
+    def filter_new(self, search_term, dates):
+        return list(dates)
+
+    def has_known(self, search_term, dates):
+        # Sem cache, a parada da paginação consulta o banco (uma vez por página)
+        try:
+            with db.connection() as conn:
+                return db.has_known_date(conn, search_term, dates)
+        except Exception as e:
+            logger.warning(f"Não foi possível consultar as datas de '{search_term}' ({e}); paginação encerrada")
+            return True
+
+    def add(self, search_term, dates):
+        pass
+
+    def save(self):
+        pass
+
+
+_cache = None
+
+
+def get_known_dates_cache():
+    """Retorna o cache do processo (compartilhado entre execuções do scheduler)"""
+    global _cache
+    if _cache is None:
+        if KNOWN_DATES_CACHE:
+            _cache = KnownDatesCache(
+                KNOWN_DATES_CACHE_FILE or None,
+                timedelta(hours=KNOWN_DATES_RECONCILE_HOURS),
+            )
+        else:
+            logger.info("Cache de datas desativado: a paginação consulta decree_publications a cada página")
+            _cache = _NoCache()
+    return _cache
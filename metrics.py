@@ -0,0 +1,105 @@
+"""
+Métricas da execução no formato do Prometheus
+Tempo de cada etapa por termo (abertura do navegador, carga da página, clique,
+análise, gravação no banco e SMTP), novas tentativas, timeouts e datas novas x
+já vistas. Expostas em /metrics pelo scheduler (METRICS_PORT) ou gravadas em
+arquivo para o textfile collector do node_exporter (METRICS_TEXTFILE).
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+# Porta do endpoint /metrics do scheduler (0 = desligado)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
+# Arquivo .prom gravado ao fim de cada execução (vazio = desligado)
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")
+
+REGISTRY = CollectorRegistry()
+
+STAGE_SECONDS = Histogram(
+    "decreto_stage_seconds",
+    "Duração de cada etapa da coleta, por termo",
+    ["stage", "term"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+    registry=REGISTRY,
+)
+RETRIES = Counter("decreto_retries", "Novas tentativas, por etapa", ["stage"], registry=REGISTRY)
+TIMEOUTS = Counter("decreto_timeouts", "Timeouts, por etapa", ["stage"], registry=REGISTRY)
+DATES = Counter(
+    "decreto_dates", "Datas candidatas por termo: novas ou já gravadas", ["term", "status"], registry=REGISTRY
+)
+TERM_FAILURES = Counter("decreto_term_failures", "Termos que falharam", ["term"], registry=REGISTRY)
+RUN_SECONDS = Gauge("decreto_last_run_seconds", "Duração da última execução", registry=REGISTRY)
+RUN_TIMESTAMP = Gauge("decreto_last_run_timestamp_seconds", "Fim da última execução (epoch)", registry=REGISTRY)
+RUN_FAILED_TERMS = Gauge("decreto_last_run_failed_terms", "Termos com falha na última execução", registry=REGISTRY)
+RUN_PAGE_LOAD = Gauge(
+    "decreto_last_run_page_load_seconds", "Tempo médio de carga de página na última execução", registry=REGISTRY
+)
+BROWSER_RSS = Gauge(
+    "decreto_browser_rss_bytes", "Memória residente dos navegadores abertos ao fim da última execução", registry=REGISTRY
+)
+BROWSERS_OPEN = Gauge("decreto_browsers_open", "Navegadores abertos ao fim da última execução", registry=REGISTRY)
+
+
+@contextmanager
+def timed(stage: str, term: str = ""):
+    """Mede o bloco em decreto_stage_seconds (também quando ele levanta exceção)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage, term).observe(time.perf_counter() - start)
+
+
+def stage_totals(stage: str):
+    """(quantidade, soma dos segundos) da etapa em todos os termos, desde o início do processo"""
+    count = total = 0.0
+    for metric in STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.labels.get("stage") != stage:
+                continue
+            if sample.name.endswith("_count"):
+                count += sample.value
+            elif sample.name.endswith("_sum"):
+                total += sample.value
+    return count, total
+
+
+def record_dates(term: str, candidates: int, new: int):
+    """Conta as datas candidatas de um termo: novas e já vistas"""
+    DATES.labels(term, "new").inc(new)
+    DATES.labels(term, "seen").inc(candidates - new)
+
+
+def record_run(duration: float, failed_terms: int):
+    """Registra o fim de uma execução e grava o arquivo do textfile collector, se configurado"""
+    RUN_SECONDS.set(duration)
+    RUN_TIMESTAMP.set(time.time())
+    RUN_FAILED_TERMS.set(failed_terms)
+    if METRICS_TEXTFILE:
+        try:
+            # write_to_textfile grava em arquivo temporário e renomeia: o coletor nunca lê um arquivo pela metade
+            write_to_textfile(METRICS_TEXTFILE, REGISTRY)
+        except OSError as e:
+            logger.error(f"Erro ao gravar métricas em {METRICS_TEXTFILE}: {e}")
+
+
+def start_metrics_server(port: int = METRICS_PORT, addr: str = METRICS_ADDR) -> bool:
+    """Sobe o endpoint /metrics em uma thread (processos de longa duração, como o scheduler)"""
+    if port <= 0:
+        return False
+    start_http_server(port, addr=addr, registry=REGISTRY)
+    logger.info(f"Métricas disponíveis em http://{addr}:{port}/metrics")
+    return True
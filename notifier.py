@@ -0,0 +1,344 @@
+"""
+Despacho das notificações por e-mail
+Mantém uma única sessão SMTP autenticada por execução (em vez de um handshake
+STARTTLS + login por termo), reenvia com backoff em falhas temporárias e grava
+cada envio em notifications_log em lote. Opcionalmente, junta todos os termos
+da execução em um único e-mail de resumo (EMAIL_DIGEST=true). Os destinatários
+de cada termo vêm das assinaturas (subscriptions.py); no resumo, cada grupo de
+destinatários recebe só os termos que assina.
+"""
+
+import html
+import logging
+import os
+import smtplib
+import time
+from datetime import date, datetime
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import db
+import metrics
+from subscriptions import get_subscriptions
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+# Um único e-mail com todos os termos da execução, em vez de um por termo
+EMAIL_DIGEST = os.getenv("EMAIL_DIGEST", "false").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+# Tentativas por mensagem e espera base entre elas (dobra a cada tentativa), em segundos
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+SMTP_RETRY_BACKOFF = float(os.getenv("SMTP_RETRY_BACKOFF", "2"))
+# Registrar os envios em notifications_log
+NOTIFICATIONS_LOG = os.getenv("NOTIFICATIONS_LOG", "true").lower() == "true"
+
+
+def _format_dates(new_dates: List[date], titles: Optional[Dict[date, str]]) -> str:
+    titles = titles or {}
+    return "<br>".join(
+        f"• {d.strftime('%d/%m/%Y')}" + (f" — {html.escape(titles[d])}" if titles.get(d) else "")
+        for d in new_dates
+    )
+
+
+def _recipients(search_term: Optional[str] = None) -> List[str]:
+    return get_subscriptions().recipients(search_term)
+
+
+def group_by_recipients(search_terms: List[str]) -> Dict[Tuple[str, ...], List[str]]:
+    """
+    Agrupa os termos por conjunto de destinatários: {(destinatários): [termos]}
+
+    Destinatários que assinam exatamente os mesmos termos recebem o mesmo e-mail.
+    """
+    terms_by_recipient: Dict[str, List[str]] = {}
+    for term in search_terms:
+        for recipient in _recipients(term):
+            terms_by_recipient.setdefault(recipient, []).append(term)
+    recipients_by_terms: Dict[Tuple[str, ...], List[str]] = {}
+    for recipient, terms in terms_by_recipient.items():
+        recipients_by_terms.setdefault(tuple(terms), []).append(recipient)
+    return {tuple(recipients): list(terms) for terms, recipients in recipients_by_terms.items()}
+
+
+def build_email_message(new_dates: List[date], search_term: str,
+                        titles: Optional[Dict[date, str]] = None,
+                        recipients: Optional[List[str]] = None) -> EmailMessage:
+    """
+    Monta o email de alerta com as novas publicações de um termo.
+    Quando disponível, o título da publicação acompanha a data.
+    Sem `recipients`, os destinatários vêm das assinaturas do termo.
+    """
+    email_user = os.getenv("EMAIL_USER")
+    email_recipients = recipients if recipients is not None else _recipients(search_term)
+
+    dates_html = _format_dates(new_dates, titles)
+
+    msg = EmailMessage()
+    msg["Subject"] = f"ALERTA: Novas publicações encontradas para '{search_term}'"
+    msg["From"] = email_user
+    msg["To"] = ", ".join(email_recipients)
+
+    corpo_email = f"""
+    <html>
+    <body>
+        <p>Prezados,</p>
+        <p>Foram encontradas <b>{len(new_dates)}</b> nova(s) publicação(ões) no DOERJ para o termo:</p>
+        <p><b>{search_term}</b></p>
+        <p>{dates_html}</p>
+        <br>
+        <p><em>Gerado automaticamente em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</em></p>
+    </body>
+    </html>
+    """
+
+    msg.set_content(corpo_email, subtype="html")
+    return msg
+
+
+def build_digest_message(new_by_term: Dict[str, List[date]],
+                         titles_by_term: Optional[Dict[str, Dict[date, str]]] = None,
+                         recipients: Optional[List[str]] = None) -> EmailMessage:
+    """Monta um único e-mail com as novas publicações de todos os termos da execução (ou do grupo de destinatários)"""
+    email_user = os.getenv("EMAIL_USER")
+    email_recipients = recipients if recipients is not None else _recipients()
+    titles_by_term = titles_by_term or {}
+    total = sum(len(dates) for dates in new_by_term.values())
+
+    sections = "".join(
+        f"<p><b>{html.escape(term)}</b><br>{_format_dates(dates, titles_by_term.get(term))}</p>"
+        for term, dates in new_by_term.items()
+    )
+
+    msg = EmailMessage()
+    msg["Subject"] = f"ALERTA: {total} nova(s) publicação(ões) em {len(new_by_term)} termo(s)"
+    msg["From"] = email_user
+    msg["To"] = ", ".join(email_recipients)
+
+    corpo_email = f"""
+    <html>
+    <body>
+        <p>Prezados,</p>
+        <p>Foram encontradas <b>{total}</b> nova(s) publicação(ões) no DOERJ para os termos abaixo:</p>
+        {sections}
+        <br>
+        <p><em>Gerado automaticamente em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</em></p>
+    </body>
+    </html>
+    """
+
+    msg.set_content(corpo_email, subtype="html")
+    return msg
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Falhas de conexão e respostas 4xx do servidor valem nova tentativa; 5xx não
+
+    SMTPException herda de OSError: os erros SMTP são classificados antes, e
+    só a queda da conexão (ou um OSError de rede) conta como falha passageira.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # Nova tentativa só se todos os destinatários foram recusados com 4xx
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+class NotificationDispatcher:
+    """
+    Envia os e-mails de uma execução por uma única sessão SMTP
+
+    A conexão é aberta no primeiro envio e reaproveitada até close(). Com
+    digest=True, notify() só acumula as datas e o e-mail de resumo é enviado
+    em flush(). Use como gerenciador de contexto:
+
+        with NotificationDispatcher() as notifier:
+            notifier.notify(new_dates, term, titles)
+        failed_terms = notifier.failed_terms
+
+    Args:
+        digest: Junta todos os termos em um único e-mail
+        max_retries: Tentativas por mensagem
+        backoff: Espera base entre tentativas, em segundos (dobra a cada tentativa)
+        log_to_db: Grava os envios em notifications_log
+    """
+
+    def __init__(self, digest: bool = EMAIL_DIGEST, max_retries: int = SMTP_MAX_RETRIES,
+                 backoff: float = SMTP_RETRY_BACKOFF, log_to_db: bool = NOTIFICATIONS_LOG):
+        self.digest = digest
+        self.max_retries = max(1, max_retries)
+        self.backoff = backoff
+        self.log_to_db = log_to_db
+        self.failed_terms: List[str] = []
+        self._server: Optional[smtplib.SMTP] = None
+        self._pending: Dict[str, Tuple[List[date], Optional[Dict[date, str]]]] = {}
+        self._log_entries: List[tuple] = []
+
+    # ---------------------------------------------------------------- SMTP
+
+    def _connect(self):
+        host = os.getenv("SMTP_HOST", "smtp.gmail.com")
+        port = int(os.getenv("SMTP_PORT", "587"))
+        email_user = os.getenv("EMAIL_USER")
+        email_password = os.getenv("EMAIL_PASSWORD")
+
+        server = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if email_user and email_password:
+                server.login(email_user, email_password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        logger.info(f"Sessão SMTP aberta em {host}:{port}")
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+
+    def _send(self, msg: EmailMessage):
+        """Envia pela sessão aberta, reconectando e tentando de novo em falhas temporárias"""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.send_message(msg)
+                return
+            except Exception as e:
+                self._disconnect()
+                if attempt == self.max_retries or not _is_transient(e):
+                    raise
+                metrics.RETRIES.labels("smtp").inc()
+                if isinstance(e, TimeoutError):
+                    metrics.TIMEOUTS.labels("smtp").inc()
+                wait = self.backoff * 2 ** (attempt - 1)
+                logger.warning(
+                    f"Falha no envio do e-mail (tentativa {attempt}/{self.max_retries}): {e}; "
+                    f"nova tentativa em {wait:.1f}s"
+                )
+                time.sleep(wait)
+
+    # ---------------------------------------------------------------- envio
+
+    def notify(self, new_dates: List[date], search_term: str, titles: Optional[Dict[date, str]] = None,
+               message_id: Optional[str] = None):
+        """
+        Notifica as novas datas de um termo
+
+        No modo resumo, apenas acumula. Fora dele, envia na hora e levanta a
+        exceção se o envio falhar (após as novas tentativas).
+
+        Args:
+            message_id: Message-ID fixo (ex.: derivado da outbox), para que um
+                reenvio após queda seja reconhecido como duplicata pelo servidor de e-mail
+        """
+        if not new_dates:
+            return
+        if self.digest:
+            self._pending[search_term] = (list(new_dates), titles)
+            return
+
+        msg = build_email_message(new_dates, search_term, titles)
+        if message_id:
+            msg["Message-ID"] = message_id
+        try:
+            with metrics.timed("smtp", search_term):
+                self._send(msg)
+        except Exception as e:
+            logger.error(f"Erro ao enviar email: {e}")
+            self._record({search_term: new_dates}, "failed", str(e))
+            self.failed_terms.append(search_term)
+            raise
+        self._record({search_term: new_dates}, "sent")
+        logger.info(f"E-mail enviado ({search_term}) para {len(_recipients(search_term))} destinatários")
+
+    def flush(self) -> List[str]:
+        """
+        Envia os e-mails de resumo com os termos acumulados (modo resumo)
+
+        Um e-mail por grupo de destinatários que assinam os mesmos termos (um
+        único e-mail quando todos recebem tudo, como com EMAIL_RECIPIENTS).
+
+        Returns:
+            Lista dos termos que não foram notificados (a algum dos grupos)
+        """
+        if not self._pending:
+            return []
+        pending, self._pending = self._pending, {}
+        failed: List[str] = []
+
+        for recipients, terms in group_by_recipients(list(pending)).items():
+            new_by_term = {term: pending[term][0] for term in terms}
+            titles_by_term = {term: pending[term][1] for term in terms if pending[term][1]}
+            try:
+                with metrics.timed("smtp"):
+                    self._send(build_digest_message(new_by_term, titles_by_term, list(recipients)))
+            except Exception as e:
+                logger.error(f"Erro ao enviar o e-mail de resumo: {e}")
+                self._record(new_by_term, "failed", str(e), recipients)
+                failed.extend(term for term in terms if term not in failed)
+                continue
+            self._record(new_by_term, "sent", recipients=recipients)
+            logger.info(f"E-mail de resumo enviado ({len(new_by_term)} termos) para {len(recipients)} destinatários")
+
+        self.failed_terms.extend(failed)
+        return failed
+
+    # ---------------------------------------------------------------- log
+
+    def _record(self, new_by_term: Dict[str, List[date]], status: str, error_message: Optional[str] = None,
+                recipients: Optional[Tuple[str, ...]] = None):
+        for term, dates in new_by_term.items():
+            email_to = ", ".join(recipients if recipients is not None else _recipients(term))
+            self._log_entries.extend((d, term, email_to, status, error_message) for d in dates)
+
+    def write_log(self, conn=None):
+        """Grava em notifications_log, em um único comando, os envios ainda não registrados"""
+        if not self._log_entries:
+            return
+        entries, self._log_entries = self._log_entries, []
+        try:
+            if conn is None:
+                with db.connection() as pooled_conn:
+                    db.log_notifications(pooled_conn, entries)
+            else:
+                db.log_notifications(conn, entries)
+        except Exception as e:
+            # O e-mail já foi enviado: a falha no registro não deve derrubar a execução
+            logger.error(f"Erro ao registrar {len(entries)} envio(s) em notifications_log: {e}")
+
+    def close(self):
+        """Envia o resumo pendente, encerra a sessão SMTP e grava o registro dos envios"""
+        try:
+            self.flush()
+        finally:
+            self._disconnect()
+            if self.log_to_db:
+                self.write_log()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
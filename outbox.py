@@ -0,0 +1,249 @@
+"""
+Worker da fila de notificações (outbox)
+Com NOTIFY_MODE=outbox, o scraper só grava as datas novas e as enfileira em
+notification_outbox na mesma transação; este worker drena a fila e envia os
+e-mails, fora do caminho da coleta. Vários workers podem rodar ao mesmo tempo:
+cada lote é reservado com SELECT ... FOR UPDATE SKIP LOCKED.
+
+Garantia de entrega: o SMTP não participa da transação do banco, então não há
+entrega exatamente uma vez. Antes do envio, o lote é marcado com sending_at (e a
+marca é gravada); depois, com sent_at. Se o worker cair entre o envio e essa
+segunda gravação, as linhas ficam com sending_at e sem sent_at: não são
+reenviadas sozinhas (no máximo uma vez), e sim sinalizadas em last_error após
+OUTBOX_SENDING_TIMEOUT, para conferência. Com --requeue-interrupted, voltam para
+a fila e são reenviadas com o mesmo Message-ID (pelo menos uma vez, com o
+servidor de e-mail podendo descartar a duplicata).
+
+Uso:
+    python outbox.py            # roda continuamente, consultando a fila a cada OUTBOX_POLL_SECONDS
+    python outbox.py --once     # drena a fila uma vez e sai (ex.: cron logo após o scraper)
+    python outbox.py --requeue-interrupted --once   # reenvia os envios interrompidos e drena a fila
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+import db
+from notifier import NotificationDispatcher
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "30"))
+# Após esse número de tentativas a notificação fica na fila, sem novos envios, para análise
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# Espera base antes de uma nova tentativa, em segundos (dobra a cada falha)
+OUTBOX_RETRY_SECONDS = float(os.getenv("OUTBOX_RETRY_SECONDS", "60"))
+# Envio iniciado há mais que isso (segundos) sem confirmação é considerado interrompido
+OUTBOX_SENDING_TIMEOUT = float(os.getenv("OUTBOX_SENDING_TIMEOUT", "600"))
+
+INTERRUPTED_ERROR = "envio interrompido: conferir se o e-mail chegou (python outbox.py --requeue-interrupted)"
+
+# Reserva um lote de notificações pendentes; linhas já reservadas por outro worker são puladas
+CLAIM_OUTBOX_SQL = """
+    SELECT o.id, o.publication_date, o.search_term, p.raw_title
+    FROM notification_outbox o
+    JOIN decree_publications p USING (publication_date, search_term)
+    WHERE o.sent_at IS NULL
+      AND o.sending_at IS NULL
+      AND o.next_attempt_at <= NOW()
+      AND o.attempts < %s
+    ORDER BY o.id
+    LIMIT %s
+    FOR UPDATE OF o SKIP LOCKED
+"""
+
+# Registra o início do envio, gravado antes de falar com o servidor SMTP
+MARK_SENDING_SQL = """
+    UPDATE notification_outbox
+    SET sending_at = NOW()
+    WHERE id = ANY(%s)
+"""
+
+MARK_SENT_SQL = """
+    UPDATE notification_outbox
+    SET sent_at = NOW(), sending_at = NULL, attempts = attempts + 1, last_error = NULL
+    WHERE id = ANY(%s)
+"""
+
+MARK_FAILED_SQL = """
+    UPDATE notification_outbox
+    SET attempts = attempts + 1,
+        sending_at = NULL,
+        last_error = %s,
+        next_attempt_at = NOW() + make_interval(secs => %s * power(2, attempts))
+    WHERE id = ANY(%s)
+"""
+
+# Envios iniciados e nunca confirmados (worker caiu entre o SMTP e o registro)
+FLAG_INTERRUPTED_SQL = """
+    UPDATE notification_outbox
+    SET last_error = %s
+    WHERE sent_at IS NULL
+      AND sending_at < NOW() - make_interval(secs => %s)
+      AND last_error IS DISTINCT FROM %s
+    RETURNING id
+"""
+
+REQUEUE_INTERRUPTED_SQL = """
+    UPDATE notification_outbox
+    SET sending_at = NULL, next_attempt_at = NOW()
+    WHERE sent_at IS NULL
+      AND sending_at < NOW() - make_interval(secs => %s)
+    RETURNING id
+"""
+
+
+def outbox_message_id(ids: List[int]) -> str:
+    """Message-ID estável para o conjunto de linhas da outbox (o reenvio repete o mesmo ID)"""
+    digest = hashlib.sha256(",".join(map(str, sorted(ids))).encode("ascii")).hexdigest()[:24]
+    return f"<outbox-{digest}@busca-diario-oficial>"
+
+
+def drain_outbox(conn, notifier: NotificationDispatcher, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Reserva um lote da fila, envia os e-mails e marca cada linha como enviada ou falha
+
+    A reserva grava sending_at antes do envio. Se o processo cair depois do
+    envio e antes de marcar as linhas, elas não voltam sozinhas para a fila
+    (ver flag_interrupted e requeue_interrupted).
+
+    Returns:
+        Número de notificações processadas no lote
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CLAIM_OUTBOX_SQL, (OUTBOX_MAX_ATTEMPTS, batch_size), prepare=db.DB_PREPARE)
+            rows = cur.fetchall()
+            if rows:
+                cur.execute(MARK_SENDING_SQL, ([row[0] for row in rows],))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if not rows:
+        return 0
+
+    by_term: Dict[str, List[tuple]] = {}
+    for row in rows:
+        by_term.setdefault(row[2], []).append(row)
+
+    failed: Dict[str, str] = {}
+    for term, items in by_term.items():
+        items.sort(key=lambda row: row[1], reverse=True)
+        dates = [row[1] for row in items]
+        titles = {row[1]: row[3] for row in items if row[3]}
+        try:
+            notifier.notify(dates, term, titles, message_id=outbox_message_id([row[0] for row in items]))
+        except Exception as e:
+            failed[term] = str(e)
+    for term in notifier.flush():
+        failed.setdefault(term, "falha no e-mail de resumo")
+
+    try:
+        sent_ids = [row[0] for term, items in by_term.items() if term not in failed for row in items]
+        with conn.cursor() as cur:
+            if sent_ids:
+                cur.execute(MARK_SENT_SQL, (sent_ids,))
+            for term, error in failed.items():
+                cur.execute(MARK_FAILED_SQL, (error, OUTBOX_RETRY_SECONDS, [row[0] for row in by_term[term]]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"Outbox: {len(sent_ids)} notificação(ões) enviada(s), {len(rows) - len(sent_ids)} com falha")
+    return len(rows)
+
+
+def flag_interrupted(conn, timeout: float = OUTBOX_SENDING_TIMEOUT) -> List[int]:
+    """Sinaliza em last_error os envios iniciados há mais de `timeout` segundos e nunca confirmados"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(FLAG_INTERRUPTED_SQL, (INTERRUPTED_ERROR, timeout, INTERRUPTED_ERROR))
+            ids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if ids:
+        logger.warning(f"Outbox: {len(ids)} envio(s) interrompido(s), não reenviado(s): ids {ids}")
+    return ids
+
+
+def requeue_interrupted(conn, timeout: float = OUTBOX_SENDING_TIMEOUT) -> List[int]:
+    """Devolve à fila os envios interrompidos (reenviados com o mesmo Message-ID)"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(REQUEUE_INTERRUPTED_SQL, (timeout,))
+            ids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logger.info(f"Outbox: {len(ids)} envio(s) interrompido(s) de volta à fila")
+    return ids
+
+
+def run_once(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Drena a fila até esvaziá-la (ou só restarem linhas aguardando nova tentativa)"""
+    total = 0
+    with db.connection() as conn:
+        flag_interrupted(conn)
+    with NotificationDispatcher(log_to_db=False) as notifier:
+        while True:
+            with db.connection() as conn:
+                processed = drain_outbox(conn, notifier, batch_size)
+            total += processed
+            if processed < batch_size:
+                break
+        # Registro dos envios em notifications_log, fora da transação da fila
+        notifier.write_log()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="drena a fila uma vez e sai")
+    parser.add_argument("--requeue-interrupted", action="store_true",
+                        help="devolve à fila os envios interrompidos (podem chegar em dobro)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+
+    if args.requeue_interrupted:
+        with db.connection() as conn:
+            requeue_interrupted(conn)
+    if args.once:
+        run_once()
+        return
+
+    logger.info(f"Worker da outbox iniciado (consulta a cada {OUTBOX_POLL_SECONDS:.0f}s)")
+    try:
+        while True:
+            try:
+                run_once()
+            except Exception as e:
+                logger.error(f"Erro ao drenar a outbox: {e}")
+            time.sleep(OUTBOX_POLL_SECONDS)
+    finally:
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Arquivo das páginas de resultados baixadas (substitui o last_page.html)
+Guarda todas as páginas lidas, por termo e por execução, comprimidas (gzip) e
+endereçadas pelo conteúdo (SHA-256): uma página idêntica à de outra execução
+ou de outro termo é gravada uma vez só. O endereço é calculado com os tokens de
+sessão dos links mascarados (session=...), que mudam a cada busca; o arquivo
+guarda a página como foi baixada na primeira vez. A compressão e a gravação acontecem em
+uma thread de fundo, fora do caminho da coleta, e a retenção é limitada por
+número de execuções e por tamanho.
+
+Estrutura em PAGE_ARCHIVE_DIR:
+    objects/ab/abcdef....html.gz    páginas, pelo SHA-256 do conteúdo (sem os tokens de sessão)
+    runs/<execução>.jsonl           uma linha por página lida: termo, página, sha256, horário
+
+Uso:
+    python page_archive.py list
+    python page_archive.py export latest paginas/            # páginas da última execução, em HTML
+    python page_archive.py export 20251028-092000-4242 paginas/ --term 46930
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from results_parser import mask_session_params
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+PAGE_ARCHIVE = os.getenv("PAGE_ARCHIVE", "true").lower() == "true"
+PAGE_ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", "page_archive")
+# Retenção: execuções mantidas e tamanho máximo das páginas guardadas (o que vier primeiro)
+PAGE_ARCHIVE_MAX_RUNS = int(os.getenv("PAGE_ARCHIVE_MAX_RUNS", "30"))
+PAGE_ARCHIVE_MAX_MB = int(os.getenv("PAGE_ARCHIVE_MAX_MB", "200"))
+# Páginas aguardando gravação; com a fila cheia, a página é descartada (a coleta nunca espera)
+PAGE_ARCHIVE_QUEUE = int(os.getenv("PAGE_ARCHIVE_QUEUE", "256"))
+# Espera máxima, ao fim da execução, para a fila ser gravada
+PAGE_ARCHIVE_FLUSH_TIMEOUT = float(os.getenv("PAGE_ARCHIVE_FLUSH_TIMEOUT", "10"))
+
+# Páginas gravadas há menos tempo que isso nunca são removidas (podem ser de uma
+# execução em andamento em outro processo, ainda fora do manifesto)
+GRACE_SECONDS = 3600
+
+
+def new_run_id(now: Optional[datetime] = None) -> str:
+    """Identificador da execução: ordena cronologicamente e não colide entre processos"""
+    return f"{(now or datetime.now()):%Y%m%d-%H%M%S}-{os.getpid()}"
+
+
+class PageArchive:
+    """
+    Arquivo de páginas com gravação em segundo plano
+
+    Args:
+        root: Diretório do arquivo
+        max_runs: Execuções mantidas
+        max_bytes: Tamanho máximo das páginas comprimidas
+        queue_size: Páginas aguardando gravação
+    """
+
+    def __init__(self, root: str, max_runs: int = 30, max_bytes: int = 200 * 2**20, queue_size: int = 256):
+        self.root = root
+        self._objects_dir = os.path.join(root, "objects")
+        self._runs_dir = os.path.join(root, "runs")
+        self._max_runs = max_runs
+        self._max_bytes = max_bytes
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.run_id: Optional[str] = None
+        self.saved = 0
+        self.deduplicated = 0
+        self.dropped = 0
+
+    # Caminho da coleta -------------------------------------------------
+
+    def begin_run(self, run_id: Optional[str] = None) -> str:
+        """Inicia uma execução: as páginas seguintes vão para o manifesto dela"""
+        with self._lock:
+            self.run_id = run_id or new_run_id()
+            return self.run_id
+
+    def save(self, search_term: str, page_number: int, page_html: str):
+        """Enfileira uma página para gravação (não bloqueia; descarta se a fila estiver cheia)"""
+        with self._lock:
+            if self.run_id is None:
+                self.run_id = new_run_id()
+            run_id = self.run_id
+            self._ensure_writer()
+        try:
+            self._queue.put_nowait(("page", run_id, search_term, page_number, page_html, time.time()))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Arquivo de páginas: fila cheia, página {page_number} de '{search_term}' descartada")
+
+    def end_run(self, timeout: float = 10.0) -> bool:
+        """
+        Encerra a execução: aplica a retenção e espera a fila ser gravada (até `timeout`)
+
+        Returns:
+            True se tudo foi gravado dentro do prazo
+        """
+        with self._lock:
+            if self._thread is None:
+                return True
+            self.run_id = None
+        self._queue.put(("prune",))
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Arquivo de páginas: {self._queue.unfinished_tasks} tarefa(s) ainda na fila")
+                return False
+            time.sleep(0.01)
+        if self.saved or self.deduplicated or self.dropped:
+            logger.info(
+                f"Arquivo de páginas: {self.saved} página(s) gravada(s), {self.deduplicated} repetida(s), "
+                f"{self.dropped} descartada(s)"
+            )
+        self.saved = self.deduplicated = self.dropped = 0
+        return True
+
+    # Thread de gravação ------------------------------------------------
+
+    def _ensure_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer, name="arquivo-paginas", daemon=True)
+            self._thread.start()
+
+    def _writer(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task[0] == "page":
+                    self._write_page(*task[1:])
+                else:
+                    self.prune()
+            except Exception as e:
+                logger.error(f"Arquivo de páginas: falha na gravação: {e}")
+            finally:
+                self._queue.task_done()
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self._objects_dir, sha256[:2], f"{sha256}.html.gz")
+
+    def _write_page(self, run_id: str, search_term: str, page_number: int, page_html: str, fetched_at: float):
+        data = page_html.encode("utf-8")
+        sha256 = hashlib.sha256(mask_session_params(page_html).encode("utf-8")).hexdigest()
+        path = self.object_path(sha256)
+        if os.path.exists(path):
+            # Renova a data para a página não ser removida como órfã antes de entrar no manifesto
+            os.utime(path)
+            self.deduplicated += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                # mtime=0: a mesma página gera sempre o mesmo arquivo
+                with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6, mtime=0) as gz:
+                    gz.write(data)
+            os.replace(tmp_path, path)
+            self.saved += 1
+
+        os.makedirs(self._runs_dir, exist_ok=True)
+        entry = {
+            "term": search_term,
+            "page": page_number,
+            "sha256": sha256,
+            "fetched_at": datetime.fromtimestamp(fetched_at).isoformat(timespec="seconds"),
+        }
+        with open(os.path.join(self._runs_dir, f"{run_id}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    # Retenção ----------------------------------------------------------
+
+    def runs(self) -> List[str]:
+        """Execuções guardadas, da mais antiga para a mais recente"""
+        if not os.path.isdir(self._runs_dir):
+            return []
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self._runs_dir) if name.endswith(".jsonl"))
+
+    def _objects(self) -> Dict[str, os.stat_result]:
+        objects = {}
+        if not os.path.isdir(self._objects_dir):
+            return objects
+        for prefix in os.listdir(self._objects_dir):
+            directory = os.path.join(self._objects_dir, prefix)
+            for name in os.listdir(directory):
+                if name.endswith(".html.gz"):
+                    objects[name[:-len(".html.gz")]] = os.stat(os.path.join(directory, name))
+        return objects
+
+    def _referenced(self, runs: List[str]) -> Set[str]:
+        return {entry["sha256"] for run_id in runs for entry in self.entries(run_id)}
+
+    def prune(self):
+        """Remove as execuções mais antigas além de max_runs ou de max_bytes, e as páginas órfãs"""
+        runs = self.runs()
+        removed_runs = runs[:-self._max_runs] if self._max_runs > 0 else []
+        kept = runs[len(removed_runs):]
+        objects = self._objects()
+
+        referenced = self._referenced(kept)
+        # Tamanho: descarta execuções antigas até as páginas que elas usam caberem no limite
+        while len(kept) > 1 and sum(objects[s].st_size for s in referenced if s in objects) > self._max_bytes:
+            removed_runs.append(kept.pop(0))
+            referenced = self._referenced(kept)
+
+        for run_id in removed_runs:
+            try:
+                os.remove(os.path.join(self._runs_dir, f"{run_id}.jsonl"))
+            except FileNotFoundError:
+                pass
+
+        cutoff = time.time() - GRACE_SECONDS
+        removed_objects = 0
+        for sha256, stat in objects.items():
+            if sha256 not in referenced and stat.st_mtime < cutoff:
+                try:
+                    os.remove(self.object_path(sha256))
+                    removed_objects += 1
+                except FileNotFoundError:
+                    pass
+        if removed_runs or removed_objects:
+            logger.info(
+                f"Arquivo de páginas: {len(removed_runs)} execução(ões) e {removed_objects} página(s) removida(s)"
+            )
+
+    # Leitura (depuração e benchmarks) ----------------------------------
+
+    def entries(self, run_id: str) -> List[dict]:
+        """Linhas do manifesto de uma execução (termo, página, sha256, horário)"""
+        path = os.path.join(self._runs_dir, f"{run_id}.jsonl")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def load(self, sha256: str) -> str:
+        """HTML de uma página guardada"""
+        with gzip.open(self.object_path(sha256), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def iter_pages(self, run_id: str, search_term: Optional[str] = None) -> Iterator[dict]:
+        """Páginas de uma execução (opcionalmente de um termo), com o HTML em "html" """
+        for entry in self.entries(run_id):
+            if search_term is None or entry["term"] == search_term:
+                yield dict(entry, html=self.load(entry["sha256"]))
+
+
+class _NoArchive:
+    """Substituto usado quando PAGE_ARCHIVE=false: nenhuma página é guardada"""
+
+    def begin_run(self, run_id=None):
+        return run_id
+
+    def save(self, search_term, page_number, page_html):
+        pass
+
+    def end_run(self, timeout=10.0):
+        return True
+
+
+_archive = None
+
+
+def get_page_archive():
+    """Retorna o arquivo do processo (compartilhado entre execuções do scheduler)"""
+    global _archive
+    if _archive is None:
+        if PAGE_ARCHIVE:
+            _archive = PageArchive(
+                PAGE_ARCHIVE_DIR, PAGE_ARCHIVE_MAX_RUNS, PAGE_ARCHIVE_MAX_MB * 2**20, PAGE_ARCHIVE_QUEUE
+            )
+        else:
+            _archive = _NoArchive()
+    return _archive
+
+
+def export_pages(archive: PageArchive, run_id: str, target_dir: str, search_term: Optional[str] = None) -> List[str]:
+    """Grava as páginas de uma execução como <termo>_p<N>.html (para test/bench_*.py --pages)"""
+    os.makedirs(target_dir, exist_ok=True)
+    paths = []
+    for page in archive.iter_pages(run_id, search_term):
+        safe_term = "".join(c if c.isalnum() else "_" for c in page["term"])
+        path = os.path.join(target_dir, f"{safe_term}_p{page['page']}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page["html"])
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=PAGE_ARCHIVE_DIR, help="diretório do arquivo")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="lista as execuções guardadas")
+    export = commands.add_parser("export", help="grava as páginas de uma execução como HTML")
+    export.add_argument("run", help="execução (ou latest)")
+    export.add_argument("target", help="diretório de destino")
+    export.add_argument("--term", help="só as páginas deste termo")
+    args = parser.parse_args()
+
+    archive = PageArchive(args.dir)
+    runs = archive.runs()
+    if args.command == "list":
+        for run_id in runs:
+            entries = archive.entries(run_id)
+            print(f"{run_id}\t{len({e['term'] for e in entries})} termo(s)\t{len(entries)} página(s)")
+        return
+
+    run_id = runs[-1] if args.run == "latest" and runs else args.run
+    paths = export_pages(archive, run_id, args.target, args.term)
+    if not paths:
+        print(f"Nenhuma página na execução {run_id!r}", file=sys.stderr)
+        sys.exit(1)
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
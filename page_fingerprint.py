@@ -0,0 +1,179 @@
+"""
+Impressão digital da tabela de resultados de cada termo
+Quando a página de resultados não mudou desde a última execução, o termo pula
+normalização, banco e e-mail. Quando mudou, só as linhas novas são analisadas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+PAGE_FINGERPRINT = os.getenv("PAGE_FINGERPRINT", "true").lower() == "true"
+# Arquivo JSON com a última impressão digital de cada termo (vazio = apenas em memória)
+PAGE_FINGERPRINT_FILE = os.getenv("PAGE_FINGERPRINT_FILE", "page_fingerprints.json")
+
+TBODY_PATTERN = re.compile(r"<tbody\b[^>]*>(.*?)</tbody>", re.IGNORECASE | re.DOTALL)
+ROW_PATTERN = re.compile(r"<tr\b.*?</tr>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+
+
+def extract_result_rows(page_html: str) -> List[str]:
+    """Retorna o HTML de cada linha (tr) dentro dos tbody da página"""
+    rows = []
+    for tbody in TBODY_PATTERN.findall(page_html):
+        rows.extend(ROW_PATTERN.findall(tbody))
+    return rows
+
+
+def row_key(row_html: str) -> str:
+    """
+    Identificador curto de uma linha, baseado só no texto visível
+
+    Atributos (ex.: tokens de sessão nos links) não entram no cálculo.
+    """
+    text = SPACE_PATTERN.sub(" ", TAG_PATTERN.sub(" ", row_html)).strip()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class PageFingerprintStore:
+    """
+    Guarda, por termo, o resumo da tabela de resultados da última execução
+
+    A nova impressão digital só é gravada após confirm(), para que uma falha
+    no banco ou no e-mail faça o termo ser reprocessado na próxima execução.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, dict] = {}
+        self._pending: Dict[str, dict] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load_file()
+
+    def _load_file(self):
+        if not self._path or not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                self._fingerprints = json.load(f)
+        except Exception as e:
+            logger.warning(f"Impressões digitais inválidas em {self._path} ({e}); ignorando")
+            self._fingerprints = {}
+
+    def check(self, search_term: str, page_html: str) -> Optional[str]:
+        """
+        Compara a página com a execução anterior do termo
+
+        Returns:
+            None se a tabela de resultados não mudou; caso contrário, o HTML a
+            ser analisado (só as linhas novas, ou a página inteira se não houver
+            referência anterior)
+        """
+        return self.compare(search_term, page_html)[0]
+
+    def compare(self, search_term: str, page_html: str) -> Tuple[Optional[str], bool]:
+        """
+        Como check(), informando também se alguma linha já vista está na página
+
+        Returns:
+            (HTML a ser analisado ou None, True se a página contém linhas da
+            execução anterior). Sem linhas já vistas, tudo na página é novo e as
+            páginas seguintes podem ter mais novidades.
+        """
+        rows = extract_result_rows(page_html)
+        if not rows:
+            return page_html, False
+
+        keys = [row_key(row) for row in rows]
+        digest = hashlib.sha256("".join(keys).encode("ascii")).hexdigest()
+
+        with self._lock:
+            previous = self._fingerprints.get(search_term)
+            self._pending[search_term] = {"digest": digest, "rows": keys}
+
+            if previous and previous["digest"] == digest:
+                self.hits += 1
+                return None, True
+            self.misses += 1
+
+        if not previous:
+            return page_html, False
+
+        seen = set(previous["rows"])
+        new_rows = [row for row, key in zip(rows, keys) if key not in seen]
+        logger.info(f"Termo '{search_term}': {len(new_rows)} linha(s) nova(s) na tabela de resultados")
+        if len(new_rows) == len(rows):
+            return page_html, False
+        # Mantém as linhas dentro de uma tabela para o parser de resultados
+        return "<table><tbody>\n" + "\n".join(new_rows) + "\n</tbody></table>", True
+
+    def confirm(self, search_term: str):
+        """Grava a impressão digital pendente do termo (após processá-lo com sucesso)"""
+        with self._lock:
+            pending = self._pending.pop(search_term, None)
+            if pending is not None:
+                self._fingerprints[search_term] = pending
+                self._dirty = True
+
+    def save(self):
+        """Grava as impressões digitais em disco (escrita atômica), se houver alterações"""
+        if not self._path or not self._dirty:
+            return
+        with self._lock:
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._fingerprints, f)
+            os.replace(tmp_path, self._path)
+            self._dirty = False
+
+    def log_summary(self):
+        """Registra no log quantas páginas estavam inalteradas (hits) e alteradas (misses)"""
+        logger.info(f"Páginas de resultados: {self.hits} inalterada(s), {self.misses} alterada(s)")
+        self.hits = 0
+        self.misses = 0
+
+
+class _NoFingerprint:
+    """Substituto usado quando PAGE_FINGERPRINT=false: toda página é analisada por inteiro"""
+
+    def check(self, search_term, page_html):
+        return page_html
+
+    def compare(self, search_term, page_html):
+        return page_html, False
+
+    def confirm(self, search_term):
+        pass
+
+    def save(self):
+        pass
+
+    def log_summary(self):
+        pass
+
+
+_store = None
+
+
+def get_fingerprint_store():
+    """Retorna o armazenamento do processo (compartilhado entre execuções do scheduler)"""
+    global _store
+    if _store is None:
+        _store = PageFingerprintStore(PAGE_FINGERPRINT_FILE or None) if PAGE_FINGERPRINT else _NoFingerprint()
+    return _store
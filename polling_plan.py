@@ -0,0 +1,179 @@
+"""
+Plano de consultas adaptativo por termo
+Aprende com first_seen_at em que dias da semana e horários cada termo costuma
+aparecer no DOERJ. Termos "quentes" (com histórico suficiente) são consultados
+com frequência dentro da sua janela típica; os demais seguem só os horários
+base do scheduler, que continuam valendo para todos os termos.
+"""
+
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+# Janela de histórico considerada, em dias
+ADAPTIVE_HISTORY_DAYS = int(os.getenv("ADAPTIVE_HISTORY_DAYS", "180"))
+# Publicações mínimas no histórico para o termo ganhar uma janela própria
+ADAPTIVE_MIN_EVENTS = int(os.getenv("ADAPTIVE_MIN_EVENTS", "4"))
+# Fração das publicações que os dias da semana e horas da janela devem cobrir
+ADAPTIVE_COVERAGE = float(os.getenv("ADAPTIVE_COVERAGE", "0.8"))
+# Intervalo entre consultas de um termo quente dentro da janela, em minutos
+ADAPTIVE_HOT_INTERVAL_MIN = int(os.getenv("ADAPTIVE_HOT_INTERVAL_MIN", "15"))
+
+
+class TermPlan:
+    """Janela típica de um termo: dias da semana (0=segunda) e horas cheias"""
+
+    __slots__ = ("term", "weekdays", "hours", "events")
+
+    def __init__(self, term: str, weekdays: Set[int], hours: Set[int], events: int):
+        self.term = term
+        self.weekdays = weekdays
+        self.hours = hours
+        self.events = events
+
+    @property
+    def is_hot(self) -> bool:
+        return self.events >= ADAPTIVE_MIN_EVENTS and bool(self.weekdays) and bool(self.hours)
+
+    def __repr__(self):
+        return f"TermPlan({self.term!r}, dias={sorted(self.weekdays)}, horas={sorted(self.hours)}, n={self.events})"
+
+
+def _covering(counts: Counter, coverage: float) -> Set[int]:
+    """Menor conjunto dos valores mais frequentes que cobre a fração `coverage` do total"""
+    total = sum(counts.values())
+    chosen, covered = set(), 0
+    for value, count in counts.most_common():
+        if covered >= coverage * total:
+            break
+        chosen.add(value)
+        covered += count
+    return chosen
+
+
+def build_term_plans(history: Iterable[Tuple[str, datetime]], tz: ZoneInfo,
+                     coverage: float = ADAPTIVE_COVERAGE) -> Dict[str, TermPlan]:
+    """
+    Monta a janela típica de cada termo a partir de (termo, first_seen_at)
+
+    first_seen_at é o momento em que o scraper viu a publicação, não o da
+    publicação em si: a janela reflete também os horários em que já se consulta.
+    Por isso os horários base continuam valendo para todos os termos.
+    """
+    weekdays: Dict[str, Counter] = {}
+    hours: Dict[str, Counter] = {}
+    for term, seen_at in history:
+        local = seen_at.astimezone(tz)
+        weekdays.setdefault(term, Counter())[local.weekday()] += 1
+        hours.setdefault(term, Counter())[local.hour] += 1
+
+    return {
+        term: TermPlan(term, _covering(weekdays[term], coverage), _covering(hours[term], coverage),
+                       sum(weekdays[term].values()))
+        for term in weekdays
+    }
+
+
+def load_term_plans(tz: ZoneInfo, days: int = ADAPTIVE_HISTORY_DAYS) -> Dict[str, TermPlan]:
+    """Lê o histórico do banco e monta as janelas dos termos"""
+    with db.connection() as conn:
+        history = db.fetch_publication_history(conn, days)
+    plans = build_term_plans(history, tz)
+    hot = [plan for plan in plans.values() if plan.is_hot]
+    logger.info(f"Plano adaptativo: {len(hot)} termo(s) quente(s) em {len(plans)} com histórico ({days} dias)")
+    for plan in hot:
+        logger.info(f"  {plan}")
+    return plans
+
+
+def hot_slots(hours: Set[int], interval_min: int = ADAPTIVE_HOT_INTERVAL_MIN) -> List[time]:
+    """Horários de consulta dentro das horas da janela, a cada `interval_min` minutos"""
+    step = max(1, interval_min)
+    return [time(hour, minute) for hour in sorted(hours) for minute in range(0, 60, step)]
+
+
+class PollingPlan:
+    """
+    Agenda de consultas por termo
+
+    Nos horários base, todos os termos são consultados; nos dias e horas da
+    janela de um termo quente, só ele (e os outros quentes do mesmo horário).
+
+    Args:
+        plans: Janelas por termo (build_term_plans / load_term_plans)
+        base_slots: Horários base do scheduler, válidos para todos os termos
+        is_business_day: Regra de dias úteis do scheduler
+        tz: Fuso dos horários
+        interval_min: Intervalo das consultas dentro da janela
+    """
+
+    def __init__(self, plans: Dict[str, TermPlan], base_slots: List[time],
+                 is_business_day: Callable[[date], bool], tz: ZoneInfo,
+                 interval_min: int = ADAPTIVE_HOT_INTERVAL_MIN):
+        self.base_slots = base_slots
+        self.is_business_day = is_business_day
+        self.tz = tz
+        # Por dia da semana: {horário: [termos quentes]}
+        self._hot_by_weekday: Dict[int, Dict[time, List[str]]] = {}
+        for plan in plans.values():
+            if not plan.is_hot:
+                continue
+            slots = hot_slots(plan.hours, interval_min)
+            for weekday in plan.weekdays:
+                by_slot = self._hot_by_weekday.setdefault(weekday, {})
+                for slot in slots:
+                    by_slot.setdefault(slot, []).append(plan.term)
+
+    def next_poll(self, after: datetime, terms: List[str]) -> Tuple[datetime, List[str]]:
+        """
+        Próximo horário (em dia útil) estritamente posterior a `after` e os termos a consultar nele
+
+        Args:
+            after: Momento de referência (com fuso)
+            terms: Todos os termos configurados (consultados nos horários base)
+        """
+        configured = set(terms)
+        day = after.date()
+        for _ in range(366):
+            if self.is_business_day(day):
+                due = self._due_on(day, terms, configured)
+                for slot in sorted(due):
+                    moment = datetime.combine(day, slot, tzinfo=self.tz)
+                    if moment > after:
+                        return moment, due[slot]
+            day += timedelta(days=1)
+        raise RuntimeError("Nenhum dia útil encontrado no próximo ano")
+
+    def _due_on(self, day: date, terms: List[str], configured: Set[str]) -> Dict[time, List[str]]:
+        due: Dict[time, List[str]] = {slot: list(terms) for slot in self.base_slots}
+        for slot, hot_terms in self._hot_by_weekday.get(day.weekday(), {}).items():
+            if slot in due:
+                continue
+            selected = [term for term in hot_terms if term in configured]
+            if selected:
+                due[slot] = selected
+        return due
+
+    def polls_per_week(self, terms: List[str], week_start: Optional[date] = None) -> int:
+        """Total de consultas (termo × horário) previstas para a semana, para comparação com o modo fixo"""
+        configured = set(terms)
+        week_start = week_start or date.today() - timedelta(days=date.today().weekday())
+        total = 0
+        for offset in range(7):
+            day = week_start + timedelta(days=offset)
+            if self.is_business_day(day):
+                total += sum(len(selected) for selected in self._due_on(day, terms, configured).values())
+        return total
@@ -0,0 +1,282 @@
+"""
+Índice local das linhas de resultado já baixadas do DOERJ
+Cada linha da tabela de resultados (data, título, seção e link) é gravada uma
+única vez em result_index, com o texto normalizado indexado (tsvector). Assim:
+
+- uma linha nova encontrada pela busca de um termo é casada, em uma única
+  passada (Aho-Corasick), com todos os termos monitorados;
+- os termos são respondidos primeiro com os dados locais (uma consulta para
+  todos), antes da busca no site.
+
+A busca no site continua: o índice só conhece as linhas que alguma busca já
+trouxe, e o DOERJ procura o termo no texto inteiro do ato, não só no título.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+import db
+from results_parser import Publication
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+LOCAL_INDEX = os.getenv("LOCAL_INDEX", "false").lower() == "true"
+# Até quantos dias para trás o índice local responde pelos termos
+LOCAL_INDEX_LOOKBACK_DAYS = int(os.getenv("LOCAL_INDEX_LOOKBACK_DAYS", "365"))
+
+# Separador de milhar entre dígitos ("46.930" -> "46930")
+THOUSANDS_PATTERN = re.compile(r"(?<=\d)\.(?=\d{3}\b)")
+NON_WORD_PATTERN = re.compile(r"[^0-9a-z]+")
+# Último espaço do pedaço de texto: o que vem depois pode continuar no pedaço seguinte
+LAST_SPACE_PATTERN = re.compile(r"\s(?=\S*$)")
+# Palavra sem espaço maior que isso é cortada mesmo assim (texto binário ou corrompido)
+MAX_CARRY_CHARS = 64 * 1024
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Minúsculas, sem acentos nem pontuação e sem separador de milhar: só palavras separadas por espaço"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = THOUSANDS_PATTERN.sub("", text)
+    return NON_WORD_PATTERN.sub(" ", text).strip()
+
+
+class TermMatcher:
+    """
+    Autômato de Aho-Corasick sobre os termos normalizados
+
+    Encontra todos os termos presentes em um texto em uma única passada,
+    qualquer que seja a quantidade de termos. Só casa palavras inteiras
+    (os padrões são delimitados por espaço), como a busca por tsvector.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        for term in terms:
+            pattern = normalize_text(term)
+            if pattern:
+                self._add(f" {pattern} ", term)
+        self._build_fail_links()
+
+    def _add(self, pattern: str, term: str):
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[node][char] = child
+            node = child
+        self._out[node].add(term)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] |= self._out[self._fail[child]]
+
+    def _feed(self, node: int, text: str, found: Set[str]) -> int:
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+        return node
+
+    def search_normalized(self, text: str) -> Set[str]:
+        """Termos presentes em um texto já normalizado (normalize_text)"""
+        found: Set[str] = set()
+        self._feed(0, f" {text} ", found)
+        return found
+
+    def scan(self, chunks: Iterable[str]) -> Set[str]:
+        """
+        Termos presentes em um texto recebido em pedaços (ex.: um documento baixado em streaming)
+
+        Cada pedaço é cortado no último espaço, para que nenhuma palavra (nem
+        "46.930") seja normalizada pela metade; o autômato segue de um pedaço
+        para o outro, e as frases que atravessam o corte também casam.
+        """
+        found: Set[str] = set()
+        node = self._feed(0, " ", found)
+        carry = ""
+        for chunk in chunks:
+            text = carry + chunk
+            match = LAST_SPACE_PATTERN.search(text)
+            if match is None and len(text) < MAX_CARRY_CHARS:
+                carry = text
+                continue
+            cut = match.start() if match else len(text)
+            text, carry = text[:cut], text[cut:]
+            normalized = normalize_text(text)
+            if normalized:
+                node = self._feed(node, normalized + " ", found)
+        normalized = normalize_text(carry)
+        if normalized:
+            self._feed(node, normalized + " ", found)
+        return found
+
+    def search(self, text: str) -> Set[str]:
+        """Termos presentes no texto"""
+        return self.search_normalized(normalize_text(text))
+
+
+def row_key(publication_date: date, record: Publication) -> str:
+    """
+    Chave da linha de resultado: a mesma linha trazida por termos diferentes é gravada uma vez
+
+    O link fica de fora: o token session= muda entre as buscas e a mesma linha
+    ganharia uma chave nova a cada execução.
+    """
+    raw = "\x1f".join((publication_date.isoformat(), record.title or "", record.section or ""))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def index_rows(records: List[Tuple[date, Publication]], search_term: str) -> List[tuple]:
+    """Parâmetros de db.index_result_rows para as linhas de um termo"""
+    return [
+        (
+            row_key(publication_date, record), publication_date, record.title, record.section, record.url,
+            normalize_text(f"{record.title} {record.section}"), search_term,
+        )
+        for publication_date, record in records
+    ]
+
+
+class ResultIndex:
+    """
+    Índice local do processo: recebe as linhas das threads de coleta e as
+    grava/casa na thread principal
+
+    Args:
+        terms: Termos monitorados (todos, não só os da execução)
+        lookback_days: Janela de datas respondida pelo índice local
+    """
+
+    def __init__(self, terms: Iterable[str], lookback_days: int = 365):
+        self._lookback = timedelta(days=lookback_days)
+        self._lock = threading.Lock()
+        self._staged: Dict[str, List[Tuple[date, Publication]]] = {}
+        self.set_terms(terms)
+
+    def set_terms(self, terms: Iterable[str]):
+        """Atualiza os termos monitorados (o autômato só é refeito se a lista mudar)"""
+        terms = tuple(dict.fromkeys(terms))
+        if getattr(self, "_terms", None) != terms:
+            self._terms = terms
+            self._matcher = TermMatcher(terms)
+
+    def stage(self, search_term: str, records: List[Tuple[date, Publication]]):
+        """Guarda as linhas (data, registro) trazidas pela busca de um termo (chamado pelas threads de coleta)"""
+        with self._lock:
+            self._staged[search_term] = records
+
+    def ingest(self, search_term: str, conn=None) -> Dict[str, Dict[date, Optional[str]]]:
+        """
+        Grava no índice as linhas guardadas do termo e casa as inéditas com os demais termos
+
+        Falhas são registradas e ignoradas: o índice só adianta resultados.
+
+        Returns:
+            Dicionário {outro termo: {data: título}} com as linhas que também são dele
+        """
+        with self._lock:
+            records = self._staged.pop(search_term, [])
+        if not records:
+            return {}
+        try:
+            if conn is None:
+                with db.connection() as own_conn:
+                    inserted = db.index_result_rows(own_conn, index_rows(records, search_term))
+            else:
+                inserted = db.index_result_rows(conn, index_rows(records, search_term))
+        except Exception as e:
+            logger.warning(f"Índice local: falha ao gravar as linhas de '{search_term}': {e}")
+            return {}
+
+        hits: Dict[str, Dict[date, Optional[str]]] = {}
+        for publication_date, title, normalized in inserted:
+            for term in self._matcher.search_normalized(normalized):
+                if term != search_term:
+                    hits.setdefault(term, {}).setdefault(publication_date, title)
+        if inserted:
+            logger.info(
+                f"Índice local: {len(inserted)} linha(s) nova(s) de '{search_term}', "
+                f"{len(hits)} outro(s) termo(s) encontrado(s) nelas"
+            )
+        return hits
+
+    def lookup(self, search_terms: Iterable[str], conn=None,
+               today: Optional[date] = None) -> Dict[str, Dict[date, Optional[str]]]:
+        """Responde os termos com o índice local (uma consulta): {termo: {data: título}}"""
+        queries = {term: query for term in search_terms if (query := normalize_text(term))}
+        since = (today or date.today()) - self._lookback
+        try:
+            if conn is None:
+                with db.connection() as own_conn:
+                    rows = db.search_result_index(own_conn, queries, since)
+            else:
+                rows = db.search_result_index(conn, queries, since)
+        except Exception as e:
+            logger.warning(f"Índice local indisponível: {e}")
+            return {}
+
+        found: Dict[str, Dict[date, Optional[str]]] = {}
+        for term, publication_date, title in rows:
+            found.setdefault(term, {}).setdefault(publication_date, title)
+        if found:
+            logger.info(f"Índice local: {len(found)} termo(s) com publicações já baixadas")
+        return found
+
+
+class _NoIndex:
+    """Substituto usado quando LOCAL_INDEX=false"""
+
+    def set_terms(self, terms):
+        pass
+
+    def stage(self, search_term, records):
+        pass
+
+    def ingest(self, search_term, conn=None):
+        return {}
+
+    def lookup(self, search_terms, conn=None, today=None):
+        return {}
+
+
+_index = None
+
+
+def get_result_index():
+    """Retorna o índice do processo (compartilhado entre execuções do scheduler)"""
+    global _index
+    if _index is None:
+        _index = ResultIndex((), LOCAL_INDEX_LOOKBACK_DAYS) if LOCAL_INDEX else _NoIndex()
+    return _index
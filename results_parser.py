@@ -0,0 +1,198 @@
+"""
+Parser da tabela de resultados da busca do DOERJ
+Percorre apenas as linhas "table tbody tr" (ignorando cabeçalho, rodapé e menus)
+e gera um registro compacto por publicação: data, título, seção e link.
+Aceita a página inteira ou pedaços (streaming), sem montar uma árvore DOM.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin
+
+DATE_PATTERN = re.compile(r"\b\d{2}/\d{2}/\d{4}\b")
+SPACE_PATTERN = re.compile(r"\s+")
+
+# Links da paginação dos resultados ("Próxima", "Seguinte", "»" ou rel="next"), procurados
+# só dentro do bloco de paginação (class/id com "pagina", "pagination", "pager" ou "paging")
+PAGINATION_OPEN_PATTERN = re.compile(
+    r"""<(div|nav|ul|ol|p|td|span)\b[^>]*\b(?:class|id)\s*=\s*["'][^"']*(?:pagina|pager|paging)[^>]*>""",
+    re.IGNORECASE,
+)
+LINK_PATTERN = re.compile(r"<a\b([^>]*)>(.*?)</a>", re.IGNORECASE | re.DOTALL)
+HREF_PATTERN = re.compile(r"""\bhref\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+REL_NEXT_PATTERN = re.compile(r"""\brel\s*=\s*["'][^"']*\bnext\b""", re.IGNORECASE)
+# Rótulo inteiro: "Próxima", "Próxima »", "Seguinte" ou uma seta só ("»»" e "Próximos eventos" não)
+NEXT_TEXT_PATTERN = re.compile(r"^(?:(?:próxim[ao]|seguinte)(?:\s*[»>])?|[»>])$", re.IGNORECASE)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+# Parâmetros de sessão dos links do DOERJ: mudam a cada busca e não identificam o documento
+SESSION_PARAM_PATTERN = re.compile(r"""([?&;])(session|sid|phpsessid)=[^&#"'\s<>]*""", re.IGNORECASE)
+
+
+class Publication:
+    """Linha da tabela de resultados"""
+
+    __slots__ = ("date", "title", "section", "url")
+
+    def __init__(self, date: str, title: str, section: str, url: Optional[str]):
+        self.date = date
+        self.title = title
+        self.section = section
+        self.url = url
+
+    def __repr__(self):
+        return f"Publication({self.date!r}, {self.title!r}, {self.section!r}, {self.url!r})"
+
+
+class _ResultsTableParser(HTMLParser):
+    """Máquina de estados que acompanha tbody > tr > td e acumula as linhas completas"""
+
+    def __init__(self, base_url: Optional[str] = None):
+        super().__init__(convert_charrefs=True)
+        self._base_url = base_url
+        self._tbody_depth = 0
+        self._row: Optional[dict] = None
+        self._cell: Optional[List[str]] = None
+        self._link_text: Optional[List[str]] = None
+        self.records: List[Publication] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tbody":
+            self._tbody_depth += 1
+        elif self._tbody_depth == 0:
+            return
+        elif tag == "tr":
+            self._row = {"cells": [], "href": None, "link": None}
+        elif self._row is None:
+            return
+        elif tag in ("td", "th"):
+            self._cell = []
+        elif tag == "a" and self._row["href"] is None:
+            href = dict(attrs).get("href")
+            if href:
+                self._row["href"] = urljoin(self._base_url, href) if self._base_url else href
+                self._link_text = []
+
+    def handle_endtag(self, tag):
+        if tag == "tbody":
+            self._tbody_depth = max(0, self._tbody_depth - 1)
+        elif self._row is None:
+            return
+        elif tag == "a" and self._link_text is not None:
+            self._row["link"] = _clean("".join(self._link_text))
+            self._link_text = None
+        elif tag in ("td", "th") and self._cell is not None:
+            self._row["cells"].append(_clean("".join(self._cell)))
+            self._cell = None
+        elif tag == "tr":
+            record = _build_record(self._row)
+            if record is not None:
+                self.records.append(record)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+        if self._link_text is not None:
+            self._link_text.append(data)
+
+
+def _clean(text: str) -> str:
+    return SPACE_PATTERN.sub(" ", text).strip()
+
+
+def _build_record(row: dict) -> Optional[Publication]:
+    """Monta o registro a partir das células; linhas sem data são ignoradas"""
+    cells = row["cells"]
+    date_index = next((i for i, cell in enumerate(cells) if DATE_PATTERN.fullmatch(cell)), None)
+    if date_index is None:
+        match = next((DATE_PATTERN.search(cell) for cell in cells if DATE_PATTERN.search(cell)), None)
+        if match is None:
+            return None
+        date = match.group(0)
+    else:
+        date = cells[date_index]
+
+    others = [cell for i, cell in enumerate(cells) if i != date_index and cell]
+    title = row["link"] or (others[0] if others else "")
+    section = next((cell for cell in reversed(others) if cell != title), "")
+    return Publication(date, title, section, row["href"])
+
+
+def iter_publications(chunks: Iterable[str], base_url: Optional[str] = None) -> Iterator[Publication]:
+    """
+    Analisa o HTML em pedaços e gera as publicações conforme as linhas terminam
+
+    Args:
+        chunks: Pedaços do HTML (ex.: iter_content de uma resposta HTTP ou linhas de um arquivo)
+        base_url: URL da página, para tornar os links absolutos
+    """
+    parser = _ResultsTableParser(base_url)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.records:
+            yield from parser.records
+            parser.records.clear()
+    parser.close()
+    yield from parser.records
+
+
+def parse_publications(page_html: str, base_url: Optional[str] = None) -> List[Publication]:
+    """Analisa a página inteira e retorna a lista de publicações da tabela de resultados"""
+    return list(iter_publications([page_html], base_url))
+
+
+def _pagination_blocks(page_html: str) -> Iterator[str]:
+    """Trechos dos blocos de paginação, do início da tag até o fechamento correspondente"""
+    for opening in PAGINATION_OPEN_PATTERN.finditer(page_html):
+        tag = opening.group(1)
+        depth = 1
+        for match in re.finditer(rf"<(/?){tag}\b[^>]*>", page_html[opening.end():], re.IGNORECASE):
+            depth += -1 if match.group(1) else 1
+            if depth == 0:
+                yield page_html[opening.end():opening.end() + match.start()]
+                break
+        else:
+            yield page_html[opening.end():]
+
+
+def find_next_page_url(page_html: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Retorna o link para a próxima página de resultados, ou None na última página
+
+    O rótulo só é considerado dentro do bloco de paginação; fora dele, só links
+    com rel="next" (menus e avisos da página não são confundidos com paginação).
+    """
+    links = [link for block in _pagination_blocks(page_html) for link in LINK_PATTERN.findall(block)]
+    by_text = bool(links)
+    if not by_text:
+        links = LINK_PATTERN.findall(page_html)
+    for attrs, text in links:
+        href = HREF_PATTERN.search(attrs)
+        if not href:
+            continue
+        label = _clean(html.unescape(TAG_PATTERN.sub(" ", text)))
+        if REL_NEXT_PATTERN.search(attrs) or (by_text and NEXT_TEXT_PATTERN.match(label)):
+            url = html.unescape(href.group(1))
+            return urljoin(base_url, url) if base_url else url
+    return None
+
+
+def mask_session_params(text: str) -> str:
+    """Apaga o valor dos parâmetros de sessão (session=...) de um link ou de um trecho de HTML"""
+    return SESSION_PARAM_PATTERN.sub(r"\1\2=", text)
+
+
+def titles_by_date(records: Iterable[Publication]) -> Dict[str, str]:
+    """
+    Agrupa os títulos por data (dd/mm/yyyy)
+
+    Datas com várias publicações têm os títulos distintos separados por " | ".
+    """
+    grouped: Dict[str, List[str]] = {}
+    for record in records:
+        titles = grouped.setdefault(record.date, [])
+        if record.title and record.title not in titles:
+            titles.append(record.title)
+    return {date: " | ".join(titles) for date, titles in grouped.items() if titles}
@@ -1,20 +1,36 @@
 """
 Scheduler para execução automática do scraper do Decreto 46930
-Roda diariamente no horário configurado no fuso definido (America/Sao_Paulo por padrão).
+Roda nos horários configurados (ou a cada N minutos dentro de uma janela) no fuso
+definido (America/Sao_Paulo por padrão), como um processo de longa duração que
+mantém navegadores, sessões HTTP e o pool do banco aquecidos entre as execuções.
 Pula sábados, domingos e feriados (nacionais + opcionais por estado/município)
+No modo adaptativo (SCHEDULER_ADAPTATIVO=true), os horários acima valem para todos
+os termos e cada termo quente ganha consultas extras na sua janela típica,
+aprendida de first_seen_at (ver polling_plan.py).
+Com assinaturas (SUBSCRIPTIONS=true), termos com intervalo mínimo entre consultas
+ficam de fora dos horários em que o intervalo ainda não passou.
+No modo distribuído (CLUSTER_MODE=true), vários schedulers dividem os termos
+pelo banco (ver cluster.py); o nó se registra já na partida.
 """
 
 import os
+import random
 import time
 import logging
 import sys
-from datetime import datetime, date
+from datetime import datetime, date, time as dtime, timedelta
+from typing import List, Optional
 from zoneinfo import ZoneInfo
-import schedule
 import holidays
 
 # Importar a função main do scraper
-from busca_decreto_receita_despesa import main
+from busca_decreto_receita_despesa import create_driver_pool, load_search_terms, main
+from business_calendar import BusinessCalendar
+from cluster import get_cluster
+from metrics import start_metrics_server
+from polling_plan import PollingPlan, load_term_plans
+from subscriptions import get_subscriptions
+import db
 
 # ====================== Configurações ======================
 
@@ -33,8 +49,19 @@ FERIADOS_CUSTOM = {
     if s.strip()
 }
 
-# Horário (HH:MM) no TZ definido
-HORARIO = "09:20"
+# Horários (HH:MM) no TZ definido, separados por vírgula. Ex.: "09:20,13:00,18:30"
+HORARIOS = os.getenv("SCHEDULER_HORARIOS", "09:20")
+
+# Modo intervalo: a cada N minutos dentro da janela (substitui SCHEDULER_HORARIOS).
+# Ex.: SCHEDULER_INTERVALO_MIN=30 e SCHEDULER_JANELA=08:00-20:00
+INTERVALO_MIN = int(os.getenv("SCHEDULER_INTERVALO_MIN", "0"))
+JANELA = os.getenv("SCHEDULER_JANELA", "08:00-20:00")
+
+# Atraso aleatório (0 a N segundos) somado a cada horário, para não bater no site sempre no mesmo segundo
+JITTER_SEG = int(os.getenv("SCHEDULER_JITTER_SEG", "0"))
+
+# Modo adaptativo: consultas extras por termo na janela aprendida do histórico
+ADAPTATIVO = os.getenv("SCHEDULER_ADAPTATIVO", "false").lower() == "true"
 
 # ====================== Logging ======================
 
@@ -67,82 +94,189 @@ def build_feriados_br(years: list[int]) -> holidays.HolidayBase:
             logger.warning(f"Data inválida em FERIADOS_CUSTOM: {ds!r} — ignorando.")
     return cal
 
-# Pré-construímos para o ano corrente e vizinhos (para viradas de ano)
-NOW_TZ = datetime.now(TZ)
-FERIADOS = build_feriados_br([NOW_TZ.year - 1, NOW_TZ.year, NOW_TZ.year + 1])
+# Índice de dias úteis: começa no ano corrente e vizinhos e se estende sozinho nas viradas de ano
+_ANO = datetime.now(TZ).year
+CALENDARIO = BusinessCalendar(build_feriados_br, [_ANO - 1, _ANO, _ANO + 1])
 
 # ====================== Funções ======================
 
-def eh_fim_de_semana(d: date) -> bool:
-    """Verifica se a data é sábado ou domingo."""
-    # Monday=0 ... Sunday=6
-    return d.weekday() >= 5  # 5=sábado, 6=domingo
-
 def eh_feriado(d: date) -> bool:
     """Verifica se a data é feriado (nacional, estadual ou customizado)."""
-    if d in FERIADOS:
-        return True
-    ds = d.strftime("%Y-%m-%d")
-    return ds in FERIADOS_CUSTOM
+    return CALENDARIO.is_holiday(d)
 
 
-def run_scraper():
-    """Executa o scraper às 09:30, pulando fds e feriados (no TZ configurado)."""
-    try:
-        now = datetime.now(TZ)
-        hoje = now.date()
+def eh_dia_util(d: date) -> bool:
+    """Dia em que o scraper roda: nem fim de semana nem feriado."""
+    return CALENDARIO.is_business_day(d)
 
-        # Pula fim de semana
-        if eh_fim_de_semana(hoje):
-            logger.info(f"⏸️ Ignorado ({now.strftime('%A')}) — fim de semana no fuso {TZ_NAME}.")
-            return
 
-        # Pula feriado
-        if eh_feriado(hoje):
-            nome = FERIADOS.get(hoje) or "Feriado"
-            logger.info(f"⏸️ Ignorado — {nome} ({hoje.isoformat()}) no fuso {TZ_NAME}.")
+def parse_horario(texto: str) -> dtime:
+    """Converte "HH:MM" em time."""
+    hora, minuto = map(int, texto.strip().split(":"))
+    return dtime(hora, minuto)
+
+
+def gerar_horarios(horarios: str = HORARIOS, intervalo_min: int = INTERVALO_MIN, janela: str = JANELA) -> List[dtime]:
+    """
+    Lista ordenada dos horários de execução de um dia útil
+
+    Com intervalo_min > 0, gera um horário a cada intervalo_min minutos dentro
+    da janela "HH:MM-HH:MM" (extremos incluídos); senão, usa a lista fixa.
+    """
+    if intervalo_min <= 0:
+        return sorted({parse_horario(h) for h in horarios.split(",") if h.strip()})
+
+    inicio, fim = (parse_horario(h) for h in janela.split("-"))
+    atual = datetime.combine(date.today(), inicio)
+    limite = datetime.combine(date.today(), fim)
+    slots = []
+    while atual <= limite:
+        slots.append(atual.time())
+        atual += timedelta(minutes=intervalo_min)
+    return slots
+
+
+SLOTS = gerar_horarios()
+
+
+def aplicar_jitter(momento: datetime) -> datetime:
+    return momento + timedelta(seconds=random.uniform(0, JITTER_SEG))
+
+
+def proxima_execucao(agora: datetime, slots: List[dtime] = None) -> datetime:
+    """
+    Próximo horário de execução (em dia útil) estritamente posterior a `agora`,
+    já com o jitter aplicado
+    """
+    return aplicar_jitter(CALENDARIO.next_run(agora, slots or SLOTS, TZ))
+
+
+def aguardar_ate(momento: datetime):
+    """Dorme até `momento` de uma vez; se acordar antes (ajuste do relógio), dorme o que faltar."""
+    while True:
+        restante = (momento - datetime.now(TZ)).total_seconds()
+        if restante <= 0:
             return
+        time.sleep(restante)
+
+
+def carregar_plano() -> PollingPlan:
+    """Plano adaptativo a partir do histórico; sem histórico (ou sem banco), só os horários base."""
+    try:
+        planos = load_term_plans(TZ)
+    except Exception as e:
+        logger.warning(f"Não foi possível montar o plano adaptativo ({e}) — usando só os horários base")
+        planos = {}
+    return PollingPlan(planos, SLOTS, eh_dia_util, TZ)
+
+
+def termos_no_prazo(termos: Optional[List[str]], agora: datetime) -> Optional[List[str]]:
+    """
+    Filtra os termos pelo intervalo mínimo das assinaturas e registra a consulta
+
+    Retorna None quando todos os termos (termos=None) estão no prazo.
+    """
+    assinaturas = get_subscriptions()
+    candidatos = termos if termos is not None else load_search_terms()
+    no_prazo = assinaturas.due_terms(candidatos, agora)
+    assinaturas.mark_polled(no_prazo, agora)
+    if termos is None and len(no_prazo) == len(candidatos):
+        return None
+    return no_prazo
+
+
+def run_scraper(driver_pool=None, termos: Optional[List[str]] = None):
+    """Executa uma rodada do scraper (todos os termos ou só `termos`), reaproveitando o pool de navegadores."""
+    try:
+        now = datetime.now(TZ)
 
         logger.info("=" * 60)
         logger.info(f"🚀 Scheduler disparado em {now.strftime('%d/%m/%Y às %H:%M:%S')} [{TZ_NAME}]")
         logger.info("=" * 60)
 
-        main()
+        main(driver_pool, termos)
 
         logger.info("=" * 60)
         logger.info("✅ Scheduler concluído com sucesso!")
-        logger.info(f"Próxima execução: amanhã às {HORARIO}")
         logger.info("=" * 60)
 
-    except Exception as e:
+    except (Exception, SystemExit) as e:
+        # main() encerra com sys.exit(1) em erro crítico: o scheduler segue para o próximo horário
         logger.error("=" * 60)
         logger.error(f"💥 ERRO no scheduler: {e}", exc_info=True)
         logger.error("=" * 60)
 
 
-# ====================== Agendamento ======================
+def descrever_agenda() -> str:
+    if INTERVALO_MIN > 0:
+        return f"a cada {INTERVALO_MIN} min entre {JANELA}"
+    return "às " + ", ".join(s.strftime("%H:%M") for s in SLOTS)
 
-schedule.every().day.at(HORARIO).do(run_scraper)
 
-# ====================== Inicialização ======================
+# ====================== Loop ======================
 
-logger.info("=" * 60)
-logger.info("SCHEDULER INICIADO!")
-logger.info(
-    "Horário: %s (TZ: %s) — pula sábados, domingos e feriados%s%s.",
-    HORARIO,
-    TZ_NAME,
-    f" (UF={FERIADOS_UF})" if FERIADOS_UF else "",
-    f" + {len(FERIADOS_CUSTOM)} custom" if FERIADOS_CUSTOM else "",
-)
-logger.info("Aguardando próxima execução...")
-logger.info("=" * 60)
+def run_forever():
+    """
+    Processo de longa duração: dorme até o próximo horário em dia útil e executa
 
-# ====================== Loop ======================
+    O pool de navegadores (abertos só se o Selenium for usado), as threads de
+    coleta com suas sessões HTTP, o pool do banco e os caches ficam vivos entre
+    as execuções.
+    """
+    logger.info("=" * 60)
+    logger.info("SCHEDULER INICIADO!")
+    logger.info(
+        "Execuções %s%s%s (TZ: %s) — pula sábados, domingos e feriados%s%s.",
+        descrever_agenda(),
+        " + janelas adaptativas por termo" if ADAPTATIVO else "",
+        f" + até {JITTER_SEG}s de jitter" if JITTER_SEG else "",
+        TZ_NAME,
+        f" (UF={FERIADOS_UF})" if FERIADOS_UF else "",
+        f" + {len(FERIADOS_CUSTOM)} custom" if FERIADOS_CUSTOM else "",
+    )
+    if db.health_check():
+        logger.info("Banco de dados OK (pool de conexões compartilhado entre as execuções)")
+    else:
+        logger.warning("Banco de dados indisponível no momento — nova tentativa na próxima execução")
+    start_metrics_server()
+    # Registrado antes do primeiro horário: os nós já se conhecem na primeira divisão
+    get_cluster().start()
+    logger.info("=" * 60)
 
-try:
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Verifica a cada 1 minuto
-except KeyboardInterrupt:
-    logger.info("Scheduler encerrado pelo usuário")
+    driver_pool = create_driver_pool()
+    plano, plano_dia = None, None
+    try:
+        while True:
+            agora = datetime.now(TZ)
+            if not ADAPTATIVO:
+                proxima, termos = proxima_execucao(agora), None
+            else:
+                # Termos relidos a cada volta (as assinaturas mudam sem reiniciar o scheduler);
+                # plano refeito uma vez por dia, já com as publicações da véspera
+                todos = load_search_terms()
+                if plano_dia != agora.date():
+                    plano, plano_dia = carregar_plano(), agora.date()
+                    logger.info(f"Consultas previstas nesta semana: {plano.polls_per_week(todos)} (termo × horário)")
+                momento, termos = plano.next_poll(agora, todos)
+                proxima = aplicar_jitter(momento)
+                if len(termos) == len(todos):
+                    termos = None
+
+            alvo = "todos os termos" if termos is None else f"{len(termos)} termo(s): {termos}"
+            logger.info(f"Próxima execução: {proxima.strftime('%d/%m/%Y às %H:%M:%S')} [{TZ_NAME}] — {alvo}")
+            aguardar_ate(proxima)
+            termos = termos_no_prazo(termos, datetime.now(TZ))
+            if termos == []:
+                logger.info("Nenhum termo fora do intervalo mínimo das assinaturas — execução pulada")
+                continue
+            run_scraper(driver_pool, termos)
+    except KeyboardInterrupt:
+        logger.info("Scheduler encerrado pelo usuário")
+    finally:
+        driver_pool.close()
+        get_cluster().shutdown()
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    run_forever()
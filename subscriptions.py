@@ -0,0 +1,191 @@
+"""
+Assinaturas de termos por destinatário, guardadas no PostgreSQL (term_subscriptions)
+Cada linha liga um termo a um destinatário, com prioridade e intervalo mínimo
+entre consultas. Os termos buscados são os termos únicos das assinaturas ativas:
+um termo com dez assinantes continua sendo buscado uma vez por execução, e o
+e-mail de cada termo vai só para os seus assinantes.
+
+As assinaturas ficam em memória e são recarregadas quando a tabela muda (uma
+consulta de versão a cada SUBSCRIPTIONS_RELOAD_SEC), sem reiniciar o scheduler.
+Sem assinaturas (ou com SUBSCRIPTIONS=false), valem SEARCH_TERMS e EMAIL_RECIPIENTS.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+SUBSCRIPTIONS = os.getenv("SUBSCRIPTIONS", "false").lower() == "true"
+# Intervalo entre as verificações de mudança na tabela, em segundos
+SUBSCRIPTIONS_RELOAD_SEC = float(os.getenv("SUBSCRIPTIONS_RELOAD_SEC", "60"))
+
+
+def env_search_terms() -> List[str]:
+    """Termos de SEARCH_TERMS (separados por vírgula)"""
+    return [t.strip() for t in os.getenv("SEARCH_TERMS", "").split(",") if t.strip()]
+
+
+def env_recipients() -> List[str]:
+    """Destinatários de EMAIL_RECIPIENTS (separados por vírgula)"""
+    return [r.strip() for r in os.getenv("EMAIL_RECIPIENTS", "").split(",") if r.strip()]
+
+
+class TermSubscription:
+    """Assinaturas de um termo, consolidadas"""
+
+    __slots__ = ("term", "recipients", "priority", "interval_min")
+
+    def __init__(self, term: str):
+        self.term = term
+        self.recipients: List[str] = []
+        # A maior prioridade e o menor intervalo entre os assinantes (None = todo horário do scheduler)
+        self.priority = 0
+        self.interval_min: Optional[int] = None
+
+    def __repr__(self):
+        return (f"TermSubscription({self.term!r}, {self.recipients!r}, "
+                f"priority={self.priority}, interval_min={self.interval_min})")
+
+
+def build_subscriptions(rows: Iterable[tuple]) -> Dict[str, TermSubscription]:
+    """Consolida as linhas (termo, destinatário, prioridade, intervalo) por termo, em ordem de prioridade"""
+    by_term: Dict[str, TermSubscription] = {}
+    intervals: Dict[str, List[Optional[int]]] = {}
+    for term, recipient, priority, interval_min in rows:
+        term = term.strip()
+        subscription = by_term.get(term)
+        if subscription is None:
+            subscription = by_term[term] = TermSubscription(term)
+            subscription.priority = priority
+        else:
+            subscription.priority = max(subscription.priority, priority)
+        if recipient not in subscription.recipients:
+            subscription.recipients.append(recipient)
+        intervals.setdefault(term, []).append(interval_min)
+    for term, values in intervals.items():
+        by_term[term].interval_min = None if None in values else min(values)
+    return dict(sorted(by_term.items(), key=lambda item: -item[1].priority))
+
+
+class SubscriptionRegistry:
+    """
+    Assinaturas em memória, recarregadas quando a tabela muda
+
+    Args:
+        reload_interval: Segundos entre as verificações de mudança
+        clock: Relógio monotônico (substituível nos testes)
+    """
+
+    def __init__(self, reload_interval: float = 60, clock: Callable[[], float] = time.monotonic):
+        self._reload_interval = reload_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._by_term: Dict[str, TermSubscription] = {}
+        self._last_polled: Dict[str, datetime] = {}
+
+    def refresh(self, force: bool = False, conn=None):
+        """Recarrega as assinaturas se a tabela mudou (no máximo uma verificação por intervalo)"""
+        now = self._clock()
+        with self._lock:
+            if not force and self._checked_at is not None and now - self._checked_at < self._reload_interval:
+                return
+            self._checked_at = now
+        try:
+            if conn is None:
+                with db.connection() as own_conn:
+                    self._reload(own_conn)
+            else:
+                self._reload(conn)
+        except Exception as e:
+            # Banco indisponível: segue com as assinaturas já carregadas
+            logger.warning(f"Não foi possível verificar as assinaturas: {e}")
+
+    def _reload(self, conn):
+        version = db.fetch_subscriptions_version(conn)
+        if version == self._version:
+            return
+        by_term = build_subscriptions(db.fetch_subscriptions(conn))
+        with self._lock:
+            self._by_term, self._version = by_term, version
+        recipients = {r for s in by_term.values() for r in s.recipients}
+        logger.info(f"Assinaturas carregadas: {len(by_term)} termo(s), {len(recipients)} destinatário(s)")
+
+    def terms(self) -> List[str]:
+        """Termos únicos das assinaturas, da maior para a menor prioridade (ou SEARCH_TERMS, se não houver)"""
+        self.refresh()
+        return list(self._by_term) or env_search_terms()
+
+    def recipients(self, search_term: Optional[str] = None) -> List[str]:
+        """Assinantes do termo (ou EMAIL_RECIPIENTS, se o termo não tiver assinaturas)"""
+        self.refresh()
+        subscription = self._by_term.get(search_term) if search_term is not None else None
+        return list(subscription.recipients) if subscription else env_recipients()
+
+    def get(self, search_term: str) -> Optional[TermSubscription]:
+        """Assinaturas consolidadas do termo (None se o termo não tiver assinaturas)"""
+        return self._by_term.get(search_term)
+
+    def due_terms(self, search_terms: Iterable[str], now: datetime) -> List[str]:
+        """Termos cujo intervalo mínimo entre consultas já passou (sem intervalo: sempre)"""
+        self.refresh()
+        due = []
+        for term in search_terms:
+            subscription = self._by_term.get(term)
+            last = self._last_polled.get(term)
+            if subscription is None or subscription.interval_min is None or last is None:
+                due.append(term)
+            elif now - last >= timedelta(minutes=subscription.interval_min):
+                due.append(term)
+        return due
+
+    def mark_polled(self, search_terms: Iterable[str], now: datetime):
+        """Registra a consulta dos termos (base de due_terms)"""
+        for term in search_terms:
+            self._last_polled[term] = now
+
+
+class _EnvSubscriptions:
+    """Substituto usado quando SUBSCRIPTIONS=false: SEARCH_TERMS e EMAIL_RECIPIENTS para todos"""
+
+    def refresh(self, force=False, conn=None):
+        pass
+
+    def terms(self):
+        return env_search_terms()
+
+    def recipients(self, search_term=None):
+        return env_recipients()
+
+    def get(self, search_term):
+        return None
+
+    def due_terms(self, search_terms, now):
+        return list(search_terms)
+
+    def mark_polled(self, search_terms, now):
+        pass
+
+
+_registry = None
+
+
+def get_subscriptions():
+    """Retorna o registro do processo (compartilhado entre execuções do scheduler)"""
+    global _registry
+    if _registry is None:
+        _registry = SubscriptionRegistry(SUBSCRIPTIONS_RELOAD_SEC) if SUBSCRIPTIONS else _EnvSubscriptions()
+    return _registry
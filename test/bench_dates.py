@@ -0,0 +1,78 @@
+"""
+Benchmark da normalização de datas: strptime por string x fatiamento com cache
+Gera listas como as de páginas de histórico profundo (muitas repetições das
+mesmas datas) e compara o caminho antigo de normalize_dates com o atual, na
+primeira chamada (cache vazio) e nas seguintes (datas já vistas por outro termo).
+
+Uso:
+    python test/bench_dates.py
+    python test/bench_dates.py --strings 1000 50000 --distinct 3000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import busca_decreto_receita_despesa as scraper  # noqa: E402
+
+
+def normalize_strptime(date_strings):
+    """normalize_dates antes do fatiamento e do cache"""
+    dates = []
+    for date_str in date_strings:
+        try:
+            dates.append(datetime.strptime(date_str, "%d/%m/%Y").date())
+        except ValueError:
+            pass
+    return sorted(list(set(dates)), reverse=True)
+
+
+def make_strings(count, distinct):
+    start = date(2010, 1, 1)
+    pool = [(start + timedelta(days=i)).strftime("%d/%m/%Y") for i in range(distinct)]
+    return [random.choice(pool) for _ in range(count)]
+
+
+def measure(fn, strings, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(strings)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strings", type=int, nargs="+", default=[100, 5000, 50000])
+    parser.add_argument("--distinct", type=int, default=2000, help="datas distintas no histórico")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    random.seed(0)
+    for count in args.strings:
+        strings = make_strings(count, args.distinct)
+        expected, old = measure(normalize_strptime, strings)
+
+        scraper._date_cache.clear()
+        start = time.perf_counter()
+        assert scraper.normalize_dates(strings) == expected
+        cold = time.perf_counter() - start
+        result, warm = measure(scraper.normalize_dates, strings)
+        assert result == expected
+
+        print(
+            f"{count:>7} strings ({len(expected)} datas): strptime {old * 1000:8.2f} ms | "
+            f"cache vazio {cold * 1000:7.2f} ms ({old / cold:5.1f}x) | "
+            f"cache cheio {warm * 1000:7.2f} ms ({old / warm:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
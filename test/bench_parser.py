@@ -0,0 +1,100 @@
+"""
+Benchmark da extração de datas: regex na página inteira x parser da tabela
+Mede tempo e pico de memória (tracemalloc, em uma segunda passada, para não
+distorcer o tempo) em páginas grandes geradas a partir da fixture de resultados,
+ou em páginas salvas informadas na linha de comando.
+
+Uso:
+    python test/bench_parser.py
+    python test/bench_parser.py --rows 1000 20000 100000
+    python test/bench_parser.py --pages paginas/*.html      # exportadas com python page_archive.py export
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_parser import iter_publications, parse_publications  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "busca_resultados.html")
+DATE_PATTERN = re.compile(r"\b\d{2}/\d{2}/\d{4}\b")
+ROW_PATTERN = re.compile(r"<tr>\s*<td>\d{2}/\d{2}/\d{4}</td>.*?</tr>", re.DOTALL)
+CHUNK_SIZE = 64 * 1024
+
+
+def make_page(path, rows):
+    """Grava uma página com `rows` linhas, repetindo as linhas da fixture"""
+    with open(FIXTURE, encoding="utf-8") as f:
+        template = f.read()
+    sample = ROW_PATTERN.findall(template)
+    head, _, rest = template.partition("<tbody>")
+    _, _, tail = rest.partition("</tbody>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(head + "<tbody>\n")
+        for i in range(rows):
+            f.write(sample[i % len(sample)] + "\n")
+        f.write("</tbody>" + tail)
+
+
+def regex_whole_page(path):
+    with open(path, encoding="utf-8") as f:
+        return len(DATE_PATTERN.findall(f.read()))
+
+
+def parser_whole_page(path):
+    with open(path, encoding="utf-8") as f:
+        return len(parse_publications(f.read()))
+
+
+def parser_streaming(path):
+    with open(path, encoding="utf-8") as f:
+        chunks = iter(lambda: f.read(CHUNK_SIZE), "")
+        return sum(1 for _ in iter_publications(chunks))
+
+
+def measure(fn, path):
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def bench(path, label):
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"\n{label} ({size_mb:.1f} MB)")
+    for name, fn in (("regex (página inteira)", regex_whole_page),
+                     ("parser (página inteira)", parser_whole_page),
+                     ("parser (streaming)", parser_streaming)):
+        count, elapsed, peak = measure(fn, path)
+        print(f"  {name:<25} {count:>8} datas  {elapsed * 1000:9.1f} ms  pico {peak / 1024 / 1024:7.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 20000])
+    parser.add_argument("--pages", nargs="*", default=[], help="páginas salvas (ex.: exportadas do arquivo de páginas)")
+    args = parser.parse_args()
+
+    for path in args.pages:
+        bench(path, path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"resultados_{rows}.html")
+            make_page(path, rows)
+            bench(path, f"{rows} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark das esperas do Selenium: pausas fixas (versão anterior) x esperas por evento
+Roda a busca de N termos em um navegador simulado (test/fake_browser.py) com
+atrasos aleatórios injetados — os mesmos para as duas estratégias, pela
+semente — e mede a latência por termo, os cliques perdidos e as falhas.
+
+Uso:
+    python test/bench_waits.py
+    python test/bench_waits.py --terms 50 --seed 7 --scale 0.5
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.common.exceptions import StaleElementReferenceException  # noqa: E402
+from selenium.webdriver.common.action_chains import ActionChains  # noqa: E402
+from selenium.webdriver.common.by import By  # noqa: E402
+from selenium.webdriver.support import expected_conditions as EC  # noqa: E402
+from selenium.webdriver.support.ui import WebDriverWait  # noqa: E402
+
+import busca_decreto_receita_despesa as scraper  # noqa: E402
+from fake_browser import PageDelays, SimulatedDriver  # noqa: E402
+
+
+def legacy_click(driver, locator, wait_time=15, max_retries=3):
+    """safe_click_with_retry antes das esperas por evento: 0,5 s antes do clique e 1 s entre tentativas"""
+    for attempt in range(max_retries):
+        try:
+            element = WebDriverWait(driver, wait_time).until(EC.element_to_be_clickable(locator))
+            time.sleep(0.5)
+            ActionChains(driver).move_to_element(element).click().perform()
+            return True
+        except StaleElementReferenceException:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(1)
+        except Exception:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(1)
+    return False
+
+
+def legacy_search(driver, search_term):
+    """search_with_driver antes das esperas por evento (WebDriverWait consultando a cada 0,5 s)"""
+    driver.get(scraper.DIARIO_URL)
+    input_box = WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.NAME, "textobusca")))
+    input_box.clear()
+    input_box.send_keys(search_term)
+    legacy_click(driver, (By.NAME, "buscar"))
+    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr")))
+    return driver.page_source
+
+
+def run(search, terms, seed, scale):
+    rng = random.Random(seed)
+    driver = SimulatedDriver(lambda: PageDelays.sample(rng, scale))
+    latencies, failures = [], 0
+    for i in range(terms):
+        start = time.perf_counter()
+        try:
+            search(driver, f"termo{i}")
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            failures += 1
+    return latencies, failures, driver.stale_clicks
+
+
+def report(label, latencies, failures, stale_clicks):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)] if ordered else float("nan")
+    print(
+        f"{label:<22} média {statistics.mean(latencies):6.3f}s  p50 {statistics.median(latencies):6.3f}s  "
+        f"p95 {p95:6.3f}s  total {sum(latencies):7.2f}s  cliques perdidos {stale_clicks:3d}  falhas {failures}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=46930)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica todos os atrasos injetados")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{args.terms} termos, semente {args.seed}, escala {args.scale}")
+    report("pausas fixas", *run(legacy_search, args.terms, args.seed, args.scale))
+    report("esperas por evento", *run(scraper.search_with_driver, args.terms, args.seed, args.scale))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Configuração compartilhada dos testes
+Disponibiliza os módulos da raiz do projeto e, como fixtures, o servidor DOERJ
+local, um schema PostgreSQL temporário e um servidor SMTP local (aiosmtpd).
+"""
+
+import os
+import socket
+import sys
+import uuid
+
+import pytest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TEST_DIR))
+sys.path.insert(0, TEST_DIR)
+
+from doerj_stub_server import start_stub_server  # noqa: E402
+
+SCHEMA_SQL = os.path.join(TEST_DIR, "schema.sql")
+
+
+@pytest.fixture
+def doerj_stub():
+    """URL de busca de um servidor DOERJ local servindo as páginas gravadas"""
+    server, url = start_stub_server()
+    try:
+        yield url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def pg_conn():
+    """
+    Conexão com um schema PostgreSQL temporário criado a partir de schema.sql
+
+    Requer POSTGRES_TEST_DSN; sem ele, os testes de banco são ignorados.
+    """
+    dsn = os.getenv("POSTGRES_TEST_DSN")
+    if not dsn:
+        pytest.skip("POSTGRES_TEST_DSN não definido")
+
+    import psycopg
+
+    schema = f"test_{uuid.uuid4().hex[:8]}"
+    conn = psycopg.connect(dsn)
+    try:
+        with open(SCHEMA_SQL, encoding="utf-8") as f:
+            schema_sql = f.read()
+        conn.execute(f"CREATE SCHEMA {schema}")
+        conn.execute(f"SET search_path TO {schema}")
+        conn.execute(schema_sql)
+        conn.commit()
+        yield conn
+    finally:
+        conn.rollback()
+        conn.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+class RecordingSmtpHandler:
+    """Guarda as mensagens recebidas e a sessão SMTP de cada uma; pode recusar as primeiras"""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = []
+        self.fail_first = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_first:
+            self.fail_first -= 1
+            return "421 Serviço indisponível, tente mais tarde"
+        self.messages.append(envelope.content.decode("utf-8", "replace"))
+        self.sessions.append(id(session))
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    """
+    Servidor SMTP local (sem TLS nem autenticação) configurado nas variáveis SMTP_*
+
+    Requer o pacote aiosmtpd; sem ele, os testes de e-mail são ignorados.
+    """
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    import notifier
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    handler = RecordingSmtpHandler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("EMAIL_USER", "alerta@example.com")
+    monkeypatch.delenv("EMAIL_PASSWORD", raising=False)
+    monkeypatch.setenv("EMAIL_RECIPIENTS", "a@example.com,b@example.com")
+    monkeypatch.setattr(notifier, "SMTP_STARTTLS", False)
+    try:
+        yield handler
+    finally:
+        controller.stop()
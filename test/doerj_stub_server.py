@@ -0,0 +1,133 @@
+"""
+Servidor HTTP local que imita o formulário de busca do DOERJ
+Serve páginas gravadas (test/fixtures) para testar o scraper sem acessar o site real.
+
+Uso:
+    python test/doerj_stub_server.py --port 8765
+    DIARIO_URL=http://127.0.0.1:8765/busca_do.php?acao=busca python busca_decreto_receita_despesa.py
+
+Para cada termo buscado, o servidor responde com fixtures/resultados_<termo>.html,
+se existir, ou com fixtures/busca_resultados.html caso contrário. As páginas
+seguintes (parâmetro "pagina" nos links de paginação) vêm de
+fixtures/resultados_<termo>_p<N>.html.
+
+A edição de um dia (SEARCH_MODE=edition) vem de fixtures/edicao_<AAAAMMDD>.html,
+e cada documento listado nela, de fixtures/edicao/<arquivo> (HTML, texto ou PDF).
+"""
+
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SEARCH_PATH = "/busca_do.php"
+EDITION_PATH = "/do_seleciona_edicao.php"
+DOCUMENT_PATH = "/mostra_edicao.php"
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".txt": "text/plain; charset=utf-8", ".pdf": "application/pdf"}
+
+
+class DoerjStubHandler(BaseHTTPRequestHandler):
+    """Responde ao GET com o formulário e ao POST com a página de resultados gravada"""
+
+    fixtures_dir = FIXTURES_DIR
+    # Atraso injetado em cada resposta, em segundos (simula a latência do site real)
+    latency = 0.0
+    # Arquivos servidos, em ordem (usado pelos testes para contar requisições)
+    served = None
+
+    def log_message(self, format, *args):
+        # Silencia o log padrão do http.server
+        pass
+
+    def _send_html(self, filename: str, status: int = 200):
+        path = os.path.join(self.fixtures_dir, filename)
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+        if self.served is not None:
+            self.served.append(filename)
+        if self.latency:
+            time.sleep(self.latency)
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(status)
+        self.send_header("Content-Type", CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream"))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _results_for(self, term: str, page: int = 1) -> str:
+        if term == "sem-resultados":
+            return "busca_sem_resultados.html"
+        if page > 1:
+            return f"resultados_{term}_p{page}.html"
+        candidate = f"resultados_{term}.html"
+        if os.path.exists(os.path.join(self.fixtures_dir, candidate)):
+            return candidate
+        return "busca_resultados.html"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == EDITION_PATH:
+            self._send_html(f"edicao_{query.get('data', [''])[0]}.html")
+            return
+        if url.path == DOCUMENT_PATH:
+            self._send_html(os.path.join("edicao", os.path.basename(query.get("doc", [""])[0])))
+            return
+        if url.path != SEARCH_PATH:
+            self.send_error(404)
+            return
+        if "textobusca" in query:
+            page = int(query.get("pagina", ["1"])[0])
+            self._send_html(self._results_for(query["textobusca"][0], page))
+        else:
+            self._send_html("busca_form.html")
+
+    def do_POST(self):
+        if urlsplit(self.path).path != SEARCH_PATH:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", "0"))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        term = form.get("textobusca", [""])[0]
+        self._send_html(self._results_for(term))
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, fixtures_dir: str = FIXTURES_DIR,
+                      latency: float = 0.0):
+    """
+    Inicia o servidor em uma thread de fundo
+
+    Args:
+        latency: Atraso injetado em cada resposta, em segundos
+
+    Returns:
+        Tupla (servidor, url_de_busca). Chame servidor.shutdown() ao final.
+        Os arquivos servidos ficam em servidor.RequestHandlerClass.served.
+    """
+    handler = type("Handler", (DoerjStubHandler,), {"fixtures_dir": fixtures_dir, "served": [], "latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://{host}:{server.server_address[1]}{SEARCH_PATH}?acao=busca"
+    return server, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local com páginas gravadas do DOERJ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Diretório com as páginas gravadas")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Atraso injetado em cada resposta")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, args.fixtures, args.latency_ms / 1000)
+    print(f"Servidor DOERJ local em {url} (Ctrl+C para encerrar)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,106 @@
+"""
+Navegador simulado para os testes e o benchmark das esperas do Selenium
+
+Imita a página de busca do DOERJ com atrasos injetados: o campo de busca e o
+botão aparecem depois de um tempo, o DOM continua mudando até "assentar" e a
+tabela de resultados só surge algum tempo depois do clique. Um clique dado
+enquanto o DOM ainda muda acerta um elemento substituído
+(StaleElementReferenceException), como acontece no site real.
+
+Implementa só a parte do protocolo do WebDriver usada pelo scraper
+(find_element, execute_script, execute para clique/digitação e page_source),
+de modo que as condições do Selenium (expected_conditions) e o ActionChains
+rodam sem alteração.
+"""
+
+import random
+import time
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+
+RESULTS_HTML = """<html><body><table><tbody>
+<tr><td>28/10/2025</td><td><a href="/x/1">DECRETO Nº 46930</a></td><td>Poder Executivo</td></tr>
+<tr><td>16/10/2025</td><td><a href="/x/2">DECRETO Nº 46930</a></td><td>Poder Executivo</td></tr>
+</tbody></table></body></html>"""
+
+
+class PageDelays:
+    """Atrasos de uma carga da página, em segundos (contados a partir do get)"""
+
+    def __init__(self, form: float, button: float, settle: float, results: float):
+        self.form = form
+        self.button = button
+        self.settle = settle
+        # contado a partir do clique
+        self.results = results
+
+    @classmethod
+    def sample(cls, rng: random.Random, scale: float = 1.0) -> "PageDelays":
+        form = rng.uniform(0.05, 0.4)
+        button = form + rng.uniform(0.0, 0.3)
+        settle = button + rng.uniform(0.0, 0.6)
+        return cls(form * scale, button * scale, settle * scale, rng.uniform(0.2, 1.5) * scale)
+
+
+class SimulatedDriver:
+    """WebDriver falso que serve a página com os atrasos de `delays_for_load()` a cada get"""
+
+    _is_remote = False
+
+    def __init__(self, delays_for_load):
+        self._delays_for_load = delays_for_load
+        self.current_url = "about:blank"
+        self.stale_clicks = 0
+        self.clicks = 0
+        self._loaded_at = None
+        self._delays = None
+        self._clicked_at = None
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._loaded_at
+
+    def get(self, url):
+        self.current_url = url
+        self._loaded_at = time.monotonic()
+        self._delays = self._delays_for_load()
+        self._clicked_at = None
+
+    def find_element(self, by=By.ID, value=None):
+        if self._loaded_at is None:
+            raise NoSuchElementException(value)
+        elapsed = self._elapsed()
+        if (by, value) == (By.NAME, "textobusca") and elapsed >= self._delays.form:
+            return WebElement(self, "textobusca")
+        if (by, value) == (By.NAME, "buscar") and elapsed >= self._delays.button:
+            return WebElement(self, "buscar")
+        if (by, value) == (By.CSS_SELECTOR, "table tbody tr") and self._clicked_at is not None:
+            if time.monotonic() - self._clicked_at >= self._delays.results:
+                return WebElement(self, "resultado")
+        raise NoSuchElementException(value)
+
+    def execute_script(self, script, *args):
+        if "__decretoObserver" in script:
+            idle = self._elapsed() - self._delays.settle
+            return [max(0.0, idle) * 1000, "complete" if idle >= 0 else "interactive"]
+        # isDisplayed e afins
+        return True
+
+    def execute(self, driver_command, params=None):
+        if driver_command == Command.W3C_ACTIONS:
+            self.clicks += 1
+            if self._elapsed() < self._delays.settle:
+                # O botão foi trocado por outro enquanto o DOM mudava
+                self.stale_clicks += 1
+                raise StaleElementReferenceException("botão substituído durante a atualização da página")
+            self._clicked_at = time.monotonic()
+        return {"value": True}
+
+    @property
+    def page_source(self):
+        return RESULTS_HTML
+
+    def quit(self):
+        pass
@@ -7,10 +7,11 @@
 
 -- Tabela principal para armazenar as datas de publicação do Decreto 46930
 CREATE TABLE IF NOT EXISTS decree_publications (
-    publication_date DATE PRIMARY KEY,
+    publication_date DATE NOT NULL,
     raw_title TEXT,
     first_seen_at TIMESTAMPTZ DEFAULT NOW(),
-    search_term VARCHAR(50) DEFAULT '46930'
+    search_term VARCHAR(50) NOT NULL DEFAULT '46930',
+    PRIMARY KEY (publication_date, search_term)
 );
 
 -- Índice para busca por data de descoberta
@@ -19,17 +20,84 @@ CREATE INDEX IF NOT EXISTS idx_first_seen_at ON decree_publications(first_seen_a
 -- Tabela opcional para auditoria de notificações enviadas
 CREATE TABLE IF NOT EXISTS notifications_log (
     id SERIAL PRIMARY KEY,
-    publication_date DATE NOT NULL REFERENCES decree_publications(publication_date),
+    publication_date DATE NOT NULL,
+    search_term VARCHAR(50) NOT NULL DEFAULT '46930',
     sent_at TIMESTAMPTZ DEFAULT NOW(),
     email_to TEXT NOT NULL,
     status VARCHAR(20) DEFAULT 'sent', -- sent, failed
-    error_message TEXT
+    error_message TEXT,
+    FOREIGN KEY (publication_date, search_term)
+        REFERENCES decree_publications(publication_date, search_term)
 );
 
 -- Índice para busca de notificações por data
 CREATE INDEX IF NOT EXISTS idx_notifications_date ON notifications_log(publication_date);
 CREATE INDEX IF NOT EXISTS idx_notifications_sent_at ON notifications_log(sent_at DESC);
 
+-- Fila de notificações (outbox): preenchida na mesma transação que grava as
+-- publicações novas e drenada pelo worker (python outbox.py)
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    publication_date DATE NOT NULL,
+    search_term VARCHAR(50) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    sending_at TIMESTAMPTZ,
+    sent_at TIMESTAMPTZ,
+    last_error TEXT,
+    FOREIGN KEY (publication_date, search_term)
+        REFERENCES decree_publications(publication_date, search_term)
+);
+
+-- Índice parcial: só as notificações pendentes
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox(next_attempt_at, id) WHERE sent_at IS NULL;
+
+-- Índice local das linhas de resultado já baixadas (LOCAL_INDEX=true): novos termos
+-- são respondidos primeiro com estes dados e cada linha nova é casada com todos os termos
+CREATE TABLE IF NOT EXISTS result_index (
+    row_key CHAR(40) PRIMARY KEY,
+    publication_date DATE NOT NULL,
+    title TEXT,
+    section TEXT,
+    url TEXT,
+    normalized_text TEXT NOT NULL,
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', normalized_text)) STORED,
+    found_by VARCHAR(50) NOT NULL,
+    first_seen_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_result_index_search ON result_index USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_result_index_date ON result_index(publication_date DESC);
+
+-- Assinaturas de termos por destinatário (SUBSCRIPTIONS=true): os termos buscados são
+-- os termos únicos das linhas ativas e cada e-mail vai só para os assinantes do termo
+CREATE TABLE IF NOT EXISTS term_subscriptions (
+    id BIGSERIAL PRIMARY KEY,
+    search_term VARCHAR(50) NOT NULL,
+    recipient TEXT NOT NULL,
+    team VARCHAR(100),
+    priority SMALLINT NOT NULL DEFAULT 0,
+    interval_min INTEGER CHECK (interval_min > 0),
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (search_term, recipient)
+);
+
+-- Modo distribuído (CLUSTER_MODE=true): nós ativos (heartbeat) e o lease de cada termo.
+-- Um termo é buscado só pelo nó que tem o lease; leases de um nó parado vencem sozinhos
+CREATE TABLE IF NOT EXISTS scraper_nodes (
+    node_id VARCHAR(200) PRIMARY KEY,
+    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS term_leases (
+    search_term VARCHAR(50) PRIMARY KEY,
+    node_id VARCHAR(200) NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
 -- View para facilitar consultas de novas publicações
 CREATE OR REPLACE VIEW recent_publications AS
 SELECT
@@ -43,9 +111,26 @@ SELECT
 FROM decree_publications
 ORDER BY publication_date DESC;
 
+-- Migração de bancos criados com a versão antiga (PK apenas em publication_date):
+-- o upsert usa ON CONFLICT (publication_date, search_term), que exige a chave composta.
+-- ALTER TABLE notifications_log DROP CONSTRAINT IF EXISTS notifications_log_publication_date_fkey;
+-- ALTER TABLE notifications_log ADD COLUMN IF NOT EXISTS search_term VARCHAR(50) NOT NULL DEFAULT '46930';
+-- ALTER TABLE decree_publications DROP CONSTRAINT decree_publications_pkey;
+-- ALTER TABLE decree_publications ALTER COLUMN search_term SET NOT NULL;
+-- ALTER TABLE decree_publications ADD PRIMARY KEY (publication_date, search_term);
+-- ALTER TABLE notifications_log ADD FOREIGN KEY (publication_date, search_term)
+--     REFERENCES decree_publications(publication_date, search_term);
+-- Outbox criada antes do registro do início do envio:
+-- ALTER TABLE notification_outbox ADD COLUMN IF NOT EXISTS sending_at TIMESTAMPTZ;
+
 -- Comentários nas tabelas
 COMMENT ON TABLE decree_publications IS 'Armazena as datas de publicações encontradas do Decreto 46930 no Diário Oficial';
 COMMENT ON TABLE notifications_log IS 'Log de emails enviados para notificação de novas publicações';
+COMMENT ON TABLE notification_outbox IS 'Fila de notificações pendentes (NOTIFY_MODE=outbox)';
+COMMENT ON TABLE result_index IS 'Linhas de resultado já baixadas do DOERJ, indexadas para busca local (LOCAL_INDEX=true)';
+COMMENT ON TABLE term_subscriptions IS 'Termos buscados e seus destinatários (SUBSCRIPTIONS=true)';
+COMMENT ON TABLE scraper_nodes IS 'Nós do scraper em execução, com o último heartbeat (CLUSTER_MODE=true)';
+COMMENT ON TABLE term_leases IS 'Termo -> nó que o busca, até expires_at (CLUSTER_MODE=true)';
 COMMENT ON COLUMN decree_publications.publication_date IS 'Data da publicação no Diário Oficial';
 COMMENT ON COLUMN decree_publications.raw_title IS 'Título completo da publicação (opcional)';
 COMMENT ON COLUMN decree_publications.first_seen_at IS 'Data e hora em que a publicação foi encontrada pela primeira vez';
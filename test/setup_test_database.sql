@@ -3,22 +3,95 @@
 
 -- 1. Criar as tabelas (se ainda não existirem)
 CREATE TABLE IF NOT EXISTS decree_publications (
-    publication_date DATE PRIMARY KEY,
+    publication_date DATE NOT NULL,
     raw_title TEXT,
     first_seen_at TIMESTAMPTZ DEFAULT NOW(),
-    search_term VARCHAR(50) DEFAULT '46930'
+    search_term VARCHAR(50) NOT NULL DEFAULT '46930',
+    PRIMARY KEY (publication_date, search_term)
 );
 
 CREATE TABLE IF NOT EXISTS notifications_log (
     id SERIAL PRIMARY KEY,
-    publication_date DATE NOT NULL REFERENCES decree_publications(publication_date),
+    publication_date DATE NOT NULL,
+    search_term VARCHAR(50) NOT NULL DEFAULT '46930',
     sent_at TIMESTAMPTZ DEFAULT NOW(),
     email_to TEXT NOT NULL,
     status VARCHAR(20) DEFAULT 'sent',
-    error_message TEXT
+    error_message TEXT,
+    FOREIGN KEY (publication_date, search_term)
+        REFERENCES decree_publications(publication_date, search_term)
+);
+
+-- Fila de notificações (outbox): preenchida na mesma transação que grava as
+-- publicações novas e drenada pelo worker (python outbox.py)
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    publication_date DATE NOT NULL,
+    search_term VARCHAR(50) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    sending_at TIMESTAMPTZ,
+    sent_at TIMESTAMPTZ,
+    last_error TEXT,
+    FOREIGN KEY (publication_date, search_term)
+        REFERENCES decree_publications(publication_date, search_term)
+);
+
+-- Índice parcial: só as notificações pendentes
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox(next_attempt_at, id) WHERE sent_at IS NULL;
+
+-- Índice local das linhas de resultado já baixadas (LOCAL_INDEX=true): novos termos
+-- são respondidos primeiro com estes dados e cada linha nova é casada com todos os termos
+CREATE TABLE IF NOT EXISTS result_index (
+    row_key CHAR(40) PRIMARY KEY,
+    publication_date DATE NOT NULL,
+    title TEXT,
+    section TEXT,
+    url TEXT,
+    normalized_text TEXT NOT NULL,
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', normalized_text)) STORED,
+    found_by VARCHAR(50) NOT NULL,
+    first_seen_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_result_index_search ON result_index USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_result_index_date ON result_index(publication_date DESC);
+
+-- Assinaturas de termos por destinatário (SUBSCRIPTIONS=true): os termos buscados são
+-- os termos únicos das linhas ativas e cada e-mail vai só para os assinantes do termo
+CREATE TABLE IF NOT EXISTS term_subscriptions (
+    id BIGSERIAL PRIMARY KEY,
+    search_term VARCHAR(50) NOT NULL,
+    recipient TEXT NOT NULL,
+    team VARCHAR(100),
+    priority SMALLINT NOT NULL DEFAULT 0,
+    interval_min INTEGER CHECK (interval_min > 0),
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (search_term, recipient)
+);
+
+-- Modo distribuído (CLUSTER_MODE=true): nós ativos (heartbeat) e o lease de cada termo.
+-- Um termo é buscado só pelo nó que tem o lease; leases de um nó parado vencem sozinhos
+CREATE TABLE IF NOT EXISTS scraper_nodes (
+    node_id VARCHAR(200) PRIMARY KEY,
+    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS term_leases (
+    search_term VARCHAR(50) PRIMARY KEY,
+    node_id VARCHAR(200) NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
 );
 
 -- 2. Limpar dados anteriores (apenas para testes)
+TRUNCATE TABLE notification_outbox CASCADE;
+TRUNCATE TABLE result_index;
+TRUNCATE TABLE term_subscriptions;
+TRUNCATE TABLE term_leases;
+TRUNCATE TABLE scraper_nodes;
 TRUNCATE TABLE notifications_log CASCADE;
 TRUNCATE TABLE decree_publications CASCADE;
 
@@ -30,7 +103,7 @@ VALUES
     ('2025-09-10', '46930', NOW() - INTERVAL '45 days'),
     ('2025-09-25', '46930', NOW() - INTERVAL '30 days'),
     ('2025-10-06', '46930', NOW() - INTERVAL '20 days')
-ON CONFLICT (publication_date) DO NOTHING;
+ON CONFLICT (publication_date, search_term) DO NOTHING;
 
 -- 4. Verificar os dados inseridos
 SELECT
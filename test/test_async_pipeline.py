@@ -0,0 +1,153 @@
+"""
+Testes do pipeline assíncrono contra o servidor DOERJ local
+"""
+
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+import async_pipeline
+from known_dates_cache import KnownDatesCache, _NoCache
+
+
+class FakeAsyncCursor:
+    def __init__(self, rows, executed):
+        self._rows = rows
+        self._executed = executed
+        self._last = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params):
+        self._executed.append((sql, params))
+        self._last = []
+        if "notifications_log" in sql:
+            return
+        for key in zip(*params[:2]):
+            if key not in self._rows:
+                self._rows.add(key)
+                self._last.append(key)
+
+    async def fetchall(self):
+        return self._last
+
+
+class FakeAsyncConnection:
+    def __init__(self, existing=()):
+        self.rows = set(existing)
+        self.executed = []
+
+    def cursor(self):
+        return FakeAsyncCursor(self.rows, self.executed)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def test_fetch_dates_async_normaliza_resultados(doerj_stub):
+    async def run():
+        async with async_pipeline.create_async_client() as client:
+            return await async_pipeline.fetch_dates_async(client, "46930", doerj_stub)
+
+    dates = asyncio.run(run())
+
+    assert date(2025, 10, 28) in dates
+    assert dates == sorted(dates, reverse=True)
+
+
+@pytest.fixture
+def sent(doerj_stub, monkeypatch):
+    """E-mails "enviados" pelo pipeline, que busca no servidor DOERJ local"""
+    sent = []
+
+    async def fake_send(new_dates, term, titles=None, recipients=None):
+        sent.append((term, new_dates, titles, recipients))
+
+    monkeypatch.setenv("EMAIL_RECIPIENTS", "a@example.com,b@example.com")
+    monkeypatch.setattr(async_pipeline, "send_email_async", fake_send)
+    original_fetch = async_pipeline.fetch_publications_async
+    monkeypatch.setattr(
+        async_pipeline, "fetch_publications_async",
+        lambda client, term, url=None: original_fetch(client, term, doerj_stub),
+    )
+    return sent
+
+
+def test_run_pipeline_notifica_apenas_datas_novas(sent):
+    conn = FakeAsyncConnection(existing={(date(2025, 8, 7), "46930")})
+
+    failed = asyncio.run(async_pipeline.run_pipeline(["46930", "sem-resultados"], conn, known_dates=_NoCache()))
+
+    assert failed == ["sem-resultados"]
+    assert len(sent) == 1
+    term, new_dates, titles, recipients = sent[0]
+    assert term == "46930"
+    assert date(2025, 8, 7) not in new_dates
+    assert date(2025, 10, 28) in new_dates
+    assert titles[date(2025, 10, 28)].startswith("DECRETO")
+    assert recipients == ["a@example.com", "b@example.com"]
+
+    # Títulos em raw_title e envios em notifications_log, como no modo síncrono
+    (upsert_sql, upsert_params), (log_sql, log_params) = conn.executed
+    assert "raw_title" in upsert_sql and any(upsert_params[2])
+    assert "notifications_log" in log_sql
+    assert sorted(log_params[0]) == sorted(new_dates)
+    assert set(log_params[3]) == {"sent"}
+
+
+def test_run_pipeline_usa_o_cache_de_datas_e_a_outbox(sent, monkeypatch):
+    known_dates = KnownDatesCache()
+    known_dates.add("46930", [date(2025, 10, 28)])
+    known_dates._reconciled_at = datetime.now()  # cache em dia: sem consulta ao banco
+    monkeypatch.setattr(async_pipeline, "NOTIFY_MODE", "outbox")
+    conn = FakeAsyncConnection()
+
+    assert asyncio.run(async_pipeline.run_pipeline(["46930"], conn, known_dates=known_dates)) == []
+
+    (upsert_sql, upsert_params), = conn.executed
+    assert "notification_outbox" in upsert_sql
+    assert date(2025, 10, 28) not in upsert_params[0]
+    assert sent == []
+
+
+class BrokenAsyncConnection(FakeAsyncConnection):
+    """Conexão caída: execute e rollback levantam erro"""
+
+    def cursor(self):
+        raise ConnectionError("conexão perdida")
+
+    async def rollback(self):
+        raise ConnectionError("conexão perdida")
+
+
+def test_run_pipeline_termina_com_o_banco_caido(sent, monkeypatch):
+    monkeypatch.setattr(async_pipeline, "ASYNC_QUEUE_SIZE", 1)
+    terms = [f"termo {i}" for i in range(5)]
+
+    run = async_pipeline.run_pipeline(terms, BrokenAsyncConnection(), known_dates=_NoCache(), log_to_db=False)
+    failed = asyncio.run(asyncio.wait_for(run, timeout=30))
+
+    assert sorted(failed) == terms
+    assert sent == []
+
+
+def test_run_pipeline_termina_quando_uma_etapa_cai(sent, monkeypatch):
+    class BrokenCache(_NoCache):
+        def filter_new(self, search_term, dates):
+            raise RuntimeError("cache corrompido")
+
+    monkeypatch.setattr(async_pipeline, "ASYNC_QUEUE_SIZE", 1)
+    terms = [f"termo {i}" for i in range(5)]
+
+    run = async_pipeline.run_pipeline(terms, FakeAsyncConnection(), known_dates=BrokenCache(), log_to_db=False)
+    failed = asyncio.run(asyncio.wait_for(run, timeout=30))
+
+    assert sorted(failed) == terms
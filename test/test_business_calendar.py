@@ -0,0 +1,74 @@
+"""
+Testes do calendário de dias úteis (índice por bits e extensão na virada do ano)
+"""
+
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import holidays
+
+from business_calendar import BusinessCalendar
+
+TZ = ZoneInfo("America/Sao_Paulo")
+
+
+class FeriadosBR:
+    """holidays.BR que registra os anos pedidos"""
+
+    def __init__(self):
+        self.pedidos = []
+
+    def __call__(self, years):
+        self.pedidos.append(list(years))
+        return holidays.BR(years=years)
+
+
+def test_dias_uteis_fim_de_semana_e_feriado():
+    cal = BusinessCalendar(FeriadosBR(), [2025])
+
+    assert cal.is_business_day(date(2025, 12, 24))
+    assert not cal.is_business_day(date(2025, 12, 25))  # Natal
+    assert not cal.is_business_day(date(2025, 12, 27))  # sábado
+    assert cal.is_holiday(date(2025, 12, 25))
+    assert cal.holiday_name(date(2025, 12, 25))
+    assert cal.next_business_day(date(2025, 12, 25)) == date(2025, 12, 26)
+
+
+def test_estende_o_indice_na_virada_do_ano():
+    feriados = FeriadosBR()
+    cal = BusinessCalendar(feriados, [2025])
+
+    # 31/12/2027 é sexta; 01/01/2028 é feriado e cai em um sábado
+    assert cal.next_business_day(date(2027, 12, 31)) == date(2027, 12, 31)
+    assert cal.next_business_day(date(2028, 1, 1)) == date(2028, 1, 3)
+    assert cal.is_holiday(date(2029, 1, 1))
+    # Só os anos ainda não indexados são pedidos, sempre com um ano de folga à frente
+    assert feriados.pedidos == [[2025], [2026, 2027, 2028], [2029, 2030]]
+
+
+def test_feriados_como_lista_de_datas():
+    cal = BusinessCalendar(lambda years: [date(year, 3, 10) for year in years], [2025])
+    assert not cal.is_business_day(date(2025, 3, 10))
+    assert cal.holiday_name(date(2025, 3, 10)) == "Feriado"
+
+
+def test_next_run():
+    cal = BusinessCalendar(FeriadosBR(), [2025])
+    slots = [time(9, 20), time(13, 0)]
+
+    # Mesmo dia, próximo horário
+    assert cal.next_run(datetime(2025, 10, 15, 9, 20, tzinfo=TZ), slots) == datetime(2025, 10, 15, 13, 0, tzinfo=TZ)
+    # Sexta à noite → segunda
+    assert cal.next_run(datetime(2025, 10, 17, 20, 0, tzinfo=TZ), slots) == datetime(2025, 10, 20, 9, 20, tzinfo=TZ)
+    # Véspera de Natal → 26/12
+    assert cal.next_run(datetime(2025, 12, 24, 18, 0, tzinfo=TZ), slots) == datetime(2025, 12, 26, 9, 20, tzinfo=TZ)
+    # Horário em outro fuso é convertido antes da comparação
+    utc = datetime(2025, 10, 15, 12, 0, tzinfo=ZoneInfo("UTC"))  # 09:00 em São Paulo
+    assert cal.next_run(utc, slots, TZ) == datetime(2025, 10, 15, 9, 20, tzinfo=TZ)
+
+
+def test_next_run_dias_sem_util_longos():
+    # Mais de 255 dias seguidos sem dia útil: o salto satura e a busca continua
+    inicio, fim = date(2025, 1, 1).toordinal(), date(2025, 11, 1).toordinal()
+    cal = BusinessCalendar(lambda years: [date.fromordinal(o) for o in range(inicio, fim)])
+    assert cal.next_business_day(date(2025, 1, 1)) == date(2025, 11, 3)
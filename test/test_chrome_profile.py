@@ -0,0 +1,99 @@
+"""
+Testes do perfil enxuto do Chromium (opções, bloqueios e medição de memória)
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+import chrome_profile
+from chrome_profile import LeanChrome, apply_lean_options, blocked_url_patterns, browser_rss_bytes
+
+
+def test_opcoes_do_perfil_enxuto(tmp_path, monkeypatch):
+    monkeypatch.setattr(chrome_profile, "CHROME_CACHE_DIR", str(tmp_path / "cache"))
+    options = apply_lean_options(Options(), cache_slot=2)
+
+    assert options.page_load_strategy == "eager"
+    assert f"--disk-cache-dir={tmp_path / 'cache' / '2'}" in options.arguments
+    assert any(arg.startswith("--js-flags=--max-old-space-size=") for arg in options.arguments)
+    assert options.experimental_options["prefs"]["profile.managed_default_content_settings.images"] == 2
+    assert os.path.isdir(tmp_path / "cache" / "2")
+
+
+def test_padroes_bloqueados():
+    patterns = blocked_url_patterns(["image", "font", "desconhecido"], ["*analytics*"])
+    assert "*.png" in patterns and "*.woff2" in patterns
+    assert "*.css" not in patterns
+    assert patterns[-1] == "*analytics*"
+
+
+def test_subdiretorios_de_cache_nao_se_repetem_entre_navegadores_abertos():
+    first = chrome_profile._acquire_cache_slot()
+    second = chrome_profile._acquire_cache_slot()
+    assert first != second
+    chrome_profile._release_cache_slot(first)
+    assert chrome_profile._acquire_cache_slot() == first
+    chrome_profile._release_cache_slot(first)
+    chrome_profile._release_cache_slot(second)
+
+
+def test_falha_apos_abrir_o_navegador_fecha_o_chromium(monkeypatch):
+    closed = []
+
+    def fail_cdp(self, cmd, args):
+        raise RuntimeError("CDP indisponível")
+
+    monkeypatch.setattr(webdriver.Chrome, "__init__", lambda self, service=None, options=None: None)
+    monkeypatch.setattr(webdriver.Chrome, "execute_cdp_cmd", fail_cdp)
+    monkeypatch.setattr(webdriver.Chrome, "quit", lambda self: closed.append(self))
+    monkeypatch.setattr(chrome_profile, "blocked_url_patterns", lambda: ["*.png"])
+    slot = chrome_profile._acquire_cache_slot()
+    chrome_profile._release_cache_slot(slot)
+
+    with pytest.raises(RuntimeError):
+        LeanChrome(service=None, options=Options())
+
+    assert len(closed) == 1
+    assert chrome_profile._acquire_cache_slot() == slot  # subdiretório liberado
+    chrome_profile._release_cache_slot(slot)
+
+
+class FakeService:
+    def __init__(self, process):
+        self.process = process
+
+
+class FakeDriver:
+    def __init__(self, process=None):
+        self.service = FakeService(process)
+
+
+def test_rss_inclui_os_processos_filhos():
+    # "chromedriver" (este processo filho) com um "navegador" filho dele
+    code = "import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)']); time.sleep(5)"
+    parent = subprocess.Popen([sys.executable, "-c", code])
+    try:
+        proc = psutil.Process(parent.pid)
+        for _ in range(50):
+            if proc.children():
+                break
+            time.sleep(0.05)
+        total = browser_rss_bytes(FakeDriver(parent))
+        assert total > proc.memory_info().rss
+    finally:
+        for child in psutil.Process(parent.pid).children(recursive=True):
+            child.kill()
+        parent.kill()
+        parent.wait()
+
+
+def test_rss_sem_processo():
+    assert browser_rss_bytes(FakeDriver()) == 0
+    assert browser_rss_bytes(object()) == 0
@@ -0,0 +1,104 @@
+"""
+Testes do modo distribuído (divisão dos termos entre nós, leases e rebalanceamento)
+Os testes de banco sobem vários processos contra o mesmo PostgreSQL.
+"""
+
+import multiprocessing
+import os
+
+import psycopg
+import pytest
+
+from cluster import ClusterCoordinator, assign_terms
+
+TERMS = [f"termo {i}" for i in range(40)]
+
+
+def test_divisao_disjunta_e_estavel():
+    nodes = ["a", "b", "c"]
+    shares = {node: assign_terms(TERMS, nodes, node) for node in nodes}
+    assert sorted(sum(shares.values(), [])) == sorted(TERMS)
+    assert all(shares.values())
+
+    # Saída de "c": só os termos dele mudam de dono
+    for node in ["a", "b"]:
+        assert set(shares[node]) <= set(assign_terms(TERMS, ["a", "b"], node))
+
+
+def _node_process(dsn, schema, node_id, barrier, results):
+    conn = psycopg.connect(dsn, options=f"-c search_path={schema}")
+    try:
+        coordinator = ClusterCoordinator(node_id)
+        coordinator.heartbeat(conn)
+        barrier.wait()  # todos registrados antes da divisão
+        results.put((node_id, coordinator.claim(TERMS, conn)))
+    finally:
+        conn.close()
+
+
+def _schema(conn):
+    return conn.execute("SELECT current_schema()").fetchone()[0]
+
+
+def test_processos_dividem_os_termos(pg_conn):
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(3), context.Queue()
+    processes = [
+        context.Process(target=_node_process,
+                        args=(os.environ["POSTGRES_TEST_DSN"], _schema(pg_conn), f"no-{i}", barrier, results))
+        for i in range(3)
+    ]
+    for process in processes:
+        process.start()
+    claimed = dict(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=10)
+        assert process.exitcode == 0
+
+    assert all(claimed.values())
+    assert sorted(sum(claimed.values(), [])) == sorted(TERMS)
+    assert claimed == {node: assign_terms(TERMS, claimed, node) for node in claimed}
+
+
+def test_no_parado_perde_os_termos_quando_o_lease_vence(pg_conn):
+    a, b = ClusterCoordinator("a"), ClusterCoordinator("b")
+    a.heartbeat(pg_conn)
+    b.heartbeat(pg_conn)
+    share_a, share_b = a.claim(TERMS, pg_conn), b.claim(TERMS, pg_conn)
+    assert sorted(share_a + share_b) == sorted(TERMS)
+
+    # "b" para: sem heartbeat, sai da divisão, mas o lease ainda vale
+    pg_conn.execute("UPDATE scraper_nodes SET heartbeat_at = NOW() - INTERVAL '1 hour' WHERE node_id = 'b'")
+    pg_conn.commit()
+    assert a.claim(TERMS, pg_conn) == share_a
+
+    pg_conn.execute("UPDATE term_leases SET expires_at = NOW() - INTERVAL '1 second' WHERE node_id = 'b'")
+    pg_conn.commit()
+    assert a.claim(TERMS, pg_conn) == TERMS
+
+
+def test_saida_do_no_libera_os_termos_na_hora(pg_conn):
+    a, b = ClusterCoordinator("a"), ClusterCoordinator("b")
+    a.heartbeat(pg_conn)
+    b.heartbeat(pg_conn)
+    b.claim(TERMS, pg_conn)
+
+    b.shutdown(pg_conn)
+    assert a.claim(TERMS, pg_conn) == TERMS
+
+
+def test_sem_banco_busca_todos_os_termos():
+    class Broken:
+        def cursor(self):
+            raise psycopg.OperationalError("conexão perdida")
+
+        def rollback(self):
+            pass
+
+    assert ClusterCoordinator("a").claim(TERMS, Broken()) == TERMS
+
+
+@pytest.mark.parametrize("node", ["a", "z"])
+def test_no_desconhecido_entra_na_divisao(node):
+    # Nó que ainda não aparece na lista (heartbeat não visível) também recebe a sua parte
+    assert assign_terms(TERMS, ["b", "c"], node) == assign_terms(TERMS, ["b", "c", node], node)
@@ -4,27 +4,22 @@ Execute para verificar se as credenciais estão corretas e o banco está acessí
 """
 
 import os
+import sys
 from dotenv import load_dotenv
 import psycopg
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_conninfo  # noqa: E402
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
 def test_database_connection():
     """Testa conexão com PostgreSQL e mostra dados atuais"""
     try:
-        # Tentar conectar
-        dsn = os.getenv("POSTGRES_DSN")
-        if dsn:
-            conn = psycopg.connect(dsn)
-        else:
-            conn = psycopg.connect(
-                host=os.getenv("POSTGRES_HOST", "localhost"),
-                port=os.getenv("POSTGRES_PORT", "5433"),
-                dbname=os.getenv("POSTGRES_DB"),
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD")
-            )
+        # Tentar conectar (mesma configuração usada pelo scraper)
+        conn = psycopg.connect(get_db_conninfo())
 
         print("=" * 60)
         print("✅ CONEXÃO COM POSTGRESQL OK!")
@@ -0,0 +1,93 @@
+"""
+Testes do pool de navegadores com um WebDriver falso
+"""
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+        self.crashed = False
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise WebDriverException("chrome not reachable")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+
+    return DriverPool(factory, **kwargs), created
+
+
+def test_reutiliza_o_mesmo_navegador_entre_termos():
+    pool, created = make_pool(size=1, max_pages=10)
+    for _ in range(5):
+        with pool.acquire():
+            pass
+    pool.close()
+
+    assert len(created) == 1
+    assert created[0].quit_called
+
+
+def test_recicla_apos_limite_de_paginas():
+    pool, created = make_pool(size=1, max_pages=2)
+    for _ in range(5):
+        with pool.acquire():
+            pass
+    pool.close()
+
+    assert len(created) == 3
+    assert all(d.quit_called for d in created)
+
+
+def test_recicla_navegador_que_travou():
+    pool, created = make_pool(size=1, max_pages=10)
+    with pytest.raises(WebDriverException):
+        with pool.acquire() as driver:
+            driver.crashed = True
+            raise WebDriverException("tab crashed")
+    with pool.acquire():
+        pass
+    pool.close()
+
+    assert len(created) == 2
+    assert created[0].quit_called
+
+
+def test_mantem_navegador_saudavel_apos_timeout():
+    pool, created = make_pool(size=1, max_pages=10)
+    with pytest.raises(TimeoutException):
+        with pool.acquire():
+            raise TimeoutException("resultados não carregaram")
+    with pool.acquire():
+        pass
+    pool.close()
+
+    assert len(created) == 1
+
+
+def test_active_drivers_inclui_os_emprestados():
+    pool, created = make_pool(size=2, max_pages=10)
+    with pool.acquire() as first:
+        with pool.acquire():
+            assert len(pool.active_drivers()) == 2
+        assert first in pool.active_drivers()
+    pool.close()
+
+    assert pool.active_drivers() == []
@@ -0,0 +1,148 @@
+"""
+Testes do modo por edição (índice da edição, documentos em streaming e casamento dos termos)
+"""
+
+from datetime import date
+from functools import partial
+
+import pytest
+
+import busca_decreto_receita_despesa as scraper
+import edition
+from doerj_stub_server import start_stub_server
+from edition import EditionScanner, list_documents
+
+DAY = date(2025, 10, 28)
+TERMS = ["46930", "receita e despesa", "histórico", "credito suplementar", "inexistente"]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, url = start_stub_server()
+    base = url.split("/busca_do.php")[0]
+    monkeypatch.setattr(edition, "EDITION_INDEX_URL", base + "/do_seleciona_edicao.php?data={data}")
+    try:
+        yield server.RequestHandlerClass.served
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_lista_os_documentos_da_edicao(stub):
+    documents = list_documents(DAY)
+    assert [d.url.rsplit("=", 1)[1] for d in documents] == [
+        "decreto_46930.html", "portaria_historico.txt", "caderno_parte1.pdf", "removido.html",
+    ]
+    assert documents[0].title.startswith("DECRETO Nº 46.930 - ALTERA")
+
+
+@pytest.mark.parametrize("chunk_size", [16, 64 * 1024])
+def test_todos_os_termos_em_uma_leitura_da_edicao(stub, monkeypatch, chunk_size):
+    # Pedaços pequenos cortam palavras e frases ("46.930", "RECEITA E DESPESA") entre as leituras
+    monkeypatch.setattr(edition, "EDITION_CHUNK_SIZE", chunk_size)
+    matches = EditionScanner(workers=2).scan_day(DAY, TERMS)
+
+    decreto = "DECRETO Nº 46.930 - ALTERA A TABELA DE CLASSIFICAÇÃO DA NATUREZA DA RECEITA"
+    assert matches == {
+        "46930": {DAY: decreto},
+        "receita e despesa": {DAY: decreto},
+        "histórico": {DAY: "PORTARIA SEPLAG Nº 112"},
+        # O script do decreto também cita o termo, mas scripts não entram no texto
+        "credito suplementar": {DAY: "Caderno completo (PDF)"},
+    }
+    # Índice + 4 documentos (o link repetido é lido uma vez; o removido dá 404)
+    assert len(stub) == 4
+
+
+def test_documentos_lidos_nao_sao_baixados_de_novo(stub):
+    scanner = EditionScanner()
+    scanner.scan_day(DAY, ["46930"])
+    scanner.confirm("46930")
+    served = len(stub)
+
+    assert scanner.scan_day(DAY, ["46930"]) == {}
+    assert len(stub) == served + 1  # só o índice
+
+    # Termo novo: os documentos são lidos de novo, só para ele
+    assert scanner.scan_day(DAY, ["46930", "histórico"]) == {"histórico": {DAY: "PORTARIA SEPLAG Nº 112"}}
+
+
+def test_token_de_sessao_novo_nao_faz_reler_os_documentos(stub, monkeypatch):
+    tokens = iter(range(100))
+
+    def with_session(day, session=None):
+        token = next(tokens)
+        return [edition.EditionDocument(f"{d.url}&session={token}", d.title) for d in list_documents(day, session)]
+
+    monkeypatch.setattr(edition, "list_documents", with_session)
+    scanner = EditionScanner()
+    scanner.scan_day(DAY, ["46930"])
+    scanner.confirm("46930")
+    served = len(stub)
+
+    assert scanner.scan_day(DAY, ["46930"]) == {}
+    assert len(stub) == served + 1  # só o índice
+
+
+def test_edicoes_fora_da_janela_sao_esquecidas(stub):
+    scanner = EditionScanner()
+    scanner.scan(["46930"], today=DAY, lookback_days=0)
+    scanner.confirm("46930")
+    assert {key[0] for key in scanner._scanned} == {DAY}
+
+    scanner.scan(["46930"], today=date(2025, 10, 30), lookback_days=1)
+    assert scanner._scanned == {}
+
+
+def test_edicao_indisponivel(stub):
+    matches, failed_days = EditionScanner().scan(["46930"], today=date(2025, 10, 29), lookback_days=1)
+    assert failed_days == [date(2025, 10, 29)]
+    assert matches == {"46930": {DAY: "DECRETO Nº 46.930 - ALTERA A TABELA DE CLASSIFICAÇÃO DA NATUREZA DA RECEITA"}}
+
+
+def test_run_edition_publica_pelo_caminho_de_sempre(stub, monkeypatch):
+    published = {}
+    scanner = EditionScanner()
+    scanner.scan = partial(scanner.scan, today=DAY, lookback_days=0)
+    monkeypatch.setattr(scraper, "EDITION_LOOKBACK_DAYS", 0)
+    monkeypatch.setattr(scraper, "get_edition_scanner", lambda: scanner)
+    monkeypatch.setattr(
+        scraper, "publish_term", lambda publications, term, notifier=None: published.setdefault(term, publications)
+    )
+
+    assert scraper.run_edition(["46930", "inexistente"]) == []
+    assert list(published) == ["46930"]
+
+
+def test_falha_na_publicacao_reporta_o_termo_na_proxima_execucao(stub, monkeypatch):
+    published = {}
+    scanner = EditionScanner()
+    scanner.scan = partial(scanner.scan, today=DAY, lookback_days=0)
+    monkeypatch.setattr(scraper, "EDITION_LOOKBACK_DAYS", 0)
+    monkeypatch.setattr(scraper, "get_edition_scanner", lambda: scanner)
+
+    def publish_down(publications, term, notifier=None):
+        raise RuntimeError("banco indisponível")
+
+    monkeypatch.setattr(scraper, "publish_term", publish_down)
+    assert scraper.run_edition(["46930"]) == ["46930"]
+
+    monkeypatch.setattr(
+        scraper, "publish_term", lambda publications, term, notifier=None: published.setdefault(term, publications)
+    )
+    assert scraper.run_edition(["46930"]) == []
+    assert list(published["46930"]) == [DAY]
+
+    # Publicado com sucesso: a execução seguinte não lê os documentos de novo
+    published.clear()
+    assert scraper.run_edition(["46930"]) == []
+    assert published == {}
+
+
+def test_run_edition_sem_edicao_falha_todos_os_termos(stub, monkeypatch):
+    scanner = EditionScanner()
+    scanner.scan = partial(scanner.scan, today=date(2025, 10, 30), lookback_days=0)
+    monkeypatch.setattr(scraper, "EDITION_LOOKBACK_DAYS", 0)
+    monkeypatch.setattr(scraper, "get_edition_scanner", lambda: scanner)
+
+    assert scraper.run_edition(["46930", "historico"]) == ["46930", "historico"]
@@ -0,0 +1,40 @@
+"""
+Testes do motor de busca HTTP contra o servidor DOERJ local
+"""
+
+import os
+import re
+
+import pytest
+
+from doerj_stub_server import FIXTURES_DIR
+from doerj_http import BuscaHttpError, fetch_page_http, parse_search_form
+
+
+def test_parse_search_form_coleta_campos_padrao():
+    with open(os.path.join(FIXTURES_DIR, "busca_form.html"), encoding="utf-8") as f:
+        form = parse_search_form(f.read())
+
+    assert form["method"] == "post"
+    assert form["action"] == "busca_do.php?acao=busca"
+    assert form["fields"]["op"] == "buscar"
+    assert form["fields"]["tipobusca"] == "todas"
+    assert "textobusca" in form["fields"]
+
+
+def test_parse_search_form_sem_formulario():
+    with pytest.raises(BuscaHttpError):
+        parse_search_form("<html><body><p>manutenção</p></body></html>")
+
+
+def test_fetch_page_http_retorna_resultados(doerj_stub):
+    page_html = fetch_page_http("46930", doerj_stub)
+
+    dates = re.findall(r"\b\d{2}/\d{2}/\d{4}\b", page_html)
+    assert "28/10/2025" in dates
+    assert len(set(dates)) == 8
+
+
+def test_fetch_page_http_sem_resultados(doerj_stub):
+    with pytest.raises(BuscaHttpError):
+        fetch_page_http("sem-resultados", doerj_stub)
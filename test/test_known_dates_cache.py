@@ -0,0 +1,72 @@
+"""
+Testes do cache de datas conhecidas
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import db
+from known_dates_cache import KnownDatesCache
+
+
+class NoQueryConnection:
+    """Conexão que falha se o cache tentar consultar o banco"""
+
+    def execute(self, *args, **kwargs):
+        raise AssertionError("o cache não deveria consultar o banco")
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def execute(self, sql, params):
+        terms = params[0]
+        rows = [r for r in self._rows if r[0] in terms]
+        return type("Result", (), {"fetchall": lambda _self: rows})()
+
+
+def test_filtra_datas_ja_gravadas(pg_conn):
+    db.upsert_publications(pg_conn, [date(2025, 10, 6), date(2025, 9, 25)], "46930")
+    cache = KnownDatesCache()
+    cache.ensure_loaded(["46930"], conn=pg_conn)
+
+    scraped = [date(2025, 10, 28), date(2025, 10, 6), date(2025, 9, 25)]
+    assert cache.filter_new("46930", scraped) == [date(2025, 10, 28)]
+
+    cache.add("46930", [date(2025, 10, 28)])
+    assert cache.filter_new("46930", scraped) == []
+
+
+def test_cache_em_disco_evita_consulta_ao_banco(tmp_path):
+    path = str(tmp_path / "known_dates.json")
+    cache = KnownDatesCache(path)
+    cache.ensure_loaded(["46930"], conn=FakeConnection([("46930", date(2025, 10, 6))]))
+    cache.add("46930", [date(2025, 10, 28)])
+    cache.save()
+
+    reloaded = KnownDatesCache(path)
+    reloaded.ensure_loaded(["46930"], conn=NoQueryConnection())
+
+    assert reloaded.filter_new("46930", [date(2025, 10, 28), date(2025, 10, 6)]) == []
+
+
+def test_cache_vencido_e_reconciliado(tmp_path):
+    cache = KnownDatesCache(reconcile_interval=timedelta(0))
+    cache.ensure_loaded(["46930"], conn=FakeConnection([]))
+    cache.add("46930", [date(2025, 10, 28)])
+
+    # Data removida do banco depois de entrar no cache
+    cache.ensure_loaded(["46930"], conn=FakeConnection([("46930", date(2025, 10, 6))]))
+
+    assert cache.filter_new("46930", [date(2025, 10, 28), date(2025, 10, 6)]) == [date(2025, 10, 28)]
+
+
+def test_arquivo_corrompido_e_ignorado(tmp_path):
+    path = tmp_path / "known_dates.json"
+    path.write_text("{nao é json", encoding="utf-8")
+
+    cache = KnownDatesCache(str(path))
+    with pytest.raises(AssertionError):
+        cache.ensure_loaded(["46930"], conn=NoQueryConnection())
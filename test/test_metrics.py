@@ -0,0 +1,58 @@
+"""
+Testes das métricas (tempo por etapa, novas tentativas e exportação em texto)
+"""
+
+from datetime import date
+
+import pytest
+
+import metrics
+from doerj_http import iter_result_pages_http
+from doerj_stub_server import start_stub_server
+from notifier import NotificationDispatcher
+
+
+def sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_timed_mede_mesmo_com_excecao():
+    before = sample("decreto_stage_seconds_count", stage="teste", term="x")
+    with pytest.raises(ValueError):
+        with metrics.timed("teste", "x"):
+            raise ValueError("falhou")
+    assert sample("decreto_stage_seconds_count", stage="teste", term="x") == before + 1
+
+
+def test_page_load_por_pagina_http():
+    server, url = start_stub_server()
+    try:
+        before = sample("decreto_stage_seconds_count", stage="page_load", term="historico")
+        pages = list(iter_result_pages_http("historico", url, max_pages=10))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert sample("decreto_stage_seconds_count", stage="page_load", term="historico") == before + len(pages)
+
+
+def test_smtp_conta_novas_tentativas(smtp_server):
+    smtp_server.fail_first = 2
+    before = sample("decreto_retries_total", stage="smtp")
+    with NotificationDispatcher(digest=False, backoff=0, log_to_db=False) as n:
+        n.notify([date(2025, 10, 28)], "46930")
+
+    assert sample("decreto_retries_total", stage="smtp") == before + 2
+    assert sample("decreto_stage_seconds_count", stage="smtp", term="46930") >= 1
+
+
+def test_record_run_grava_textfile(tmp_path, monkeypatch):
+    path = tmp_path / "decreto.prom"
+    monkeypatch.setattr(metrics, "METRICS_TEXTFILE", str(path))
+    metrics.record_dates("46930", candidates=3, new=1)
+    metrics.record_run(12.5, failed_terms=0)
+
+    text = path.read_text()
+    assert "decreto_last_run_seconds 12.5" in text
+    assert 'decreto_dates_total{status="new",term="46930"}' in text
+    assert "decreto_last_run_timestamp_seconds" in text
@@ -0,0 +1,41 @@
+"""
+Testes da conversão de datas (fatiamento de largura fixa e cache entre termos)
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+import busca_decreto_receita_despesa as scraper
+from busca_decreto_receita_despesa import normalize_dates, parse_date
+
+
+def strptime_or_none(date_str):
+    try:
+        return datetime.strptime(date_str, "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+
+@pytest.mark.parametrize("date_str", [
+    "01/02/2025", "29/02/2024", "31/12/1999", "1/2/2025", "01/2/2025",
+    "29/02/2025", "31/04/2025", "00/01/2025", "01/13/2025", "01/02/0000",
+    "+1/02/2025", " 1/02/2025", "０1/02/2025", "ab/cd/efgh", "01-02-2025", "",
+])
+def test_parse_date_equivale_a_strptime(date_str):
+    assert parse_date(date_str) == strptime_or_none(date_str)
+
+
+def test_normalize_dates_remove_duplicatas_e_ordena(caplog):
+    strings = ["28/10/2025", "01/02/2024", "28/10/2025", "31/02/2025", "1/2/2024", "05/11/2025", "31/02/2025"]
+    assert normalize_dates(strings) == [date(2025, 11, 5), date(2025, 10, 28), date(2024, 2, 1)]
+    # Uma mensagem por data inválida distinta
+    assert sum("31/02/2025" in r.getMessage() for r in caplog.records) == 1
+
+
+def test_cache_e_limitado(monkeypatch):
+    monkeypatch.setattr(scraper, "_date_cache", {})
+    monkeypatch.setattr(scraper, "DATE_CACHE_MAX", 3)
+    for day in range(1, 6):
+        assert parse_date(f"{day:02d}/01/2025") == date(2025, 1, day)
+    assert len(scraper._date_cache) <= 3
@@ -0,0 +1,79 @@
+"""
+Testes do despacho de e-mails contra um servidor SMTP local (aiosmtpd)
+"""
+
+import smtplib
+from datetime import date
+
+import pytest
+
+import db
+from notifier import NotificationDispatcher, _is_transient
+
+
+def test_uma_sessao_smtp_para_todos_os_termos(smtp_server):
+    with NotificationDispatcher(digest=False, log_to_db=False) as n:
+        n.notify([date(2025, 10, 28)], "46930")
+        n.notify([date(2025, 10, 16)], "47000")
+
+    assert len(smtp_server.messages) == 2
+    assert len(set(smtp_server.sessions)) == 1
+
+
+def test_resumo_junta_os_termos_em_um_email(smtp_server):
+    with NotificationDispatcher(digest=True, log_to_db=False) as n:
+        n.notify([date(2025, 10, 28)], "46930", {date(2025, 10, 28): "DECRETO Nº 46930"})
+        n.notify([date(2025, 10, 16), date(2025, 10, 8)], "47000")
+        assert n.flush() == []
+
+    assert len(smtp_server.messages) == 1
+    body = smtp_server.messages[0]
+    assert "46930" in body and "47000" in body and "16/10/2025" in body
+
+
+def test_falha_temporaria_e_reenviada(smtp_server):
+    smtp_server.fail_first = 2
+    with NotificationDispatcher(digest=False, backoff=0, log_to_db=False) as n:
+        n.notify([date(2025, 10, 28)], "46930")
+
+    assert len(smtp_server.messages) == 1
+
+
+def test_falha_persistente_marca_o_termo(smtp_server):
+    smtp_server.fail_first = 5
+    with NotificationDispatcher(digest=True, max_retries=2, backoff=0, log_to_db=False) as n:
+        n.notify([date(2025, 10, 28)], "46930")
+        assert n.flush() == ["46930"]
+
+    assert smtp_server.messages == []
+
+
+@pytest.mark.parametrize("error, transient", [
+    (smtplib.SMTPServerDisconnected("conexão encerrada"), True),
+    (ConnectionResetError("conexão reiniciada"), True),
+    (smtplib.SMTPDataError(451, b"tente mais tarde"), True),
+    (smtplib.SMTPDataError(554, b"mensagem rejeitada"), False),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"caixa ocupada")}), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"usuario inexistente")}), False),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"ocupada"), "b@example.com": (550, b"inexistente")}), False),
+    (smtplib.SMTPNotSupportedError(), False),
+])
+def test_classificacao_das_falhas(error, transient):
+    assert _is_transient(error) is transient
+
+
+def test_envios_registrados_em_lote(smtp_server, pg_conn):
+    dates = [date(2025, 10, 28), date(2025, 10, 16)]
+    db.upsert_publications(pg_conn, dates, "46930")
+
+    with NotificationDispatcher(digest=False, log_to_db=False) as n:
+        n.notify(dates, "46930")
+        n.write_log(pg_conn)
+
+    rows = pg_conn.execute(
+        "SELECT publication_date, search_term, email_to, status FROM notifications_log ORDER BY publication_date"
+    ).fetchall()
+    assert rows == [
+        (date(2025, 10, 16), "46930", "a@example.com, b@example.com", "sent"),
+        (date(2025, 10, 28), "46930", "a@example.com, b@example.com", "sent"),
+    ]
@@ -0,0 +1,124 @@
+"""
+Testes da fila de notificações (outbox) — requer POSTGRES_TEST_DSN
+"""
+
+from datetime import date
+
+import psycopg
+import pytest
+
+import db
+import outbox
+from notifier import NotificationDispatcher
+
+DATES = [date(2025, 10, 28), date(2025, 10, 16)]
+
+
+def pending(conn):
+    return conn.execute("SELECT COUNT(*) FROM notification_outbox WHERE sent_at IS NULL").fetchone()[0]
+
+
+@pytest.fixture
+def other_conn(pg_conn):
+    """Segunda conexão no mesmo schema temporário (simula outro worker)"""
+    schema = pg_conn.execute("SHOW search_path").fetchone()[0]
+    conn = psycopg.connect(pg_conn.info.dsn, password=pg_conn.info.password)
+    conn.execute(f"SET search_path TO {schema}")
+    conn.commit()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def test_datas_novas_sao_enfileiradas_na_mesma_transacao(pg_conn):
+    assert db.upsert_publications(pg_conn, DATES, "46930", enqueue=True) == DATES
+    assert db.upsert_publications(pg_conn, DATES + [date(2025, 11, 5)], "46930", enqueue=True) == [date(2025, 11, 5)]
+
+    assert pending(pg_conn) == 3
+
+
+def test_worker_envia_e_marca_como_enviado(pg_conn, smtp_server):
+    db.upsert_publications(pg_conn, DATES, "46930", {DATES[0]: "DECRETO Nº 46930"}, enqueue=True)
+
+    with NotificationDispatcher(digest=False, log_to_db=False) as notifier:
+        assert outbox.drain_outbox(pg_conn, notifier) == 2
+        assert outbox.drain_outbox(pg_conn, notifier) == 0
+
+    assert pending(pg_conn) == 0
+    assert len(smtp_server.messages) == 1
+    assert "Message-ID: <outbox-" in smtp_server.messages[0]
+    assert "28/10/2025" in smtp_server.messages[0]
+
+
+def test_linhas_reservadas_sao_puladas_por_outro_worker(pg_conn, other_conn, smtp_server):
+    db.upsert_publications(pg_conn, DATES, "46930", enqueue=True)
+
+    # Outro worker reservou o lote e ainda não fez commit
+    other_conn.execute(outbox.CLAIM_OUTBOX_SQL, (outbox.OUTBOX_MAX_ATTEMPTS, 100)).fetchall()
+
+    with NotificationDispatcher(digest=False, log_to_db=False) as notifier:
+        assert outbox.drain_outbox(pg_conn, notifier) == 0
+    other_conn.rollback()
+
+    assert smtp_server.messages == []
+    assert pending(pg_conn) == 2
+
+
+def test_falha_agenda_nova_tentativa(pg_conn, smtp_server):
+    db.upsert_publications(pg_conn, DATES, "46930", enqueue=True)
+    smtp_server.fail_first = 10
+
+    with NotificationDispatcher(digest=False, max_retries=1, log_to_db=False) as notifier:
+        assert outbox.drain_outbox(pg_conn, notifier) == 2
+        # A próxima tentativa fica para depois: nada a reenviar agora
+        assert outbox.drain_outbox(pg_conn, notifier) == 0
+
+    attempts, last_error = pg_conn.execute(
+        "SELECT MAX(attempts), MAX(last_error) FROM notification_outbox WHERE sent_at IS NULL"
+    ).fetchone()
+    assert pending(pg_conn) == 2
+    assert attempts == 1 and "421" in last_error
+
+
+class CrashingNotifier:
+    """Envia o e-mail e "cai" antes de o worker registrar o envio"""
+
+    def __init__(self, notifier):
+        self.notifier = notifier
+
+    def notify(self, *args, **kwargs):
+        self.notifier.notify(*args, **kwargs)
+        raise KeyboardInterrupt
+
+    def flush(self):
+        return []
+
+
+def test_envio_interrompido_nao_e_reenviado_sozinho(pg_conn, smtp_server):
+    db.upsert_publications(pg_conn, DATES, "46930", enqueue=True)
+
+    with NotificationDispatcher(digest=False, log_to_db=False) as notifier:
+        with pytest.raises(KeyboardInterrupt):
+            outbox.drain_outbox(pg_conn, CrashingNotifier(notifier))
+        assert len(smtp_server.messages) == 1
+
+        # Próximas execuções: o lote não volta sozinho para a fila
+        assert outbox.drain_outbox(pg_conn, notifier) == 0
+        assert outbox.flag_interrupted(pg_conn, timeout=0) != []
+        assert outbox.flag_interrupted(pg_conn, timeout=0) == []  # sinalizado uma vez só
+        assert outbox.drain_outbox(pg_conn, notifier) == 0
+        assert len(smtp_server.messages) == 1
+        last_error = pg_conn.execute("SELECT MAX(last_error) FROM notification_outbox").fetchone()[0]
+        assert last_error == outbox.INTERRUPTED_ERROR
+
+        # Reenvio pedido pelo operador: mesmo Message-ID do envio interrompido
+        assert len(outbox.requeue_interrupted(pg_conn, timeout=0)) == 2
+        assert outbox.drain_outbox(pg_conn, notifier) == 2
+
+    assert pending(pg_conn) == 0
+    first_id, second_id = (
+        next(line for line in message.splitlines() if line.startswith("Message-ID"))
+        for message in smtp_server.messages
+    )
+    assert first_id == second_id
@@ -0,0 +1,116 @@
+"""
+Testes do arquivo de páginas (compressão, deduplicação, gravação em segundo plano e retenção)
+"""
+
+import gzip
+import os
+import time
+
+import page_archive
+from page_archive import PageArchive, export_pages
+
+PAGE = "<html><body><table><tbody><tr><td>28/10/2025</td></tr></tbody></table></body></html>" * 50
+
+
+def test_paginas_iguais_sao_gravadas_uma_vez(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    archive.begin_run("20251028-092000-1")
+    archive.save("46930", 1, PAGE)
+    archive.save("historico", 1, PAGE)
+    archive.save("historico", 2, PAGE + "<!-- p2 -->")
+    assert archive.end_run()
+
+    entries = archive.entries("20251028-092000-1")
+    assert [(e["term"], e["page"]) for e in entries] == [("46930", 1), ("historico", 1), ("historico", 2)]
+    assert entries[0]["sha256"] == entries[1]["sha256"] != entries[2]["sha256"]
+
+    objects = list(tmp_path.glob("objects/*/*.html.gz"))
+    assert len(objects) == 2
+    path = archive.object_path(entries[0]["sha256"])
+    assert os.path.getsize(path) < len(PAGE) / 10
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert f.read() == PAGE
+    assert [p["html"] for p in archive.iter_pages("20251028-092000-1", "historico")][1].endswith("<!-- p2 -->")
+
+
+def test_paginas_que_so_mudam_o_token_de_sessao_sao_gravadas_uma_vez(tmp_path):
+    def page(token):
+        return PAGE.replace("<td>28/10/2025</td>", f'<td><a href="mostra_edicao.php?session={token}">28/10/2025</a></td>')
+
+    archive = PageArchive(str(tmp_path))
+    archive.begin_run("20251028-092000-1")
+    archive.save("46930", 1, page("VFdwak1FMVVSVEZO"))
+    archive.save("46930", 1, page("TlRFMVRsUkZNRTFV"))
+    assert archive.end_run()
+
+    assert len(list(tmp_path.glob("objects/*/*.html.gz"))) == 1
+    entries = archive.entries("20251028-092000-1")
+    with gzip.open(archive.object_path(entries[1]["sha256"]), "rt", encoding="utf-8") as f:
+        assert f.read() == page("VFdwak1FMVVSVEZO")  # conteúdo original, com o token
+
+
+def test_gravacao_nao_bloqueia_e_descarta_com_a_fila_cheia(tmp_path, monkeypatch):
+    archive = PageArchive(str(tmp_path), queue_size=2)
+    slow_write = archive._write_page
+
+    def write_page(*args):
+        time.sleep(0.2)
+        slow_write(*args)
+
+    monkeypatch.setattr(archive, "_write_page", write_page)
+    start = time.perf_counter()
+    for page_number in range(1, 6):
+        archive.save("46930", page_number, f"{PAGE}{page_number}")
+    assert time.perf_counter() - start < 0.1
+    assert archive.dropped >= 2
+    assert archive.end_run(timeout=5)
+
+
+def test_retencao_por_execucoes(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_archive, "GRACE_SECONDS", 0)
+    archive = PageArchive(str(tmp_path), max_runs=2)
+    for run in range(3):
+        archive.begin_run(f"2025102{run}-090000-1")
+        archive.save("46930", 1, PAGE)  # página repetida em todas as execuções
+        archive.save("46930", 2, f"{PAGE}{run}")
+        archive.end_run()
+
+    assert archive.runs() == ["20251021-090000-1", "20251022-090000-1"]
+    # Só as páginas das execuções mantidas: a comum e uma por execução
+    assert len(list(tmp_path.glob("objects/*/*.html.gz"))) == 3
+
+
+def test_retencao_por_tamanho(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_archive, "GRACE_SECONDS", 0)
+    archive = PageArchive(str(tmp_path), max_runs=10, max_bytes=1)
+    for run in range(3):
+        archive.begin_run(f"2025102{run}-090000-1")
+        archive.save("46930", 1, f"{PAGE}{run}")
+        archive.end_run()
+
+    # A execução mais recente é sempre mantida, mesmo acima do limite
+    assert archive.runs() == ["20251022-090000-1"]
+    assert len(list(tmp_path.glob("objects/*/*.html.gz"))) == 1
+
+
+def test_paginas_recentes_fora_do_manifesto_nao_sao_removidas(tmp_path):
+    archive = PageArchive(str(tmp_path), max_runs=1)
+    archive.begin_run("20251020-090000-1")
+    archive.save("46930", 1, PAGE)
+    archive.end_run()
+    os.remove(tmp_path / "runs" / "20251020-090000-1.jsonl")
+    archive.prune()
+    assert len(list(tmp_path.glob("objects/*/*.html.gz"))) == 1
+
+
+def test_exporta_as_paginas_de_uma_execucao(tmp_path):
+    archive = PageArchive(str(tmp_path / "arquivo"))
+    archive.begin_run("20251028-092000-1")
+    archive.save("receita e despesa", 1, PAGE)
+    archive.save("46930", 1, PAGE)
+    archive.end_run()
+
+    paths = export_pages(archive, "20251028-092000-1", str(tmp_path / "paginas"), "receita e despesa")
+    assert [os.path.basename(p) for p in paths] == ["receita_e_despesa_p1.html"]
+    with open(paths[0], encoding="utf-8") as f:
+        assert f.read() == PAGE
@@ -0,0 +1,82 @@
+"""
+Testes da impressão digital das páginas de resultados
+"""
+
+import os
+
+import pytest
+
+from doerj_stub_server import FIXTURES_DIR
+from page_fingerprint import PageFingerprintStore, extract_result_rows
+
+NEW_ROW = """
+      <tr>
+        <td>05/11/2025</td>
+        <td><a href="mostra_edicao.php?session=nova">DECRETO Nº 46930 - NOVA ALTERAÇÃO</a></td>
+        <td>Parte I - Poder Executivo</td>
+      </tr>"""
+
+
+@pytest.fixture
+def page_html():
+    with open(os.path.join(FIXTURES_DIR, "busca_resultados.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extrai_linhas_da_tabela(page_html):
+    assert len(extract_result_rows(page_html)) == 8
+
+
+def test_pagina_inalterada_e_ignorada(page_html):
+    store = PageFingerprintStore()
+    assert store.check("46930", page_html) == page_html
+    store.confirm("46930")
+
+    assert store.check("46930", page_html) is None
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_token_de_sessao_nao_altera_a_impressao_digital(page_html):
+    store = PageFingerprintStore()
+    store.check("46930", page_html)
+    store.confirm("46930")
+
+    assert store.check("46930", page_html.replace("session=", "session=outro")) is None
+
+
+def test_pagina_alterada_retorna_so_as_linhas_novas(page_html):
+    store = PageFingerprintStore()
+    store.check("46930", page_html)
+    store.confirm("46930")
+
+    changed = page_html.replace("<tbody>", "<tbody>" + NEW_ROW, 1)
+    delta = store.check("46930", changed)
+
+    assert "05/11/2025" in delta
+    assert "28/10/2025" not in delta
+    assert store.compare("46930", changed)[1] is True
+
+
+def test_pagina_so_com_linhas_novas_nao_alcanca_linhas_vistas(page_html):
+    store = PageFingerprintStore()
+    store.check("46930", "<table><tbody>" + NEW_ROW + "</tbody></table>")
+    store.confirm("46930")
+
+    assert store.compare("46930", page_html) == (page_html, False)
+
+
+def test_sem_confirmacao_o_termo_e_reprocessado(page_html):
+    store = PageFingerprintStore()
+    store.check("46930", page_html)
+
+    assert store.check("46930", page_html) == page_html
+
+
+def test_persistencia_em_disco(page_html, tmp_path):
+    path = str(tmp_path / "page_fingerprints.json")
+    store = PageFingerprintStore(path)
+    store.check("46930", page_html)
+    store.confirm("46930")
+    store.save()
+
+    assert PageFingerprintStore(path).check("46930", page_html) is None
@@ -0,0 +1,163 @@
+"""
+Testes da paginação dos resultados (crawl com parada antecipada)
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+import busca_decreto_receita_despesa as scraper
+import db
+import known_dates_cache
+import page_archive
+from doerj_http import iter_result_pages_http
+from doerj_stub_server import FIXTURES_DIR, start_stub_server
+from known_dates_cache import KnownDatesCache, _NoCache
+from page_fingerprint import PageFingerprintStore
+from results_parser import find_next_page_url
+
+
+@pytest.fixture
+def stub():
+    server, url = start_stub_server()
+    try:
+        yield url, server.RequestHandlerClass.served
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def crawler(stub, monkeypatch):
+    """Scraper apontado para o servidor local, com cache de datas e impressões digitais em memória"""
+    url, served = stub
+    known_dates = KnownDatesCache()
+    known_dates.add("historico", [])  # termo já carregado, sem datas gravadas
+    monkeypatch.setattr(scraper, "DIARIO_URL", url)
+    monkeypatch.setattr(scraper, "FETCH_ENGINE", "http")
+    monkeypatch.setattr(scraper, "get_page_archive", lambda: page_archive._NoArchive())
+    monkeypatch.setattr(scraper, "get_known_dates_cache", lambda: known_dates)
+    monkeypatch.setattr(scraper, "get_fingerprint_store", lambda: PageFingerprintStore())
+    return known_dates, served
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_link_da_proxima_pagina():
+    base = "http://127.0.0.1/busca_do.php?acao=busca"
+
+    assert find_next_page_url(read_fixture("resultados_historico.html"), base) == (
+        "http://127.0.0.1/busca_do.php?acao=busca&textobusca=historico&pagina=2"
+    )
+    assert find_next_page_url(read_fixture("resultados_historico_p2.html"), base).endswith("pagina=3")
+    assert find_next_page_url(read_fixture("resultados_historico_p3.html"), base) is None
+    assert find_next_page_url(read_fixture("busca_resultados.html"), base) is None
+
+
+@pytest.mark.parametrize("page_html, expected", [
+    ('<div class="paginacao"><a href="p2">Próxima&nbsp;&raquo;</a></div>', "p2"),
+    ('<ul class="pagination"><li><a href="p2">&gt;</a></li></ul>', "p2"),
+    ('<a href="p2" rel="next">2</a>', "p2"),
+    # Fora do bloco de paginação, o rótulo não vale
+    ('<a href="agenda">Próxima</a><div class="paginacao"><span>Página 1 de 1</span></div>', None),
+    ('<a href="agenda">Próximos eventos</a>', None),
+    ('<div class="paginacao"><a href="eventos">Próximos eventos</a></div>', None),
+    ('<div class="paginacao"><a href="ultima">&raquo;&raquo;</a> <a href="fim">&gt;&gt;</a></div>', None),
+])
+def test_link_da_proxima_pagina_so_no_bloco_de_paginacao(page_html, expected):
+    assert find_next_page_url(page_html) == expected
+
+
+def test_percorre_todas_as_paginas(stub):
+    url, _ = stub
+    pages = list(iter_result_pages_http("historico", url, max_pages=10, prefetch_from=1))
+
+    assert len(pages) == 3
+    assert "11/11/2024" in pages[2]
+
+
+def test_limite_de_paginas(stub):
+    url, _ = stub
+    assert len(list(iter_result_pages_http("historico", url, max_pages=2))) == 2
+
+
+def test_termo_novo_le_todo_o_historico(crawler):
+    publications = scraper.collect_term("historico")
+
+    assert len(publications) == 9
+    assert min(publications) == date(2024, 2, 3)
+
+
+def test_para_na_pagina_com_data_ja_gravada(crawler):
+    known_dates, served = crawler
+    known_dates.add("historico", [date(2025, 3, 5)])
+
+    publications = scraper.collect_term("historico")
+
+    assert date(2025, 1, 14) in publications
+    assert date(2024, 11, 11) not in publications
+    assert publications[date(2025, 6, 10)] == "DECRETO Nº 45000 - PUBLICAÇÃO 2.1"
+
+
+def test_data_conhecida_na_primeira_pagina_nao_busca_as_demais(crawler):
+    known_dates, served = crawler
+    known_dates.add("historico", [date(2025, 8, 2)])
+
+    assert len(scraper.collect_term("historico")) == 3
+    assert [f for f in served if f.startswith("resultados_")] == ["resultados_historico.html"]
+
+
+def test_sem_cache_de_datas_a_parada_consulta_o_banco(crawler, pg_conn, monkeypatch):
+    db.upsert_publications(pg_conn, [date(2025, 3, 5)], "historico")
+
+    @contextmanager
+    def connection():
+        yield pg_conn
+
+    monkeypatch.setattr(known_dates_cache.db, "connection", connection)
+    monkeypatch.setattr(scraper, "get_known_dates_cache", lambda: _NoCache())
+
+    publications = scraper.collect_term("historico")
+
+    assert date(2025, 1, 14) in publications
+    assert date(2024, 11, 11) not in publications
+
+
+def test_primeira_pagina_so_com_linhas_novas_continua_a_busca(crawler, monkeypatch):
+    _, served = crawler
+    # Última execução viu só linhas mais antigas (as da página 3)
+    store = PageFingerprintStore()
+    store.check("historico", read_fixture("resultados_historico_p3.html"))
+    store.confirm("historico")
+    monkeypatch.setattr(scraper, "get_fingerprint_store", lambda: store)
+
+    publications = scraper.collect_term("historico")
+
+    assert "resultados_historico_p2.html" in served
+    assert date(2025, 1, 14) in publications  # da página 2
+    assert len(publications) == 9
+
+
+def test_backfill_ignora_datas_ja_gravadas(crawler):
+    import backfill
+
+    known_dates, _ = crawler
+    known_dates.add("historico", [date(2025, 8, 2)])
+
+    assert len(backfill.crawl_history("historico", max_pages=10)) == 9
+
+
+def test_paginacao_que_repete_a_pagina_nao_entra_em_laco(stub, monkeypatch):
+    url, _ = stub
+    # Site que ignora o parâmetro "pagina" e sempre devolve a primeira página
+    monkeypatch.setattr(
+        "doerj_stub_server.DoerjStubHandler._results_for",
+        lambda self, term, page=1: "resultados_historico.html",
+    )
+
+    assert len(list(iter_result_pages_http("historico", url, max_pages=50))) == 2
@@ -0,0 +1,87 @@
+"""
+Testes do plano de consultas adaptativo (janelas por termo a partir de first_seen_at)
+"""
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import db
+from polling_plan import PollingPlan, build_term_plans, hot_slots
+
+TZ = ZoneInfo("America/Sao_Paulo")
+
+
+def dia_util(d: date) -> bool:
+    return d.weekday() < 5
+
+
+def historico():
+    # "46930" sai às terças e quintas por volta das 10h; "raro" apareceu uma vez
+    eventos = []
+    for semana in range(6):
+        terca = datetime(2025, 9, 2, 10, 5, tzinfo=TZ) + timedelta(weeks=semana)
+        eventos.append(("46930", terca))
+        eventos.append(("46930", terca + timedelta(days=2, minutes=20)))
+    eventos.append(("46930", datetime(2025, 9, 5, 17, 0, tzinfo=TZ)))
+    eventos.append(("raro", datetime(2025, 9, 3, 15, 0, tzinfo=TZ)))
+    return eventos
+
+
+def test_build_term_plans_aprende_dias_e_horas():
+    planos = build_term_plans(historico(), TZ)
+
+    assert planos["46930"].weekdays == {1, 3}
+    assert planos["46930"].hours == {10}
+    assert planos["46930"].is_hot
+    assert not planos["raro"].is_hot
+
+
+def test_hot_slots():
+    assert hot_slots({10}, 20) == [time(10, 0), time(10, 20), time(10, 40)]
+
+
+def test_next_poll_consulta_so_termo_quente_na_janela():
+    plano = PollingPlan(build_term_plans(historico(), TZ), [time(9, 20)], dia_util, TZ, interval_min=30)
+    termos = ["46930", "raro", "sem_historico"]
+
+    # Terça-feira: horário base (todos) e depois a janela do termo quente
+    agora = datetime(2025, 10, 14, 8, 0, tzinfo=TZ)
+    assert plano.next_poll(agora, termos) == (datetime(2025, 10, 14, 9, 20, tzinfo=TZ), termos)
+    agora = datetime(2025, 10, 14, 9, 20, tzinfo=TZ)
+    assert plano.next_poll(agora, termos) == (datetime(2025, 10, 14, 10, 0, tzinfo=TZ), ["46930"])
+
+    # Quarta-feira não está na janela: só o horário base
+    agora = datetime(2025, 10, 14, 11, 0, tzinfo=TZ)
+    assert plano.next_poll(agora, termos) == (datetime(2025, 10, 15, 9, 20, tzinfo=TZ), termos)
+
+
+def test_next_poll_ignora_termo_quente_fora_da_configuracao():
+    plano = PollingPlan(build_term_plans(historico(), TZ), [time(9, 20)], dia_util, TZ)
+    agora = datetime(2025, 10, 14, 9, 30, tzinfo=TZ)
+    assert plano.next_poll(agora, ["raro"]) == (datetime(2025, 10, 15, 9, 20, tzinfo=TZ), ["raro"])
+
+
+def test_polls_per_week_menor_que_intervalo_fixo():
+    termos = ["46930", "raro", "sem_historico"]
+    plano = PollingPlan(build_term_plans(historico(), TZ), [time(9, 20)], dia_util, TZ, interval_min=15)
+    fixo_a_cada_15_min = PollingPlan({}, [time(h, m) for h in range(8, 20) for m in (0, 15, 30, 45)],
+                                     dia_util, TZ)
+    semana = date(2025, 10, 13)
+
+    # 5 dias × 3 termos no horário base + 2 dias × 4 consultas do termo quente
+    assert plano.polls_per_week(termos, semana) == 15 + 8
+    assert plano.polls_per_week(termos, semana) < fixo_a_cada_15_min.polls_per_week(termos, semana)
+
+
+def test_fetch_publication_history(pg_conn):
+    db.upsert_publications(pg_conn, [date(2025, 10, 28)], "46930")
+    pg_conn.execute(
+        "UPDATE decree_publications SET first_seen_at = NOW() - INTERVAL '400 days' WHERE publication_date = %s",
+        (date(2025, 10, 28),),
+    )
+    db.upsert_publications(pg_conn, [date(2025, 10, 16)], "46930")
+    pg_conn.commit()
+
+    history = db.fetch_publication_history(pg_conn, 180)
+    assert [term for term, _ in history] == ["46930"]
+    assert history[0][1].tzinfo is not None
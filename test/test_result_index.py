@@ -0,0 +1,126 @@
+"""
+Testes do índice local de resultados (normalização, Aho-Corasick e busca no PostgreSQL)
+"""
+
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+import busca_decreto_receita_despesa as scraper
+import result_index
+from result_index import ResultIndex, TermMatcher, normalize_text
+from results_parser import Publication
+
+
+def test_normalize_text():
+    assert normalize_text("Decreto nº 46.930, de 2020 — ALTERAÇÃO") == "decreto no 46930 de 2020 alteracao"
+    assert normalize_text("01.02.2025") == "01 02 2025"
+    assert normalize_text(None) == ""
+
+
+def test_matcher_encontra_varios_termos_em_uma_passada():
+    matcher = TermMatcher(["46930", "Histórico", "receita e despesa", "crédito"])
+    text = "Decreto nº 46.930 - Receita e Despesa; histórico de créditos"
+    assert matcher.search(text) == {"46930", "Histórico", "receita e despesa"}
+
+
+def test_matcher_casa_somente_palavras_inteiras():
+    matcher = TermMatcher(["4693", "693", "decreto"])
+    assert matcher.search("Decreto 46930") == {"decreto"}
+    assert matcher.search("decretos 4693") == {"4693"}
+    assert TermMatcher([]).search("qualquer texto") == set()
+
+
+def test_matcher_com_padroes_sobrepostos():
+    matcher = TermMatcher(["ab", "abc", "b c", "c"])
+    assert matcher.search("ab c abc") == {"ab", "abc", "c"}
+    assert matcher.search("x b c") == {"b c", "c"}
+
+
+def rows(*titles, day=28):
+    return [(date(2025, 10, day), Publication(f"{day}/10/2025", title, "Poder Executivo", None)) for title in titles]
+
+
+@pytest.fixture
+def index(pg_conn, monkeypatch):
+    @contextmanager
+    def connection():
+        yield pg_conn
+
+    monkeypatch.setattr(result_index.db, "connection", connection)
+    return ResultIndex(["46930", "historico", "receita"])
+
+
+def test_linhas_novas_sao_entregues_aos_outros_termos(index):
+    index.stage("46930", rows("Decreto 46.930 - histórico da receita", "Decreto 46.930"))
+    hits = index.ingest("46930")
+    assert hits == {
+        "historico": {date(2025, 10, 28): "Decreto 46.930 - histórico da receita"},
+        "receita": {date(2025, 10, 28): "Decreto 46.930 - histórico da receita"},
+    }
+
+    # A mesma linha trazida por outro termo já está no índice: nada de novo
+    index.stage("historico", rows("Decreto 46.930 - histórico da receita"))
+    assert index.ingest("historico") == {}
+
+
+def test_mesma_linha_com_outro_token_de_sessao(index, pg_conn):
+    def row(token):
+        url = f"https://www.ioerj.com.br/portal/modules/conteudoonline/mostra_edicao.php?session={token}"
+        return [(date(2025, 10, 28), Publication("28/10/2025", "Decreto 46.930", "Poder Executivo", url))]
+
+    index.stage("46930", row("VFdwak1FMVVSVEZO"))
+    index.ingest("46930")
+    index.stage("46930", row("TlRFMVRsUkZNRTFV"))
+    index.ingest("46930")
+
+    assert pg_conn.execute("SELECT count(*) FROM result_index").fetchone()[0] == 1
+
+
+def test_termos_respondidos_pelo_indice(index):
+    index.stage("46930", rows("Decreto 46.930 - histórico", day=20) + rows("Decreto 46.930", day=28))
+    index.ingest("46930")
+
+    found = index.lookup(["46930", "histórico", "inexistente"], today=date(2025, 11, 1))
+    assert found == {
+        "46930": {date(2025, 10, 28): "Decreto 46.930", date(2025, 10, 20): "Decreto 46.930 - histórico"},
+        "histórico": {date(2025, 10, 20): "Decreto 46.930 - histórico"},
+    }
+    assert index.lookup(["46930"], today=date(2027, 1, 1)) == {}
+
+
+def test_indice_indisponivel_nao_interrompe(monkeypatch):
+    @contextmanager
+    def broken():
+        raise RuntimeError("banco fora do ar")
+        yield
+
+    monkeypatch.setattr(result_index.db, "connection", broken)
+    index = ResultIndex(["46930"])
+    index.stage("46930", rows("Decreto 46.930"))
+    assert index.ingest("46930") == {}
+    assert index.lookup(["46930"]) == {}
+
+
+def test_run_terms_entrega_linhas_de_um_termo_ao_outro(index, monkeypatch):
+    published = {}
+
+    def fake_collect(term, driver_pool=None):
+        if term == "46930":
+            index.stage(term, rows("Decreto 46.930 - receita"))
+            return {date(2025, 10, 28): "Decreto 46.930 - receita"}
+        return {}
+
+    monkeypatch.setattr(scraper, "MAX_WORKERS", 1)
+    monkeypatch.setattr(scraper, "get_result_index", lambda: index)
+    monkeypatch.setattr(scraper, "collect_term", fake_collect)
+    monkeypatch.setattr(
+        scraper, "publish_term", lambda publications, term, notifier=None: published.setdefault(term, publications)
+    )
+
+    assert scraper.run_terms(["46930", "receita"], driver_pool=None) == []
+    assert published == {
+        "46930": {date(2025, 10, 28): "Decreto 46.930 - receita"},
+        "receita": {date(2025, 10, 28): "Decreto 46.930 - receita"},
+    }
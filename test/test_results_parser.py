@@ -0,0 +1,64 @@
+"""
+Testes do parser da tabela de resultados
+"""
+
+import os
+from datetime import date
+
+import pytest
+
+from busca_decreto_receita_despesa import extract_date_strings
+from doerj_stub_server import FIXTURES_DIR
+from notifier import build_email_message
+from results_parser import iter_publications, parse_publications, titles_by_date
+
+
+@pytest.fixture
+def page_html():
+    with open(os.path.join(FIXTURES_DIR, "busca_resultados.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_le_so_as_linhas_da_tabela(page_html):
+    records = parse_publications(page_html)
+
+    assert len(records) == 8
+    # A data do cabeçalho da página não é uma publicação
+    assert "02/11/2025" not in [r.date for r in records]
+    assert "02/11/2025" not in extract_date_strings(page_html)
+
+
+def test_registro_tem_titulo_secao_e_link(page_html):
+    first = parse_publications(page_html, "https://www.ioerj.com.br/portal/modules/conteudoonline/busca_do.php")[0]
+
+    assert first.date == "28/10/2025"
+    assert first.title.startswith("DECRETO Nº 46930 DE 05 DE FEVEREIRO DE 2020")
+    assert first.section == "Parte I - Poder Executivo"
+    assert first.url.startswith("https://www.ioerj.com.br/portal/modules/conteudoonline/mostra_edicao.php?session=")
+    with pytest.raises(AttributeError):
+        first.extra = 1
+
+
+def test_leitura_em_pedacos_equivale_a_pagina_inteira(page_html):
+    chunks = [page_html[i:i + 37] for i in range(0, len(page_html), 37)]
+
+    streamed = [(r.date, r.title, r.url) for r in iter_publications(chunks)]
+
+    assert streamed == [(r.date, r.title, r.url) for r in parse_publications(page_html)]
+
+
+def test_titulos_agrupados_por_data(page_html):
+    titles = titles_by_date(parse_publications(page_html))
+
+    assert len(titles) == 7
+    assert titles["06/10/2025"] == "DECRETO Nº 46930 - ANEXO ÚNICO ATUALIZADO | ERRATA - DECRETO Nº 46930"
+
+
+def test_pagina_sem_tabela_usa_a_busca_na_pagina_inteira():
+    assert extract_date_strings("<p>Publicado em 01/02/2025</p>") == ["01/02/2025"]
+
+
+def test_email_inclui_o_titulo():
+    msg = build_email_message([date(2025, 10, 28)], "46930", {date(2025, 10, 28): "DECRETO <A&B>"})
+
+    assert "28/10/2025 — DECRETO &lt;A&amp;B&gt;" in msg.get_content()
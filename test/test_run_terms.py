@@ -0,0 +1,39 @@
+"""
+Testes da orquestração dos termos (sequencial e paralela)
+"""
+
+import pytest
+
+import busca_decreto_receita_despesa as scraper
+
+
+@pytest.fixture(params=[1, 4], ids=["sequencial", "paralelo"])
+def workers(request, monkeypatch):
+    monkeypatch.setattr(scraper, "MAX_WORKERS", request.param)
+    return request.param
+
+
+def test_falha_de_um_termo_nao_interrompe_os_demais(workers, monkeypatch):
+    published = []
+
+    def fake_collect(term, driver_pool=None):
+        if term == "ruim":
+            raise RuntimeError("site fora do ar")
+        return [f"data-{term}"]
+
+    monkeypatch.setattr(scraper, "collect_term", fake_collect)
+    monkeypatch.setattr(scraper, "publish_term", lambda dates, term, notifier=None: published.append(term))
+
+    failed = scraper.run_terms(["a", "ruim", "b", "c"], driver_pool=None)
+
+    assert failed == ["ruim"]
+    assert sorted(published) == ["a", "b", "c"]
+
+
+def test_termo_sem_datas_nao_chega_ao_banco(workers, monkeypatch):
+    published = []
+    monkeypatch.setattr(scraper, "collect_term", lambda term, driver_pool=None: [])
+    monkeypatch.setattr(scraper, "publish_term", lambda dates, term, notifier=None: published.append(term))
+
+    assert scraper.run_terms(["a", "b"], driver_pool=None) == []
+    assert published == []
@@ -0,0 +1,46 @@
+"""
+Testes do cálculo dos horários do scheduler (dias úteis, vários horários e intervalo)
+"""
+
+from datetime import datetime, time
+
+import scheduler
+from scheduler import TZ, gerar_horarios, proxima_execucao
+
+
+def test_gerar_horarios_lista_fixa_ordenada():
+    assert gerar_horarios("13:00, 09:20,13:00", 0) == [time(9, 20), time(13, 0)]
+
+
+def test_gerar_horarios_intervalo_na_janela():
+    slots = gerar_horarios("09:20", 90, "08:00-12:00")
+    assert slots == [time(8, 0), time(9, 30), time(11, 0)]
+
+
+def test_proximo_horario_no_mesmo_dia(monkeypatch):
+    monkeypatch.setattr(scheduler, "JITTER_SEG", 0)
+    slots = [time(9, 20), time(13, 0)]
+    # Quarta-feira, entre os dois horários
+    agora = datetime(2025, 10, 15, 10, 0, tzinfo=TZ)
+    assert proxima_execucao(agora, slots) == datetime(2025, 10, 15, 13, 0, tzinfo=TZ)
+
+
+def test_sexta_a_noite_pula_para_segunda(monkeypatch):
+    monkeypatch.setattr(scheduler, "JITTER_SEG", 0)
+    agora = datetime(2025, 10, 17, 20, 0, tzinfo=TZ)
+    assert proxima_execucao(agora, [time(9, 20)]) == datetime(2025, 10, 20, 9, 20, tzinfo=TZ)
+
+
+def test_pula_feriado(monkeypatch):
+    monkeypatch.setattr(scheduler, "JITTER_SEG", 0)
+    # Natal (quinta-feira) → sexta-feira
+    agora = datetime(2025, 12, 24, 18, 0, tzinfo=TZ)
+    assert proxima_execucao(agora, [time(9, 20)]) == datetime(2025, 12, 26, 9, 20, tzinfo=TZ)
+
+
+def test_jitter_atrasa_no_maximo_o_configurado(monkeypatch):
+    monkeypatch.setattr(scheduler, "JITTER_SEG", 120)
+    agora = datetime(2025, 10, 15, 8, 0, tzinfo=TZ)
+    base = datetime(2025, 10, 15, 9, 20, tzinfo=TZ)
+    proxima = proxima_execucao(agora, [time(9, 20)])
+    assert 0 <= (proxima - base).total_seconds() <= 120
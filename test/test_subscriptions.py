@@ -0,0 +1,130 @@
+"""
+Testes das assinaturas por destinatário (carga do banco, recarga sem reinício,
+destinatários por termo no resumo e intervalo mínimo entre consultas)
+"""
+
+from datetime import date, datetime, timedelta
+
+import notifier
+import scheduler
+import subscriptions
+from notifier import NotificationDispatcher, group_by_recipients
+from subscriptions import SubscriptionRegistry, build_subscriptions
+
+ROWS = [
+    ("46930", "orcamento@example.com", 5, 30),
+    ("historico", "juridico@example.com", 0, None),
+    ("46930", "juridico@example.com", 1, 120),
+    ("receita e despesa", "orcamento@example.com", 0, 60),
+]
+
+
+def insert(conn, rows):
+    conn.execute(
+        "INSERT INTO term_subscriptions (search_term, recipient, priority, interval_min) "
+        "SELECT * FROM unnest(%s::varchar[], %s::text[], %s::smallint[], %s::int[])",
+        [list(column) for column in zip(*rows)],
+    )
+    conn.commit()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_consolida_as_assinaturas_por_termo():
+    by_term = build_subscriptions(ROWS)
+    assert list(by_term) == ["46930", "historico", "receita e despesa"]
+    assert by_term["46930"].recipients == ["orcamento@example.com", "juridico@example.com"]
+    assert (by_term["46930"].priority, by_term["46930"].interval_min) == (5, 30)
+    assert by_term["historico"].interval_min is None
+
+
+def test_carrega_e_recarrega_quando_a_tabela_muda(pg_conn, monkeypatch):
+    monkeypatch.setenv("SEARCH_TERMS", "env")
+    monkeypatch.setenv("EMAIL_RECIPIENTS", "env@example.com")
+    clock = Clock()
+    registry = SubscriptionRegistry(reload_interval=60, clock=clock)
+
+    # Tabela vazia: vale a configuração do .env
+    registry.refresh(conn=pg_conn)
+    assert registry.terms() == ["env"]
+
+    insert(pg_conn, ROWS)
+    registry.refresh(conn=pg_conn)  # ainda dentro do intervalo: nada muda
+    assert registry.terms() == ["env"]
+
+    clock.now = 61
+    registry.refresh(conn=pg_conn)
+    assert registry.terms() == ["46930", "historico", "receita e despesa"]
+    assert registry.recipients("historico") == ["juridico@example.com"]
+    assert registry.recipients("sem assinatura") == ["env@example.com"]
+
+    pg_conn.execute("UPDATE term_subscriptions SET active = FALSE WHERE search_term = 'historico'")
+    pg_conn.commit()
+    registry.refresh(force=True, conn=pg_conn)
+    assert registry.terms() == ["46930", "receita e despesa"]
+
+
+def test_banco_indisponivel_mantem_as_assinaturas_carregadas(monkeypatch):
+    registry = SubscriptionRegistry(reload_interval=0)
+    registry._by_term = build_subscriptions(ROWS)
+
+    class Broken:
+        def cursor(self):
+            raise RuntimeError("conexão perdida")
+
+    registry.refresh(conn=Broken())
+    assert registry.terms() == ["46930", "historico", "receita e despesa"]
+
+
+def test_resumo_separado_por_grupo_de_destinatarios(smtp_server, monkeypatch):
+    registry = SubscriptionRegistry()
+    registry._by_term = build_subscriptions(ROWS)
+    registry._checked_at = float("inf")  # sem recarga durante o teste
+    monkeypatch.setattr(notifier, "get_subscriptions", lambda: registry)
+
+    assert group_by_recipients(["46930", "historico", "receita e despesa"]) == {
+        ("orcamento@example.com",): ["46930", "receita e despesa"],
+        ("juridico@example.com",): ["46930", "historico"],
+    }
+
+    with NotificationDispatcher(digest=True, log_to_db=False) as dispatcher:
+        dispatcher.notify([date(2025, 10, 28)], "46930")
+        dispatcher.notify([date(2025, 10, 27)], "historico")
+        dispatcher.notify([date(2025, 10, 24)], "receita e despesa")
+        assert dispatcher.flush() == []
+
+    assert len(smtp_server.messages) == 2
+    orcamento, juridico = smtp_server.messages
+    assert "To: orcamento@example.com" in orcamento and "historico" not in orcamento
+    assert "To: juridico@example.com" in juridico and "receita e despesa" not in juridico
+
+
+def test_intervalo_minimo_por_termo(monkeypatch):
+    registry = SubscriptionRegistry()
+    registry._by_term = build_subscriptions(ROWS)
+    registry._checked_at = float("inf")
+    monkeypatch.setattr(scheduler, "get_subscriptions", lambda: registry)
+    monkeypatch.setattr(scheduler, "load_search_terms", registry.terms)
+    inicio = datetime(2025, 10, 28, 9, 0, tzinfo=scheduler.TZ)
+
+    assert scheduler.termos_no_prazo(None, inicio) is None
+    # 46930 a cada 30 min, receita e despesa a cada 60 min, historico sem intervalo
+    assert scheduler.termos_no_prazo(None, inicio + timedelta(minutes=30)) == ["46930", "historico"]
+    assert scheduler.termos_no_prazo(["receita e despesa"], inicio + timedelta(minutes=45)) == []
+    assert scheduler.termos_no_prazo(None, inicio + timedelta(minutes=60)) is None
+
+
+def test_sem_assinaturas_usa_o_env(monkeypatch):
+    monkeypatch.setattr(subscriptions, "_registry", None)
+    monkeypatch.setattr(subscriptions, "SUBSCRIPTIONS", False)
+    monkeypatch.setenv("SEARCH_TERMS", "46930, historico,")
+    monkeypatch.setenv("EMAIL_RECIPIENTS", "a@example.com,b@example.com")
+    registry = subscriptions.get_subscriptions()
+    assert registry.terms() == ["46930", "historico"]
+    assert registry.recipients("46930") == ["a@example.com", "b@example.com"]
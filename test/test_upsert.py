@@ -0,0 +1,52 @@
+"""
+Testes da gravação em lote no PostgreSQL (requer POSTGRES_TEST_DSN)
+"""
+
+from datetime import date
+
+import db
+
+
+def test_upsert_publications_retorna_apenas_datas_novas(pg_conn):
+    dates = [date(2025, 10, 28), date(2025, 10, 16), date(2025, 8, 7)]
+
+    assert db.upsert_publications(pg_conn, dates, "46930") == dates
+    assert db.upsert_publications(pg_conn, dates, "46930") == []
+
+    more = [date(2025, 11, 5)] + dates
+    assert db.upsert_publications(pg_conn, more, "46930") == [date(2025, 11, 5)]
+
+
+def test_upsert_publications_batch_separa_por_termo(pg_conn):
+    db.upsert_publications(pg_conn, [date(2025, 10, 28)], "46930")
+
+    new_by_term = db.upsert_publications_batch(pg_conn, {
+        "46930": [date(2025, 10, 28), date(2025, 10, 16)],
+        "47000": [date(2025, 10, 28)],
+        "vazio": [],
+    })
+
+    assert new_by_term == {
+        "46930": [date(2025, 10, 16)],
+        "47000": [date(2025, 10, 28)],
+        "vazio": [],
+    }
+    count = pg_conn.execute("SELECT COUNT(*) FROM decree_publications").fetchone()[0]
+    assert count == 3
+
+
+def test_fetch_known_dates(pg_conn):
+    db.upsert_publications(pg_conn, [date(2025, 8, 7), date(2025, 10, 28)], "46930")
+    db.upsert_publications(pg_conn, [date(2025, 9, 1)], "47000")
+
+    assert db.fetch_known_dates(pg_conn, "46930") == [date(2025, 10, 28), date(2025, 8, 7)]
+
+
+def test_upsert_preenche_raw_title(pg_conn):
+    titles = {date(2025, 10, 28): "DECRETO Nº 46930 - ALTERAÇÃO"}
+    db.upsert_publications(pg_conn, [date(2025, 10, 28), date(2025, 10, 16)], "46930", titles)
+
+    rows = pg_conn.execute(
+        "SELECT publication_date, raw_title FROM decree_publications ORDER BY publication_date DESC"
+    ).fetchall()
+    assert rows == [(date(2025, 10, 28), "DECRETO Nº 46930 - ALTERAÇÃO"), (date(2025, 10, 16), None)]
@@ -0,0 +1,60 @@
+"""
+Testes das esperas por evento do Selenium (com o navegador simulado)
+"""
+
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+import busca_decreto_receita_despesa as scraper
+from fake_browser import PageDelays, SimulatedDriver
+from waits import WaitBudget, backoff_wait, retry_delay
+
+
+def test_backoff_wait_devolve_assim_que_a_condicao_vale():
+    ready_at = time.monotonic() + 0.05
+    start = time.perf_counter()
+    assert backoff_wait(None, lambda _: time.monotonic() >= ready_at and "ok", timeout=2) == "ok"
+    assert time.perf_counter() - start < 0.2
+
+
+def test_backoff_wait_estoura_o_prazo():
+    with pytest.raises(TimeoutException):
+        backoff_wait(None, lambda _: False, timeout=0.05)
+
+
+def test_orcamento_limita_as_etapas():
+    now = [100.0]
+    budget = WaitBudget(10, clock=lambda: now[0])
+    assert budget.step(15) == 10
+    now[0] += 8
+    assert budget.step(15) == pytest.approx(2)
+    assert retry_delay(3, base=1, budget=budget) == pytest.approx(2)
+    now[0] += 5
+    with pytest.raises(TimeoutException):
+        budget.step(15)
+
+
+def test_busca_espera_o_dom_assentar_antes_do_clique():
+    # O DOM muda até 0,3 s depois do botão aparecer: clicar antes disso perde o clique
+    driver = SimulatedDriver(lambda: PageDelays(form=0.02, button=0.05, settle=0.35, results=0.1))
+
+    start = time.perf_counter()
+    page_html = scraper.search_with_driver(driver, "46930")
+    elapsed = time.perf_counter() - start
+
+    assert "28/10/2025" in page_html
+    assert driver.stale_clicks == 0
+    assert driver.clicks == 1
+    # assentar (0,35) + DOM parado (0,1) + resultados (0,1), sem as pausas fixas de antes
+    assert elapsed < 1.0
+
+
+def test_busca_falha_quando_o_orcamento_acaba():
+    driver = SimulatedDriver(lambda: PageDelays(form=0.01, button=0.02, settle=0.03, results=60))
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutException):
+        scraper.search_with_driver(driver, "46930", WaitBudget(0.5))
+    assert time.perf_counter() - start < 1.5
@@ -0,0 +1,132 @@
+"""
+Estratégia de espera do Selenium
+Substitui as pausas fixas (0,5 s antes do clique, 1 s entre tentativas) e a
+consulta a cada 0,5 s do WebDriverWait por esperas orientadas a eventos:
+consulta com intervalo crescente (começa em poucos milissegundos), prontidão
+da página pelo MutationObserver (DOM sem alterações há WAIT_DOM_QUIET_MS e
+document.readyState == "complete", ou seja, sem recursos pendentes) e um
+orçamento de tempo por termo repartido entre as etapas.
+"""
+
+import os
+import time
+from typing import Callable, Iterable, Optional, Type, TypeVar
+
+from dotenv import load_dotenv
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Constantes
+# Intervalo da primeira consulta e teto do intervalo (dobra a cada consulta), em segundos
+WAIT_POLL_INITIAL = float(os.getenv("WAIT_POLL_INITIAL", "0.025"))
+WAIT_POLL_MAX = float(os.getenv("WAIT_POLL_MAX", "0.1"))
+# DOM sem alterações por esse tempo = página estável para o clique
+WAIT_DOM_QUIET_MS = int(os.getenv("WAIT_DOM_QUIET_MS", "100"))
+# Prazo máximo de cada etapa, em segundos
+WAIT_FORM_TIMEOUT = float(os.getenv("WAIT_FORM_TIMEOUT", "15"))
+WAIT_CLICK_TIMEOUT = float(os.getenv("WAIT_CLICK_TIMEOUT", "15"))
+WAIT_STABLE_TIMEOUT = float(os.getenv("WAIT_STABLE_TIMEOUT", "2"))
+WAIT_RESULTS_TIMEOUT = float(os.getenv("WAIT_RESULTS_TIMEOUT", "20"))
+# Prazo total de um termo (todas as etapas e tentativas)
+WAIT_TERM_BUDGET = float(os.getenv("WAIT_TERM_BUDGET", "60"))
+# Espera base entre tentativas de clique (dobra a cada tentativa), em segundos
+CLICK_RETRY_BACKOFF = float(os.getenv("CLICK_RETRY_BACKOFF", "0.1"))
+# Duração do movimento do ponteiro até o botão (o padrão do ActionChains é 250 ms)
+CLICK_POINTER_MS = int(os.getenv("CLICK_POINTER_MS", "0"))
+
+T = TypeVar("T")
+
+# Registra o momento da última alteração do DOM (uma vez por página) e devolve
+# há quantos ms o DOM está parado e se a página terminou de carregar
+DOM_QUIET_JS = """
+if (!window.__decretoObserver) {
+    window.__decretoLastMutation = performance.now();
+    window.__decretoObserver = new MutationObserver(function () {
+        window.__decretoLastMutation = performance.now();
+    });
+    window.__decretoObserver.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return [performance.now() - window.__decretoLastMutation, document.readyState];
+"""
+
+
+class WaitBudget:
+    """
+    Orçamento de tempo de um termo
+
+    Cada etapa pede seu prazo com step(); o prazo devolvido nunca passa do que
+    resta do orçamento, e com o orçamento esgotado a etapa falha na hora.
+    """
+
+    def __init__(self, total: float = WAIT_TERM_BUDGET, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.deadline = clock() + total
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self._clock())
+
+    def step(self, cap: float) -> float:
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutException("Orçamento de tempo do termo esgotado")
+        return min(cap, remaining)
+
+
+def backoff_wait(driver, condition: Callable[[object], T], timeout: float,
+                 initial: float = WAIT_POLL_INITIAL, max_interval: float = WAIT_POLL_MAX,
+                 ignored: Iterable[Type[Exception]] = (NoSuchElementException, StaleElementReferenceException),
+                 message: str = "") -> T:
+    """
+    Espera `condition(driver)` devolver um valor verdadeiro, consultando com intervalo crescente
+
+    Mesmo contrato do WebDriverWait(driver, timeout).until(condition): devolve
+    o valor da condição ou levanta TimeoutException. A primeira consulta é
+    imediata e as seguintes dobram de intervalo até `max_interval`.
+    """
+    ignored = tuple(ignored)
+    deadline = time.monotonic() + timeout
+    interval = initial
+    while True:
+        try:
+            value = condition(driver)
+            if value:
+                return value
+        except ignored:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(message or f"Condição não atendida em {timeout:.1f}s")
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+
+def dom_quiet(quiet_ms: int = WAIT_DOM_QUIET_MS) -> Callable[[object], bool]:
+    """Condição: página carregada e DOM sem alterações há `quiet_ms` ms"""
+
+    def _condition(driver) -> bool:
+        idle_ms, ready_state = driver.execute_script(DOM_QUIET_JS)
+        return ready_state == "complete" and idle_ms >= quiet_ms
+
+    return _condition
+
+
+def wait_until_stable(driver, timeout: float = WAIT_STABLE_TIMEOUT, quiet_ms: int = WAIT_DOM_QUIET_MS) -> bool:
+    """
+    Espera a página parar de mudar; se não parar no prazo, segue assim mesmo
+
+    Returns:
+        True se a página estabilizou no prazo
+    """
+    try:
+        backoff_wait(driver, dom_quiet(quiet_ms), timeout)
+        return True
+    except TimeoutException:
+        return False
+
+
+def retry_delay(attempt: int, base: float = CLICK_RETRY_BACKOFF, budget: Optional[WaitBudget] = None) -> float:
+    """Espera antes da tentativa `attempt + 1` (0, 1, 2...): base, 2×base, 4×base..., limitada ao orçamento"""
+    delay = base * 2 ** attempt
+    return min(delay, budget.remaining()) if budget is not None else delay